@@ -0,0 +1,282 @@
+import numpy as np
+import scipy.stats as stats
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+def blocked_dropped_rates(blocked: float, dropped: float, completed: float) -> Tuple[float, float]:
+    """
+    Convert call counters into the blocked and dropped fractions used in the report,
+    i.e. blocked / (blocked + dropped + completed) and dropped / (blocked + dropped + completed).
+
+    Returns (0.0, 0.0) if no call has finished yet.
+    """
+    total = blocked + dropped + completed
+    if total == 0:
+        return 0.0, 0.0
+    return blocked / total, dropped / total
+
+
+def confidence_interval(data, confidence: float = 0.95) -> Tuple[float, float]:
+    """
+    Compute the mean and the t-based confidence interval half-width of `data`.
+
+    Args:
+        data: 1D array of independent observations (e.g. one estimate per replication)
+        confidence: Confidence level of the interval
+
+    Returns:
+        (mean, half_width)
+    """
+    data = np.asarray(data, dtype=float)
+    n = len(data)
+    if n < 2:
+        raise ValueError("At least two observations are needed for a confidence interval.")
+    t_value = stats.t.ppf((1 + confidence) / 2, n - 1)
+    return float(np.mean(data)), float(t_value * np.std(data, ddof=1) / np.sqrt(n))
+
+
+def replications_needed(data, half_width: float, confidence: float = 0.95) -> int:
+    """
+    Estimate how many replications reach the target half-width, using the
+    pilot-study formula n = n0 * (delta / beta)^2 from output_analysis.ipynb.
+    """
+    n0 = len(data)
+    _, delta = confidence_interval(data, confidence)
+    return int(np.ceil(n0 * (delta / half_width) ** 2))
+
+
+def lag1_autocorrelation(data) -> float:
+    """Lag-1 sample autocorrelation of a series (0.0 for a constant series)."""
+    data = np.asarray(data, dtype=float)
+    centered = data - data.mean()
+    denominator = np.dot(centered, centered)
+    if denominator == 0:
+        return 0.0
+    return float(np.dot(centered[:-1], centered[1:]) / denominator)
+
+
+def mser(data, batch_size: int = 5) -> int:
+    """
+    MSER truncation point of an output series (MSER-5 with the default batch size).
+
+    The series is averaged over non-overlapping groups of `batch_size` observations and
+    the number of leading groups d minimising the marginal standard error
+    sum((y_i - mean(y[d:]))^2 for i >= d) / (m - d)^2 is returned, in observations.
+    The point is only trustworthy if it lies in the first half of the series, see
+    `mser_truncation`.
+    """
+    data = np.asarray(data, dtype=float)
+    m = len(data) // batch_size
+    if m < 2:
+        raise ValueError(f"At least {2 * batch_size} observations are needed.")
+    groups = data[:m * batch_size].reshape(m, batch_size).mean(axis=1)
+    # Sums over the tails groups[d:], for d = 0 .. m - 2 (keep at least two groups)
+    tail_sum = np.cumsum(groups[::-1])[::-1][:-1]
+    tail_squares = np.cumsum(groups[::-1] ** 2)[::-1][:-1]
+    remaining = m - np.arange(m - 1)
+    standard_error = (tail_squares - tail_sum ** 2 / remaining) / remaining ** 2
+    return int(np.argmin(standard_error)) * batch_size
+
+
+def mser_truncation(series, batch_size: int = 5):
+    """
+    Joint MSER truncation point of several series observed together (e.g. the blocked
+    and dropped fractions), i.e. the latest of their truncation points.
+
+    Returns None while the point is not in the first half of the data, the usual sign
+    that the run is still too short to tell where the warm-up ends.
+    """
+    series = np.asarray(series, dtype=float)
+    truncation = max(mser(column, batch_size) for column in series.T)
+    if truncation > len(series) / 2:
+        return None
+    return truncation
+
+
+@dataclass
+class BatchMeansResult:
+    """Blocked and dropped estimates from the batch means of one long run."""
+    blocked: Tuple[float, float]  # (mean, half_width)
+    dropped: Tuple[float, float]  # (mean, half_width)
+    batch_size: int  # Micro-batches per batch
+    batches: int
+    autocorrelation: Tuple[float, float]  # Lag-1 autocorrelation of the blocked and dropped batch fractions
+    converged: bool  # False if min_batches was reached before the autocorrelation became negligible
+
+
+def batch_means(counts, min_batches: int = 10, max_autocorrelation: float = 0.1,
+                confidence: float = 0.95) -> BatchMeansResult:
+    """
+    Batch means estimate of the blocked and dropped fractions of one long run.
+
+    Consecutive micro-batches are merged into batches of doubling size until the lag-1
+    autocorrelation of both batch fraction series is at most `max_autocorrelation`, so
+    the batch fractions can be treated as independent observations for the t-based CI.
+    Trailing micro-batches that do not fill a batch are left out.
+
+    Args:
+        counts: (k, 3) array of (blocked, dropped, completed) counts per micro-batch
+        min_batches: Fewest batches the batch size may leave
+        max_autocorrelation: Largest accepted lag-1 autocorrelation
+        confidence: Confidence level of the intervals
+    """
+    counts = np.asarray(counts)
+    if len(counts) < min_batches:
+        raise ValueError(f"At least {min_batches} micro-batches are needed.")
+
+    size = 1
+    while True:
+        batches = counts[:len(counts) - len(counts) % size].reshape(-1, size, 3).sum(axis=1)
+        totals = np.maximum(batches.sum(axis=1), 1)
+        rates = batches[:, :2] / totals[:, None]
+        autocorrelation = (lag1_autocorrelation(rates[:, 0]), lag1_autocorrelation(rates[:, 1]))
+        converged = max(autocorrelation) <= max_autocorrelation
+        if converged or len(counts) // (2 * size) < min_batches:
+            break
+        size *= 2
+
+    return BatchMeansResult(
+        blocked=confidence_interval(rates[:, 0], confidence),
+        dropped=confidence_interval(rates[:, 1], confidence),
+        batch_size=size,
+        batches=len(batches),
+        autocorrelation=autocorrelation,
+        converged=converged,
+    )
+
+
+class OccupancyStatistics:
+    """
+    Online accumulators of channel occupancy and per-station call outcomes.
+
+    The simulator reports every change of a station's busy channels through `change`,
+    which adds the time spent at the previous level, so every update is O(1) and no
+    event log is needed. Time averages are taken over [start_time, time].
+    """
+
+    def __init__(self, number_of_base_stations: int, total_channels: int, start_time: float = 0.0):
+        self.number_of_base_stations = number_of_base_stations
+        self.total_channels = total_channels
+        self.levels = [0] * number_of_base_stations  # Busy channels per station
+        self.reset(start_time)
+
+    def reset(self, time: float):
+        """Discard everything accumulated so far (e.g. after a warm-up) and restart at `time`."""
+        n = self.number_of_base_stations
+        self.start_time = time
+        # time_at_level[s][k]: time station s spent with k busy channels
+        self.time_at_level = [[0.0] * (self.total_channels + 1) for _ in range(n)]
+        self._last_change = [time] * n
+        self.initiations = [0] * n  # New calls attempted in each station
+        self.blocked = [0] * n
+        self.handovers = [0] * n  # Handovers attempted into each station
+        self.dropped = [0] * n
+
+    def change(self, station: int, delta: int, time: float):
+        """Record that `station` gains (+1) or frees (-1) a channel at `time`."""
+        level = self.levels[station]
+        self.time_at_level[station][level] += time - self._last_change[station]
+        self._last_change[station] = time
+        self.levels[station] = level + delta
+
+    def occupancy_time(self, time: float) -> np.ndarray:
+        """Time each station spent at each number of busy channels up to `time`, shape (stations, channels + 1)."""
+        occupancy = np.array(self.time_at_level)
+        for station, level in enumerate(self.levels):
+            occupancy[station, level] += time - self._last_change[station]
+        return occupancy
+
+    def occupancy_distribution(self, time: float) -> np.ndarray:
+        """Fraction of time each station spent at each number of busy channels."""
+        elapsed = time - self.start_time
+        if elapsed <= 0:
+            raise ValueError("No time has elapsed since the statistics started.")
+        return self.occupancy_time(time) / elapsed
+
+    def mean_occupancy(self, time: float) -> np.ndarray:
+        """Time-averaged number of busy channels of each station."""
+        return self.occupancy_distribution(time) @ np.arange(self.total_channels + 1)
+
+    def utilization(self, time: float) -> np.ndarray:
+        """Time-averaged fraction of busy channels of each station."""
+        return self.mean_occupancy(time) / self.total_channels
+
+    def blocking_probability(self) -> np.ndarray:
+        """Fraction of new calls blocked in each station (nan where no call started)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.array(self.blocked) / np.array(self.initiations)
+
+    def dropping_probability(self) -> np.ndarray:
+        """Fraction of handovers into each station that were dropped (nan where none was attempted)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.array(self.dropped) / np.array(self.handovers)
+
+
+# Columns of a MetricRecorder sample
+RECORDED_METRICS = ('time', 'steps', 'blocked', 'dropped', 'completed', 'busy_channels')
+
+
+class MetricRecorder:
+    """
+    Periodic sampler of the simulator's counters, filled from inside Simulator.run/run_until.
+
+    Samples are taken every `every_time` seconds of simulated time, or every
+    `every_steps` processed events, and appended to a preallocated (capacity, metrics)
+    array that doubles when full. A time sample at t holds the state after every event
+    up to t. `steps` counts the events processed while the recorder was attached, so one
+    recorder can follow several consecutive runs.
+    """
+
+    def __init__(self, every_time: Optional[float] = None, every_steps: Optional[int] = None,
+                 capacity: int = 1024):
+        """
+        Args:
+            every_time: Simulated seconds between samples
+            every_steps: Processed events between samples (give exactly one of the two)
+            capacity: Initial number of sample rows
+        """
+        if (every_time is None) == (every_steps is None):
+            raise ValueError("Give exactly one of every_time and every_steps.")
+        if (every_time is not None and every_time <= 0) or (every_steps is not None and every_steps <= 0):
+            raise ValueError("The sampling interval must be positive.")
+        self.every_time = every_time
+        self.every_steps = every_steps
+        self.data = np.zeros((capacity, len(RECORDED_METRICS)))
+        self.size = 0
+        self.steps = 0
+        self.next_time = None  # Time of the next sample, set by the first run
+        self._next_index = 0  # next_time = _next_index * every_time, free of accumulated rounding
+        self.next_step = every_steps
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, metric: str) -> np.ndarray:
+        """Recorded values of one of RECORDED_METRICS."""
+        return self.data[:self.size, RECORDED_METRICS.index(metric)]
+
+    def as_dict(self) -> dict:
+        return {metric: self[metric] for metric in RECORDED_METRICS}
+
+    def start(self, time: float):
+        """Align the time samples to multiples of every_time after `time`, unless already running."""
+        if self.every_time is not None and self.next_time is None:
+            self._next_index = int(time // self.every_time) + 1
+            self.next_time = self._next_index * self.every_time
+
+    def sample(self, sim, time: float):
+        """Append the state of `sim` as a sample at `time`."""
+        if self.size == len(self.data):
+            self.data = np.concatenate([self.data, np.zeros_like(self.data)])
+        self.data[self.size] = (time, self.steps, sim.blocked_calls, sim.dropped_calls, sim.completed_calls,
+                                sum(sim.base_stations))
+        self.size += 1
+
+    def sample_until(self, sim, time: float, inclusive: bool = False) -> float:
+        """Take the time samples due before `time` (up to and including it if `inclusive`) and return the next due time."""
+        while self.next_time < time or (inclusive and self.next_time == time):
+            self.sample(sim, self.next_time)
+            self._next_index += 1
+            self.next_time = self._next_index * self.every_time
+        return self.next_time
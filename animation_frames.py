@@ -0,0 +1,230 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from simulator import Car, EventResult, EventType, CELL_DAIMETER, EPSILON, NUMBER_OF_BASE_STATIONS, TOTAL_CHANNELS
+
+# A Simulator.log / EventLog.entries() tuple
+LogEntry = Tuple[float, EventType, EventResult, Car, int, int, int]
+
+# Colors of the car of the current event
+EVENT_COLORS = {
+    EventResult.INITIATION_SUCCESS: "blue",
+    EventResult.HANDOVER_SUCCESS: "orange",
+    EventResult.TERMINATION: "green",
+    EventResult.INITIATION_BLOCKED: "red",
+    EventResult.HANDOVER_DROPPED: "purple",
+}
+ACTIVE_COLUMNS = ('car_id', 'abs_root_position', 'velocity', 'root_time', 'end_time')
+
+
+@dataclass
+class FrameData:
+    """Marker data of one animation frame, ready for a plotly Scatter trace."""
+    time: float
+    event_result: Optional[EventResult]  # None for a frame between events (see sample_frames)
+    car_id: Optional[int]
+    x: List[float] = field(default_factory=list)  # km from the start of the road
+    y: List[float] = field(default_factory=list)  # Channel slot within the station
+    texts: List[str] = field(default_factory=list)
+    hover_texts: List[str] = field(default_factory=list)
+    colors: List[str] = field(default_factory=list)
+
+
+class FrameBuilder:
+    """
+    Incremental builder of the animation frames.
+
+    The calls in progress are kept in an indexed active set of dense NumPy columns
+    (rows are compacted on removal, `_rows` maps car ids to rows). Every log event
+    changes the set by at most one car, and a frame computes the positions, stations
+    and channel slots of all active cars with a few vectorised expressions, so building
+    a frame costs O(active cars) instead of O(all cars ever seen).
+    """
+
+    def __init__(self, station_count: int = NUMBER_OF_BASE_STATIONS,
+                 capacity_per_station: int = TOTAL_CHANNELS, capacity: int = 64):
+        """
+        Args:
+            station_count: Number of base stations drawn
+            capacity_per_station: Channels per station; blocked and dropped calls are drawn above them
+            capacity: Initial number of rows of the active set
+        """
+        self.station_count = station_count
+        self.capacity_per_station = capacity_per_station
+        for name in ACTIVE_COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=np.int64 if name == 'car_id' else np.float64))
+        self.size = 0
+        self._rows: Dict[int, int] = {}
+        # Per row: marker text and the constant end of the hover text, formatted once per call
+        self._texts: List[str] = []
+        self._hover_tails: List[str] = []
+
+    def __len__(self) -> int:
+        """Number of calls in progress."""
+        return self.size
+
+    def add(self, car: Car):
+        """Add a call that was admitted."""
+        if self.size == len(self.car_id):
+            for name in ACTIVE_COLUMNS:
+                column = getattr(self, name)
+                setattr(self, name, np.concatenate([column, np.zeros_like(column)]))
+        row = self.size
+        self.car_id[row] = car._id
+        self.abs_root_position[row] = car.get_abs_position()
+        self.velocity[row] = car.velocity
+        self.root_time[row] = car.root_time
+        self.end_time[row] = car.get_end_time()
+        self._rows[car._id] = row
+        text = f"Car {car._id}<br>ET:{car.get_end_time():.1f}"
+        hover_tail = (f"<br>Velocity {car.velocity}<br>Start Time: {car.root_time}"
+                      f"<br>End Time: {car.get_end_time():.1f}")
+        if row == len(self._texts):
+            self._texts.append(text)
+            self._hover_tails.append(hover_tail)
+        else:
+            self._texts[row] = text
+            self._hover_tails[row] = hover_tail
+        self.size += 1
+
+    def remove(self, car_id: int):
+        """Remove an ended call, moving the last row into its place."""
+        row = self._rows.pop(car_id)
+        last = self.size - 1
+        if row != last:
+            for name in ACTIVE_COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+            self._texts[row] = self._texts[last]
+            self._hover_tails[row] = self._hover_tails[last]
+            self._rows[self.car_id.item(row)] = row
+        self.size = last
+
+    def frame(self, time: float, event_result: Optional[EventResult] = None,
+              event_car: Optional[Car] = None) -> FrameData:
+        """
+        Marker data of the active calls at `time`: each car in its station's next free
+        channel slot (in call order), the car of the current event (if any) highlighted,
+        and a blocked or dropped car above its station.
+        """
+        n = self.size
+        frame = FrameData(time, event_result, None if event_car is None else event_car._id)
+        if n:
+            car_id = self.car_id[:n]
+            velocity = self.velocity[:n]
+            abs_position = self.abs_root_position[:n] + velocity * (time - self.root_time[:n])
+            # The station just before `time`, so cars on a boundary belong to the cell they leave
+            station = ((abs_position - velocity * EPSILON) // CELL_DAIMETER).astype(np.int64)
+
+            # Slot = rank of the car among the cars of its station, in call order
+            by_station = np.lexsort((car_id, station))
+            sorted_station = station[by_station]
+            index = np.arange(n)
+            group_start = np.maximum.accumulate(np.where(np.r_[True, sorted_station[1:] != sorted_station[:-1]],
+                                                         index, 0))
+            slot = np.empty(n, dtype=np.int64)
+            slot[by_station] = index - group_start
+
+            order = np.argsort(car_id)
+            frame.x = (abs_position[order] / 1000.0).tolist()
+            frame.y = slot[order].tolist()
+            rows = order.tolist()
+            texts, hover_tails = self._texts, self._hover_tails
+            frame.texts = [texts[row] for row in rows]
+            frame.hover_texts = [
+                f"Car {car}<br>Station: {car_station}<br>Position: {x_pos:.2f} km{hover_tails[row]}"
+                for car, car_station, x_pos, row in zip(car_id[order].tolist(), station[order].tolist(), frame.x, rows)
+            ]
+            frame.colors = ["grey"] * n
+            event_row = None if event_car is None else self._rows.get(event_car._id)
+            if event_row is not None:
+                frame.colors[rows.index(event_row)] = EVENT_COLORS[event_result]
+
+        if event_result in (EventResult.INITIATION_BLOCKED, EventResult.HANDOVER_DROPPED):
+            x_pos = event_car.get_abs_position(time) / 1000.0
+            label = 'Blocked' if event_result == EventResult.INITIATION_BLOCKED else 'Dropped'
+            frame.x.append(x_pos)
+            frame.y.append(self.capacity_per_station)
+            frame.texts.append(f"Car {event_car._id}<br>{label}")
+            frame.hover_texts.append(f"Car {event_car._id}<br>Station: {event_car.get_current_station(time)}"
+                                     f"<br>Position: {x_pos:.2f} km")
+            frame.colors.append(EVENT_COLORS[event_result])
+        return frame
+
+    def apply(self, entry: LogEntry):
+        """Apply one log entry to the active set without building its frame."""
+        event_result, car = entry[2:4]
+        if event_result == EventResult.INITIATION_SUCCESS:
+            self.add(car)
+        elif event_result in (EventResult.HANDOVER_DROPPED, EventResult.TERMINATION):
+            self.remove(car._id)
+
+    def update(self, entry: LogEntry) -> FrameData:
+        """Apply one log entry to the active set and return its frame."""
+        time, _, event_result, car = entry[:4]
+        if event_result == EventResult.INITIATION_SUCCESS:
+            self.add(car)
+        elif event_result == EventResult.HANDOVER_DROPPED:
+            self.remove(car._id)
+        frame = self.frame(time, event_result, car)
+        if event_result == EventResult.TERMINATION:
+            # Drawn a last time at the end of the call
+            self.remove(car._id)
+        return frame
+
+
+def iter_frames(entries: Iterable[LogEntry], station_count: int = NUMBER_OF_BASE_STATIONS,
+                capacity_per_station: int = TOTAL_CHANNELS) -> Iterator[FrameData]:
+    """Yield the frame of every logged event, one at a time (see FrameBuilder)."""
+    builder = FrameBuilder(station_count, capacity_per_station)
+    for entry in entries:
+        yield builder.update(entry)
+
+
+def sample_frames(entries: Iterable[LogEntry], interval: float, highlight: Sequence[EventResult] = (),
+                  max_highlights: Optional[int] = None, station_count: int = NUMBER_OF_BASE_STATIONS,
+                  capacity_per_station: int = TOTAL_CHANNELS) -> Iterator[FrameData]:
+    """
+    Yield frames on a fixed simulated-time grid instead of one per event.
+
+    The frame at time k * interval shows the calls in progress at that time, so the
+    number of frames depends on the simulated time only, not on the number of events.
+    Events whose result is in `highlight` (e.g. blocks and drops) also get their own
+    frame, at most `max_highlights` of them.
+
+    Args:
+        entries: Log entries in time order
+        interval: Simulated seconds between two grid frames
+        highlight: Event results that get a frame of their own
+        max_highlights: Maximum number of highlighted event frames; None for no limit
+        station_count: Number of base stations drawn
+        capacity_per_station: Channels per station
+    """
+    if interval <= 0:
+        raise ValueError(f"interval must be positive, got {interval}.")
+    builder = FrameBuilder(station_count, capacity_per_station)
+    grid_index, highlights = 0, 0
+    for entry in entries:
+        time, event_result = entry[0], entry[2]
+        # The active set only changes at events, so it is exact for every grid time before this one
+        while grid_index * interval < time:
+            yield builder.frame(grid_index * interval)
+            grid_index += 1
+        if event_result in highlight and (max_highlights is None or highlights < max_highlights):
+            highlights += 1
+            yield builder.update(entry)
+        else:
+            builder.apply(entry)
+
+
+def build_frames(entries: Iterable[LogEntry], station_count: int = NUMBER_OF_BASE_STATIONS,
+                 capacity_per_station: int = TOTAL_CHANNELS) -> List[FrameData]:
+    """
+    Build the marker data of one frame per logged event.
+
+    A frame holds one marker per call in progress, in its station's channel slots, and
+    the car of a blocked or dropped call at the top of its station.
+    """
+    return list(iter_frames(entries, station_count, capacity_per_station))
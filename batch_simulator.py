@@ -0,0 +1,234 @@
+from typing import List
+
+import numpy as np
+
+from event_list import HeapEventList
+from generator import Generator
+from simulator import (
+    EventType, TOTAL_CHANNELS, NUMBER_OF_BASE_STATIONS, CELL_DAIMETER, TOTAL_ROAD_LENGTH, EPSILON
+)
+
+CAR_COLUMNS = ('velocity', 'root_station', 'root_time', 'abs_root_position', 'direction', 'end_time')
+
+
+class BatchSimulator:
+    """
+    Lockstep engine that advances R independent replications together.
+
+    Every step processes the next event of each replication, so after `run(n)` every
+    replication is exactly where `Simulator.run(n)` would have left it. The state is
+    held in arrays with one row per replication (channel occupancy is R x
+    NUMBER_OF_BASE_STATIONS, the car table R x capacity) and the event handlers are
+    applied to all replications at once with NumPy, which amortises the interpreter
+    overhead over R. Only the event lists stay per replication.
+
+    Cars are drawn `block_size` at a time per replication with Generator.generate_cars,
+    so the generators need per-variable substreams. Given generators built with the same
+    arguments, every replication's counters match an independent Simulator run.
+    """
+
+    def __init__(self, generators: List[Generator], channel_reserved_for_handover=0,
+                 block_size: int = 1024, capacity: int = 256):
+        """
+        Args:
+            generators: One generator (with substreams=True) per replication
+            channel_reserved_for_handover: Channels per station that new calls cannot use
+            block_size: Number of cars drawn per replication at a time
+            capacity: Initial number of car slots per replication
+        """
+        self.gens = generators
+        self.replications = len(generators)
+        self.channel_reserved_for_handover = channel_reserved_for_handover
+        self.block_size = block_size
+
+        r = self.replications
+        self.clock = np.zeros(r)  # Simulation clock of each replication in seconds
+        self.event_lists = [HeapEventList() for _ in range(r)]
+        self.base_stations = np.zeros((r, NUMBER_OF_BASE_STATIONS), dtype=np.int64)
+        self.blocked_calls = np.zeros(r, dtype=np.int64)
+        self.dropped_calls = np.zeros(r, dtype=np.int64)
+        self.completed_calls = np.zeros(r, dtype=np.int64)
+
+        # Car table: one row of slots per replication, free slots popped from the end
+        for name in CAR_COLUMNS:
+            dtype = np.int64 if name in ('root_station', 'direction') else np.float64
+            setattr(self, name, np.zeros((r, capacity), dtype=dtype))
+        self._free = [list(range(capacity - 1, -1, -1)) for _ in range(r)]
+
+        # Pre-drawn cars, refilled per replication when its cursor reaches block_size
+        self._cars = {}
+        self._cursor = np.full(r, block_size)
+
+        rows = np.arange(r)
+        new_cars = self._gen_cars(rows)
+        self._push(rows, self.root_time[rows, new_cars], EventType.CALL_INITIATION, new_cars)
+
+    @property
+    def capacity(self) -> int:
+        return self.velocity.shape[1]
+
+    def counters(self) -> np.ndarray:
+        """Return the (blocked, dropped, completed) counters of every replication, shape (R, 3)."""
+        return np.stack([self.blocked_calls, self.dropped_calls, self.completed_calls], axis=1)
+
+    def _grow(self):
+        """Double the number of car slots of every replication."""
+        old_capacity = self.capacity
+        for name in CAR_COLUMNS:
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate([column, np.zeros_like(column)], axis=1))
+        for free in self._free:
+            free.extend(range(2 * old_capacity - 1, old_capacity - 1, -1))
+
+    def _allocate(self, rows: np.ndarray) -> np.ndarray:
+        """Take one free car slot in each of the given replications."""
+        if any(not self._free[r] for r in rows.tolist()):
+            self._grow()
+        return np.array([self._free[r].pop() for r in rows.tolist()], dtype=np.int64)
+
+    def _release(self, rows: np.ndarray, slots: np.ndarray):
+        for r, slot in zip(rows.tolist(), slots.tolist()):
+            self._free[r].append(slot)
+
+    def _refill(self, r: int):
+        """Draw the next block of cars for replication r."""
+        block = self.gens[r].generate_cars(self.block_size)
+        if not self._cars:
+            self._cars = {name: np.zeros((self.replications, self.block_size), dtype=values.dtype)
+                          for name, values in block.items()}
+        for name, values in block.items():
+            self._cars[name][r] = values
+        self._cursor[r] = 0
+
+    def _gen_cars(self, rows: np.ndarray) -> np.ndarray:
+        """Add the next car of each given replication to the car table and return the slots."""
+        for r in rows[self._cursor[rows] == self.block_size].tolist():
+            self._refill(r)
+        cursor = self._cursor[rows]
+        self._cursor[rows] += 1
+        drawn = {name: values[rows, cursor] for name, values in self._cars.items()}
+
+        # Same conversions, in the same order, as Simulator._gen_car
+        velocity = drawn['velocity'] * drawn['direction'] * 1000 / 3600  # Convert km/h to m/s
+        root_position = drawn['position'] * 1000
+        root_station = drawn['base_station']
+        root_time = drawn['inter_arrival_time'] + self.clock[rows]
+
+        slots = self._allocate(rows)
+        self.velocity[rows, slots] = velocity
+        self.root_station[rows, slots] = root_station
+        self.root_time[rows, slots] = root_time
+        self.abs_root_position[rows, slots] = root_station * CELL_DAIMETER + root_position
+        self.direction[rows, slots] = np.sign(velocity)
+        self.end_time[rows, slots] = root_time + drawn['call_duration']
+        return slots
+
+    def _push(self, rows: np.ndarray, times: np.ndarray, event_code, slots: np.ndarray):
+        if np.ndim(event_code) == 0:
+            event_code = np.full(len(rows), int(event_code))
+        for r, time, code, slot in zip(rows.tolist(), times.tolist(), event_code.tolist(), slots.tolist()):
+            self.event_lists[r].push(time, code, slot)
+
+    def _abs_position(self, rows, slots, current_time):
+        return self.abs_root_position[rows, slots] + self.velocity[rows, slots] * (current_time - self.root_time[rows, slots])
+
+    @staticmethod
+    def _station_of(abs_position: np.ndarray) -> np.ndarray:
+        if np.any(abs_position >= TOTAL_ROAD_LENGTH) or np.any(abs_position < 0):
+            raise ValueError("Car is out of bounds.")
+        return (abs_position // CELL_DAIMETER).astype(np.int64)
+
+    def _schedule_next(self, rows: np.ndarray, slots: np.ndarray):
+        """Schedule the next handover, or the termination, of cars that just got a channel."""
+        clock = self.clock[rows]
+        abs_position = self._abs_position(rows, slots, clock)
+        velocity = self.velocity[rows, slots]
+        direction = self.direction[rows, slots]
+        # Vectorised simulator.time_to_station_boundary
+        current_station = self._station_of(abs_position)
+        station_abs_end = current_station * CELL_DAIMETER + CELL_DAIMETER / 2 + direction * CELL_DAIMETER / 2
+        time_to_next = np.where(
+            np.abs(abs_position - station_abs_end) < EPSILON,
+            CELL_DAIMETER / np.abs(velocity),
+            (station_abs_end - abs_position) / velocity
+        )
+        time_of_next_station = time_to_next + clock
+        end_time = self.end_time[rows, slots]
+        terminates = time_of_next_station > end_time
+        self._push(
+            rows,
+            np.where(terminates, end_time, time_of_next_station),
+            np.where(terminates, int(EventType.CALL_TERMINATION), int(EventType.CALL_HANDOVER)),
+            slots
+        )
+
+    def run(self, max_steps=1000):
+        """Run every replication for a specified number of steps."""
+        for _ in range(max_steps):
+            self.step()
+
+    def step(self):
+        """Process the next event of every replication."""
+        events = np.array([event_list.pop() for event_list in self.event_lists])
+        time = events[:, 0]
+        codes = events[:, 2].astype(np.int64)
+        slots = events[:, 3].astype(np.int64)
+
+        assert np.all(time >= self.clock), "Event time is less than current clock."
+        self.clock = time
+
+        for event_type, handler in (
+            (EventType.CALL_INITIATION, self._handle_call_initiation),
+            (EventType.CALL_HANDOVER, self._handle_call_handover),
+            (EventType.CALL_TERMINATION, self._handle_call_termination),
+        ):
+            rows = np.flatnonzero(codes == event_type)
+            if len(rows):
+                handler(rows, slots[rows])
+
+        assert self.base_stations.max() <= TOTAL_CHANNELS, "Base station channels exceeded."
+        assert self.base_stations.min() >= 0, "Base station channels negative."
+
+    def _handle_call_initiation(self, rows: np.ndarray, slots: np.ndarray):
+        # Initialise next call
+        new_cars = self._gen_cars(rows)
+        self._push(rows, self.root_time[rows, new_cars], EventType.CALL_INITIATION, new_cars)
+
+        # Check if the call can be initiated
+        station = self._station_of(self._abs_position(rows, slots, self.clock[rows]))
+        admitted = self.base_stations[rows, station] < TOTAL_CHANNELS - self.channel_reserved_for_handover
+        self.blocked_calls[rows[~admitted]] += 1
+        self._release(rows[~admitted], slots[~admitted])
+
+        # Add car to the base station and schedule its next event
+        rows, slots = rows[admitted], slots[admitted]
+        self.base_stations[rows, self.root_station[rows, slots]] += 1
+        self._schedule_next(rows, slots)
+
+    def _handle_call_handover(self, rows: np.ndarray, slots: np.ndarray):
+        # As all handover events are at boundary conditions, subtract EPSILON from the clock to get the station
+        current_station = self._station_of(self._abs_position(rows, slots, self.clock[rows] - EPSILON))
+        next_station = current_station + self.direction[rows, slots]
+
+        # Release the channel from the current station
+        self.base_stations[rows, current_station] -= 1
+
+        # Cars leaving the highway complete their call
+        leaves = (next_station < 0) | (next_station >= NUMBER_OF_BASE_STATIONS)
+        self.completed_calls[rows[leaves]] += 1
+        self._release(rows[leaves], slots[leaves])
+        rows, slots, next_station = rows[~leaves], slots[~leaves], next_station[~leaves]
+
+        free = self.base_stations[rows, next_station] < TOTAL_CHANNELS
+        self.dropped_calls[rows[~free]] += 1
+        self._release(rows[~free], slots[~free])
+
+        rows, slots = rows[free], slots[free]
+        self.base_stations[rows, next_station[free]] += 1
+        self._schedule_next(rows, slots)
+
+    def _handle_call_termination(self, rows: np.ndarray, slots: np.ndarray):
+        station = self._station_of(self._abs_position(rows, slots, self.clock[rows]))
+        self.base_stations[rows, station] -= 1
+        self.completed_calls[rows] += 1
+        self._release(rows, slots)
@@ -0,0 +1,69 @@
+"""
+Compare antithetic replication pairs against plain independent replications for
+the blocked/dropped fractions, in variance per CPU-second.
+
+Each antithetic pair costs two simulation runs and yields one observation; each
+independent replication costs one run. The last column is the CPU time needed to
+reach the target CI half-width (0.002 in output_analysis.ipynb).
+
+Usage:
+    python benchmarks/bench_antithetic.py [--pairs K] [--warm-up-steps W] [--steps N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from generator import Generator, spawn_seeds
+from simulator import Simulator
+from analysis import replications_needed
+
+PARAMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'params.yaml')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=10)
+    parser.add_argument('--warm-up-steps', type=int, default=5_000)
+    parser.add_argument('--steps', type=int, default=50_000)
+    parser.add_argument('--half-width', type=float, default=0.002)
+    parser.add_argument('--channel-reserved-for-handover', type=int, default=0)
+    parser.add_argument('--block-size', type=int, default=4096, help='Generator block size for both methods')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    seeds = spawn_seeds(args.seed, 3 * args.pairs)
+    observations = {'antithetic': [], 'independent': []}
+    cpu_seconds = {}
+
+    start = time.process_time()
+    for seed in seeds[:args.pairs]:
+        observations['antithetic'].append(Simulator.antithetic_replication(
+            seed, args.warm_up_steps, args.steps, args.channel_reserved_for_handover, PARAMS_FILE,
+            block_size=args.block_size
+        ))
+    cpu_seconds['antithetic'] = (time.process_time() - start) / args.pairs
+
+    start = time.process_time()
+    for seed in seeds[args.pairs:]:
+        sim = Simulator(Generator(PARAMS_FILE, seed=seed, block_size=args.block_size), args.channel_reserved_for_handover)
+        observations['independent'].append(sim.steady_state_rates(args.warm_up_steps, args.steps))
+    cpu_seconds['independent'] = (time.process_time() - start) / (2 * args.pairs)
+
+    print(f"{'method':<12} {'metric':<8} {'mean':>9} {'variance':>10} {'cpu s/obs':>10} "
+          f"{'var*cpu':>10} {'obs for ±' + str(args.half_width):>16} {'cpu s':>8}")
+    for label, data in observations.items():
+        data = np.array(data)
+        for column, name in enumerate(('blocked', 'dropped')):
+            variance = np.var(data[:, column], ddof=1)
+            needed = replications_needed(data[:, column], args.half_width)
+            print(f"{label:<12} {name:<8} {np.mean(data[:, column]):>9.5f} {variance:>10.3e} "
+                  f"{cpu_seconds[label]:>10.2f} {variance * cpu_seconds[label]:>10.3e} {needed:>16} "
+                  f"{needed * cpu_seconds[label]:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark the lockstep BatchSimulator against running the replications one by one
+with Simulator (events/sec summed over all replications).
+
+Usage:
+    python benchmarks/bench_batch.py [--replications R ...] [--steps N]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from batch_simulator import BatchSimulator
+from generator import Generator
+from simulator import Simulator
+
+PARAMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'params.yaml')
+
+
+def sequential_rate(replications: int, steps: int, block_size) -> float:
+    gens = Generator.spawn(replications, 0, PARAMS_FILE, substreams=True, block_size=block_size)
+    start = time.perf_counter()
+    for gen in gens:
+        Simulator(gen, 1).run(steps)
+    return replications * steps / (time.perf_counter() - start)
+
+
+def batch_rate(replications: int, steps: int) -> float:
+    sim = BatchSimulator(Generator.spawn(replications, 0, PARAMS_FILE, substreams=True), 1)
+    start = time.perf_counter()
+    sim.run(steps)
+    return replications * steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--replications', type=int, nargs='+', default=[1, 8, 64, 256])
+    parser.add_argument('--steps', type=int, default=2_000)
+    parser.add_argument('--block-size', type=int, default=4096, help='Generator block size of the sequential runs')
+    args = parser.parse_args()
+
+    print(f"{'R':>6}{'sequential':>14}{'batch':>14}{'speed-up':>10}   (events/sec)")
+    for replications in args.replications:
+        sequential = sequential_rate(replications, args.steps, args.block_size or None)
+        batch = batch_rate(replications, args.steps)
+        print(f'{replications:>6}{sequential:>14,.0f}{batch:>14,.0f}{batch / sequential:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
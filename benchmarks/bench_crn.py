@@ -0,0 +1,54 @@
+"""
+Compare common random numbers (CRN) against independent streams when estimating the
+difference in blocked/dropped fractions between two handover reservation policies.
+
+Usage:
+    python benchmarks/bench_crn.py [--replications R] [--warm-up-steps W] [--steps N]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from generator import Generator, spawn_seeds
+from simulator import Simulator
+from analysis import confidence_interval, replications_needed
+
+PARAMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'params.yaml')
+POLICIES = (0, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--replications', type=int, default=20)
+    parser.add_argument('--warm-up-steps', type=int, default=5_000)
+    parser.add_argument('--steps', type=int, default=50_000)
+    parser.add_argument('--half-width', type=float, default=0.002, help='Target CI half-width of the difference')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    seeds = spawn_seeds(args.seed, 3 * args.replications)
+    differences = {'CRN': [], 'independent': []}
+    for r in range(args.replications):
+        crn_gens = Generator.common_random_numbers(len(POLICIES), seeds[r], PARAMS_FILE)
+        independent_gens = [Generator(PARAMS_FILE, seed=seeds[args.replications * (i + 1) + r], substreams=True)
+                            for i in range(len(POLICIES))]
+        for label, gens in (('CRN', crn_gens), ('independent', independent_gens)):
+            rates = [Simulator(gen, policy).steady_state_rates(args.warm_up_steps, args.steps)
+                     for gen, policy in zip(gens, POLICIES)]
+            differences[label].append(np.subtract(rates[0], rates[1]))
+
+    print(f"Difference reserve={POLICIES[0]} minus reserve={POLICIES[1]} over {args.replications} replications")
+    for label, diffs in differences.items():
+        diffs = np.array(diffs)
+        for column, name in enumerate(('blocked', 'dropped')):
+            mean, half_width = confidence_interval(diffs[:, column])
+            needed = replications_needed(diffs[:, column], args.half_width)
+            print(f"{label:<12} {name:<8} {mean:+.5f} ± {half_width:.5f} "
+                  f"(var {np.var(diffs[:, column], ddof=1):.3e}, replications for ±{args.half_width}: {needed})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare the in-memory event log (Simulator(logging=True)) with the streaming
+ColumnarLogSink: peak traced Python memory and steps/sec of a logged run.
+
+Usage:
+    python benchmarks/bench_event_log.py [--steps N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from event_log import ColumnarLogSink, EventLog
+from generator import Generator
+from simulator import Simulator
+
+PARAMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'params.yaml')
+
+
+def run(steps: int, directory: str, mode: str, trace: bool) -> float:
+    """Run a logged simulation and return its wall time, or its peak memory if `trace`."""
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    if mode == 'list':
+        sim = Simulator(Generator(PARAMS_FILE, seed=0), logging=True)
+        sim.run(steps)
+    else:
+        with ColumnarLogSink(os.path.join(directory, 'log')) as sink:
+            Simulator(Generator(PARAMS_FILE, seed=0), log_sink=sink).run(steps)
+    elapsed = time.perf_counter() - start
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, default=385_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'log':>9} {'peak KiB':>10} {'steps/sec':>12}")
+        for mode in ('list', 'columnar'):
+            peak = run(args.steps, directory, mode, trace=True)
+            elapsed = run(args.steps, directory, mode, trace=False)
+            print(f"{mode:>9} {peak / 1024:>10,.0f} {args.steps / elapsed:>12,.0f}")
+
+        log = EventLog(os.path.join(directory, 'log'))
+        size = sum(os.path.getsize(os.path.join(directory, 'log', name)) for name in os.listdir(os.path.join(directory, 'log')))
+        print(f"columnar log: {len(log):,} events, {size / 1024:,.0f} KiB on disk")
+
+
+if __name__ == '__main__':
+    main()
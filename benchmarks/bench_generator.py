@@ -0,0 +1,60 @@
+"""
+Benchmark Generator sampling throughput: scalar path vs block-buffered mode.
+
+Usage:
+    python benchmarks/bench_generator.py [--samples N] [--block-sizes B1 B2 ...]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path to import Generator class
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from generator import Generator, DISTRIBUTIONS
+
+PARAMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'params.yaml')
+
+
+def samples_per_second(gen: Generator, name: str, samples: int) -> float:
+    """Time `samples` calls to the named generate_* method."""
+    sample = getattr(gen, f'generate_{name}')
+    start = time.perf_counter()
+    for _ in range(samples):
+        sample()
+    return samples / (time.perf_counter() - start)
+
+
+def cars_per_second(gen: Generator, samples: int) -> float:
+    """Time drawing full cars, i.e. one value of every distribution, as Simulator._gen_car does."""
+    start = time.perf_counter()
+    for _ in range(samples):
+        gen.generate_velocity()
+        gen.generate_direction()
+        gen.generate_call_duration()
+        gen.generate_position()
+        gen.generate_base_station()
+        gen.generate_inter_arrival_time()
+    return samples / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', type=int, default=200_000, help='Samples drawn per measurement')
+    parser.add_argument('--block-sizes', type=int, nargs='+', default=[1024, 8192, 65536])
+    args = parser.parse_args()
+
+    modes = [('scalar', None)] + [(f'block={b}', b) for b in args.block_sizes]
+
+    print(f"{'distribution':<20}" + ''.join(f'{label:>16}' for label, _ in modes))
+    for name in DISTRIBUTIONS:
+        rates = [samples_per_second(Generator(PARAMS_FILE, seed=0, block_size=b), name, args.samples) for _, b in modes]
+        print(f'{name:<20}' + ''.join(f'{rate:>16,.0f}' for rate in rates))
+
+    rates = [cars_per_second(Generator(PARAMS_FILE, seed=0, block_size=b), args.samples) for _, b in modes]
+    print(f"{'car (all six)':<20}" + ''.join(f'{rate:>16,.0f}' for rate in rates))
+    print("(samples/sec)")
+
+
+if __name__ == '__main__':
+    main()
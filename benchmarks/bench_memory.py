@@ -0,0 +1,57 @@
+"""
+Measure memory and speed of long simulator runs at high offered load.
+
+The offered load is raised by scaling the arrival rate in params.yaml. Reported are
+the peak traced Python memory (tracemalloc), the number of live objects at the end
+of the run, and steps/sec (measured in a separate run without tracing).
+
+Usage:
+    python benchmarks/bench_memory.py [--steps N] [--load-factors F1 F2 ...]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from generator import Generator
+from simulator import Simulator
+
+PARAMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'params.yaml')
+
+
+def make_simulator(load_factor: float) -> Simulator:
+    gen = Generator(PARAMS_FILE, seed=0)
+    gen.inter_arrival_time_lambda *= load_factor
+    return Simulator(gen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, default=200_000)
+    parser.add_argument('--load-factors', type=float, nargs='+', default=[1.0, 5.0, 20.0])
+    args = parser.parse_args()
+
+    print(f"{'load':>6} {'pending events':>15} {'peak KiB':>10} {'live objects':>13} {'steps/sec':>12}")
+    for load_factor in args.load_factors:
+        sim = make_simulator(load_factor)
+        start = time.perf_counter()
+        sim.run(args.steps)
+        steps_per_second = args.steps / (time.perf_counter() - start)
+
+        sim = make_simulator(load_factor)
+        gc.collect()
+        tracemalloc.start()
+        sim.run(args.steps)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        gc.collect()
+        live_objects = len(gc.get_objects())
+
+        print(f"{load_factor:>6.1f} {len(sim.event_list):>15,} {peak / 1024:>10,.0f} {live_objects:>13,} {steps_per_second:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark ParallelSimulator on a long highway: wall time of one replication for a
+growing number of segments (worker processes).
+
+The highway is scaled up from the assignment's 20 cells to --cells cells, with the
+call arrival rate scaled by the same factor so the load per cell is unchanged.
+
+Usage:
+    python benchmarks/bench_parallel.py [--cells C] [--end-time T] [--segments S1 S2 ...]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from generator import Generator
+from parallel_simulator import ParallelSimulator
+from simulator import NUMBER_OF_BASE_STATIONS
+
+PARAMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'params.yaml')
+
+
+def scaled_params_file(cells: int, directory: str) -> str:
+    """Write a params file for a highway of `cells` cells with the same load per cell."""
+    with open(PARAMS_FILE, 'r') as file:
+        params = yaml.safe_load(file)
+    params['base_station']['max'] = cells - 1
+    params['inter_arrival_time']['lambda'] *= cells / NUMBER_OF_BASE_STATIONS
+    path = os.path.join(directory, f'params_{cells}.yaml')
+    with open(path, 'w') as file:
+        yaml.safe_dump(params, file)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cells', type=int, default=2000)
+    parser.add_argument('--end-time', type=float, default=2000.0, help='Simulated seconds')
+    parser.add_argument('--segments', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        params_file = scaled_params_file(args.cells, directory)
+        print(f"{args.cells} cells, {args.end_time:g} simulated seconds")
+        print(f"{'segments':>9}{'seconds':>10}{'speed-up':>10}{'completed':>12}")
+        baseline = None
+        for segments in args.segments:
+            gen = Generator(params_file, seed=0, substreams=True)
+            start = time.perf_counter()
+            with ParallelSimulator(gen, segments, 1, number_of_base_stations=args.cells,
+                                   processes=segments > 1) as sim:
+                sim.run_until(args.end_time)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f'{segments:>9}{elapsed:>10.2f}{baseline / elapsed:>9.1f}x{sim.completed_calls:>12,}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark Simulator throughput (events/sec) for the available engine options.
+
+Usage:
+    python benchmarks/bench_simulator.py [--steps N] [--block-size B]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from generator import Generator
+from simulator import Simulator
+
+PARAMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'params.yaml')
+
+ENGINES = {
+    'default': {},
+    'itinerary': {'itinerary': True},
+    'calendar': {'event_list': 'calendar'},
+}
+
+
+def events_per_second(steps: int, block_size, channel_reserved_for_handover: int, **engine_kwargs) -> float:
+    sim = Simulator(Generator(PARAMS_FILE, seed=0, block_size=block_size), channel_reserved_for_handover, **engine_kwargs)
+    start = time.perf_counter()
+    sim.run(steps)
+    return steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--steps', type=int, default=200_000)
+    parser.add_argument('--block-size', type=int, default=4096, help='Generator block size (0 for the scalar path)')
+    parser.add_argument('--repeats', type=int, default=3, help='Best of this many runs is reported')
+    args = parser.parse_args()
+
+    print(f"{'reserved':>9}" + ''.join(f'{name:>14}' for name in ENGINES) + "   (events/sec)")
+    for reserved in (0, 1):
+        rates = [
+            max(events_per_second(args.steps, args.block_size or None, reserved, **kwargs) for _ in range(args.repeats))
+            for kwargs in ENGINES.values()
+        ]
+        print(f'{reserved:>9}' + ''.join(f'{rate:>14,.0f}' for rate in rates))
+
+
+if __name__ == '__main__':
+    main()
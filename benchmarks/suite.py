@@ -0,0 +1,191 @@
+"""
+Benchmark suite with regression thresholds.
+
+Measures the throughput of:
+  - Simulator.step at several offered loads (arrival rate x 0.5, 1, 1.5) and reservation settings
+  - every Generator distribution, scalar and block-buffered
+  - event list hold operations (heap and calendar)
+  - animation frame construction (animation_frames.build_frames) from a logged run
+and compares the median of --repeats runs against a JSON baseline. The exit status is 1
+if any case is slower than the baseline by more than --tolerance, so the suite can gate a change.
+
+Baselines are machine specific, so the baseline file holds one entry per machine
+(host name, architecture and Python version) and no baseline is committed: record
+one with --save-baseline on the machine that runs the comparison, before the change.
+A comparison against a baseline recorded with a different --quick setting is refused.
+
+Usage:
+    python benchmarks/suite.py --save-baseline      # record this machine's baseline
+    python benchmarks/suite.py                      # compare against it
+    python benchmarks/suite.py --cases simulator --tolerance 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+import numpy as np
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from animation_frames import build_frames
+from bench_event_list import bench_event_list
+from bench_generator import samples_per_second
+from event_list import EVENT_LISTS
+from generator import Generator, DISTRIBUTIONS
+from simulator import Simulator
+
+PARAMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'params.yaml')
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+LOADS = (0.5, 1.0, 1.5)  # Multipliers of the params.yaml arrival rate
+RESERVED = (0, 1)
+
+# Work per case: (full, --quick)
+SIMULATOR_STEPS = (300_000, 10_000)
+GENERATOR_SAMPLES = (500_000, 10_000)
+EVENT_LIST_SIZE, EVENT_LIST_HOLDS = 1000, (1_000_000, 20_000)
+ANIMATION_STEPS = (5000, 200)
+
+
+def machine_id() -> str:
+    """Key of this machine's entry in the baseline file."""
+    return f'{platform.node()}/{platform.machine()}/python-{platform.python_version()}'
+
+
+def load_params_file(load: float, directory: str) -> str:
+    """Write a params file with the arrival rate scaled by `load`."""
+    with open(PARAMS_FILE, 'r') as file:
+        params = yaml.safe_load(file)
+    params['inter_arrival_time']['lambda'] *= load
+    path = os.path.join(directory, f'params_load_{load:g}.yaml')
+    with open(path, 'w') as file:
+        yaml.safe_dump(params, file)
+    return path
+
+
+def simulator_events_per_second(params_file: str, reserved: int, steps: int) -> float:
+    sim = Simulator(Generator(params_file, seed=0), reserved)
+    start = time.perf_counter()
+    sim.run(steps)
+    return steps / (time.perf_counter() - start)
+
+
+def frames_per_second(steps: int) -> float:
+    sim = Simulator(Generator(PARAMS_FILE, seed=6), 1, logging=True)
+    sim.run(steps)
+    start = time.perf_counter()
+    build_frames(sim.log)
+    return steps / (time.perf_counter() - start)
+
+
+def build_cases(directory: str, quick: bool) -> Dict[str, Callable[[], float]]:
+    """Every case of the suite, as {name: function returning operations per second}."""
+    size = 1 if quick else 0
+    cases = {}
+    for load in LOADS:
+        params_file = load_params_file(load, directory)
+        for reserved in RESERVED:
+            cases[f'simulator/load={load:g}/reserved={reserved}'] = (
+                lambda params_file=params_file, reserved=reserved:
+                simulator_events_per_second(params_file, reserved, SIMULATOR_STEPS[size])
+            )
+    for name in DISTRIBUTIONS:
+        for block_size in (None, 4096):
+            mode = 'buffered' if block_size else 'scalar'
+            cases[f'generator/{name}/{mode}'] = (
+                lambda name=name, block_size=block_size:
+                samples_per_second(Generator(PARAMS_FILE, seed=0, block_size=block_size), name,
+                                   GENERATOR_SAMPLES[size])
+            )
+    for name, event_list in EVENT_LISTS.items():
+        def hold(event_list=event_list):
+            rng = np.random.default_rng(0)
+            return bench_event_list(event_list(), rng.exponential(1.0, EVENT_LIST_SIZE),
+                                    rng.exponential(EVENT_LIST_SIZE, EVENT_LIST_HOLDS[size]))
+        cases[f'event_list/{name}/hold'] = hold
+    cases['animation/build_frames'] = lambda: frames_per_second(ANIMATION_STEPS[size])
+    return cases
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> Dict[str, float]:
+    """Return {case: relative change} of the cases slower than the baseline by more than `tolerance`."""
+    regressions = {}
+    for name, value in results.items():
+        if name in baseline:
+            change = value / baseline[name] - 1
+            if change < -tolerance:
+                regressions[name] = change
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='Accepted throughput loss as a fraction of the baseline')
+    parser.add_argument('--cases', nargs='+', default=[], help='Only run cases whose name contains one of these')
+    parser.add_argument('--repeats', type=int, default=5, help='Median of this many runs is reported')
+    parser.add_argument('--quick', action='store_true', help='Smaller runs, for a smoke test')
+    args = parser.parse_args()
+    if args.repeats <= 0:
+        parser.error("--repeats must be positive.")
+
+    machine = machine_id()
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as file:
+            baselines = json.load(file)
+    baseline = {}
+    if machine in baselines and not args.save_baseline:
+        recorded = baselines[machine]
+        if recorded['quick'] != args.quick:
+            parser.error(f"the baseline of {machine} was recorded with quick={recorded['quick']}, "
+                         f"rerun with the same setting or record a new baseline.")
+        baseline = recorded['results']
+    elif not args.save_baseline:
+        print(f"No baseline for {machine} in {args.baseline}, record one with --save-baseline.")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        cases = {name: case for name, case in build_cases(directory, args.quick).items()
+                 if not args.cases or any(pattern in name for pattern in args.cases)}
+        # Repeats are interleaved across the cases, so a slow spell of the machine
+        # lands on one run of many cases instead of every run of one case
+        runs = {name: [] for name in cases}
+        for _ in range(args.repeats):
+            for name, case in cases.items():
+                runs[name].append(case())
+        print(f"{'case':<42}{'ops/sec':>14}{'baseline':>14}{'change':>9}")
+        for name in cases:
+            results[name] = statistics.median(runs[name])
+            line = f'{name:<42}{results[name]:>14,.0f}'
+            if name in baseline:
+                line += f'{baseline[name]:>14,.0f}{results[name] / baseline[name] - 1:>+9.1%}'
+            print(line)
+
+    if args.save_baseline:
+        baselines[machine] = {'platform': platform.platform(), 'quick': args.quick, 'repeats': args.repeats,
+                              'results': results}
+        with open(args.baseline, 'w') as file:
+            json.dump(baselines, file, indent=2)
+        print(f"Baseline of {machine} written to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed by more than {args.tolerance:.0%}:")
+        for name, change in regressions.items():
+            print(f"  {name}: {change:+.1%}")
+        sys.exit(1)
+    if baseline:
+        print(f"\nNo regression beyond {args.tolerance:.0%}.")
+
+
+if __name__ == '__main__':
+    main()
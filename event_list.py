@@ -0,0 +1,161 @@
+import bisect
+import heapq
+from typing import Tuple
+
+# An event list entry: (time, sequence number, event code, car index).
+# Every field is a plain number and the sequence number is unique, so entries
+# never tie and ordering is deterministic: equal times pop in insertion order.
+Event = Tuple[float, int, int, int]
+
+
+class HeapEventList:
+    """
+    Binary-heap event list (O(log n) push and pop).
+
+    This is the default event list of the Simulator. Alternative implementations
+    provide the same interface: push, pop, peek, clear and len.
+
+    `heap` and `seq` are public so that a hot loop can push and pop with heapq
+    directly (as Simulator.step and Simulator.add_event do) instead of paying a
+    method call per event; such a push must increment `seq` first, as `push` does.
+    """
+
+    def __init__(self):
+        self.heap: list[Event] = []
+        self.seq = 0  # Sequence number of the last pushed event
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def push(self, time: float, event_code: int, car: int):
+        """Schedule an event for the car at index `car`."""
+        self.seq += 1
+        heapq.heappush(self.heap, (time, self.seq, event_code, car))
+
+    def pop(self) -> Event:
+        """Remove and return the earliest event."""
+        return heapq.heappop(self.heap)
+
+    def peek(self) -> Event:
+        """Return the earliest event without removing it."""
+        return self.heap[0]
+
+    def clear(self):
+        """Remove all events."""
+        self.heap.clear()
+
+
+class CalendarEventList:
+    """
+    Calendar queue event list (Brown, 1988), O(1) amortized push and pop.
+
+    Events are hashed by time into a ring of buckets ("days") of equal width, each kept
+    sorted, and popped by walking the ring from the day of the last popped event. The
+    ring doubles or halves as the list grows or shrinks, and the bucket width is then
+    re-estimated from the spacing of the earliest events, so a bucket holds a few
+    events on average whatever the event density. As the event spacing can also drift
+    while the size stays put, the width is re-estimated as well when the pops of the
+    last year (one pop per bucket) scanned more than MAX_SCAN buckets each on average.
+    Entries and their order are the same as in HeapEventList, so both lists produce
+    identical runs.
+
+    The O(1) bound counts bucket operations only. In CPython the bucket upkeep
+    (bisect.insort, list.pop(0), the ring walk) runs as interpreted code while heapq is
+    C, and the calendar queue is slower than HeapEventList at every size measured, from
+    1e3 to 1e6 pending events (benchmarks/bench_event_list.py): about 2-2.5 times at 1e3
+    and about 1.4-1.5 times at 1e5 and 1e6. It is kept as an alternative for comparison,
+    not as a faster list.
+    """
+
+    MIN_BUCKETS = 2
+    WIDTH_SAMPLE = 25  # Number of earliest events used to estimate the bucket width
+    MAX_SCAN = 4  # Mean buckets scanned per pop above which the bucket width is re-estimated
+
+    def __init__(self, bucket_width: float = 1.0):
+        self._seq = 0
+        self._size = 0
+        self._width = bucket_width
+        self._buckets: list[list[Event]] = [[] for _ in range(self.MIN_BUCKETS)]
+        self._day = 0  # Absolute bucket number, int(time / width), of the last popped event
+        self._pops = 0  # Pops and buckets scanned since the last resize or calibration check
+        self._scanned = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, time: float, event_code: int, car: int):
+        """Schedule an event for the car at index `car`."""
+        self._seq += 1
+        day = int(time / self._width)
+        bisect.insort(self._buckets[day % len(self._buckets)], (time, self._seq, event_code, car))
+        if day < self._day:
+            # Earlier than the last popped event, restart the walk from its day
+            self._day = day
+        self._size += 1
+        if self._size > 2 * len(self._buckets):
+            self._resize(2 * len(self._buckets))
+
+    def pop(self) -> Event:
+        """Remove and return the earliest event."""
+        bucket = self._find()
+        self._size -= 1
+        event = bucket.pop(0)
+        self._pops += 1
+        if self._size < len(self._buckets) // 2 and len(self._buckets) > self.MIN_BUCKETS:
+            self._resize(len(self._buckets) // 2)
+        elif self._pops >= len(self._buckets):
+            if self._scanned > self.MAX_SCAN * self._pops:
+                # Same number of buckets, new width
+                self._resize(len(self._buckets))
+            self._pops = self._scanned = 0
+        return event
+
+    def peek(self) -> Event:
+        """Return the earliest event without removing it."""
+        return self._find()[0]
+
+    def clear(self):
+        """Remove all events."""
+        for bucket in self._buckets:
+            bucket.clear()
+        self._size = 0
+        self._day = 0
+
+    def _find(self) -> list:
+        """Advance to the day of the earliest event and return its bucket."""
+        if not self._size:
+            raise IndexError("pop from an empty event list")
+        buckets, width = self._buckets, self._width
+        n = len(buckets)
+        day = self._day
+        for scanned in range(1, n + 1):
+            bucket = buckets[day % n]
+            if bucket and int(bucket[0][0] / width) <= day:
+                self._day = day
+                self._scanned += scanned
+                return bucket
+            day += 1
+        # A whole year without an event: jump straight to the earliest one
+        self._scanned += 2 * n
+        earliest = min(bucket[0] for bucket in buckets if bucket)
+        self._day = int(earliest[0] / width)
+        return buckets[self._day % n]
+
+    def _resize(self, n: int):
+        events = sorted(event for bucket in self._buckets for event in bucket)
+        sample = [event[0] for event in events[:self.WIDTH_SAMPLE]]
+        if len(sample) > 1 and sample[-1] > sample[0]:
+            # Three times the mean spacing of the earliest events
+            self._width = 3 * (sample[-1] - sample[0]) / (len(sample) - 1)
+        self._buckets = [[] for _ in range(n)]
+        for event in events:
+            self._buckets[int(event[0] / self._width) % n].append(event)
+        self._day = int(events[0][0] / self._width) if events else 0
+        self._pops = self._scanned = 0
+
+
+# Event list implementations selectable by name, e.g. Simulator(..., event_list='calendar')
+EVENT_LISTS = {
+    'heap': HeapEventList,
+    'calendar': CalendarEventList,
+}
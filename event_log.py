@@ -0,0 +1,174 @@
+import json
+import os
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+from simulator import Car, EventType, EventResult
+
+# Integer codes of the event results, in declaration order
+RESULT_CODES = {result: code for code, result in enumerate(EventResult)}
+EVENT_RESULTS = tuple(EventResult)
+
+# One record per processed event
+EVENT_COLUMNS = (
+    ('time', '<f8'),
+    ('event', 'u1'),  # EventType code
+    ('result', 'u1'),  # RESULT_CODES code
+    ('car_id', '<i8'),
+    ('blocked', '<i8'),
+    ('dropped', '<i8'),
+    ('completed', '<i8'),
+)
+# One record per call initiation, so events only need to carry the car id
+CAR_COLUMNS = (
+    ('car_id', '<i8'),
+    ('velocity', '<f8'),
+    ('call_duration', '<f8'),
+    ('root_position', '<f8'),
+    ('root_station', '<i8'),
+    ('root_time', '<f8'),
+)
+TABLES = {'events': EVENT_COLUMNS, 'cars': CAR_COLUMNS}
+SCHEMA_FILE = 'schema.json'
+
+
+def _column_file(path: str, table: str, column: str) -> str:
+    return os.path.join(path, f'{table}.{column}.bin')
+
+
+class ColumnarLogSink:
+    """
+    Event log sink that streams fixed-width records to a directory of column files.
+
+    Pass it to Simulator(log_sink=...). Records are collected in a preallocated chunk of
+    `chunk_size` rows and appended to one raw binary file per column whenever the chunk
+    is full, so memory use does not grow with the run. Read the result with EventLog.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 65536):
+        """
+        Args:
+            path: Directory of the log, created if needed. Existing logs are overwritten
+            chunk_size: Number of records buffered per table before they are written
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_size = chunk_size
+        self._chunks = {table: np.zeros(chunk_size, dtype=list(columns)) for table, columns in TABLES.items()}
+        self._pending = {table: 0 for table in TABLES}
+        self._rows = {table: 0 for table in TABLES}
+        self._files = {
+            (table, column): open(_column_file(path, table, column), 'wb')
+            for table, columns in TABLES.items() for column, _ in columns
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, sim, time: float, event_type: EventType, event_result: EventResult, car: int):
+        """
+        Log an event processed by `sim` for the car at slot `car`.
+
+        Called after the event handler. A slot released by the handler keeps its values
+        until a later car reuses it, so the car's columns can still be read here.
+        """
+        cars = sim.cars
+        car_id = cars.car_id.item(car)
+        self._append('events', (time, event_type, RESULT_CODES[event_result], car_id,
+                                sim.blocked_calls, sim.dropped_calls, sim.completed_calls))
+        if event_type == EventType.CALL_INITIATION:
+            self._append('cars', (car_id, cars.velocity.item(car), cars.call_duration.item(car),
+                                  cars.root_position.item(car), cars.root_station.item(car),
+                                  cars.root_time.item(car)))
+
+    def _append(self, table: str, row: tuple):
+        pending = self._pending[table]
+        self._chunks[table][pending] = row
+        self._pending[table] = pending + 1
+        if pending + 1 == self.chunk_size:
+            self._flush_table(table)
+
+    def _flush_table(self, table: str):
+        pending = self._pending[table]
+        chunk = self._chunks[table][:pending]
+        for column, _ in TABLES[table]:
+            chunk[column].tofile(self._files[table, column])
+        self._rows[table] += pending
+        self._pending[table] = 0
+
+    def flush(self):
+        """Write the buffered records and the schema, so EventLog can read the log so far."""
+        for table in TABLES:
+            self._flush_table(table)
+        for file in self._files.values():
+            file.flush()
+        schema = {table: {'rows': self._rows[table], 'columns': dict(columns)} for table, columns in TABLES.items()}
+        with open(os.path.join(self.path, SCHEMA_FILE), 'w') as file:
+            json.dump(schema, file)
+
+    def close(self):
+        """Flush and close the column files."""
+        self.flush()
+        for file in self._files.values():
+            file.close()
+
+
+class EventLog:
+    """
+    Reader of a log written by ColumnarLogSink.
+
+    `events` and `cars` map column names to read-only NumPy memmaps over the column
+    files, so opening a log reads nothing and slicing it copies nothing.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, SCHEMA_FILE), 'r') as file:
+            schema = json.load(file)
+        self.path = path
+        self.events = self._open_table('events', schema['events'])
+        self.cars = self._open_table('cars', schema['cars'])
+
+    def _open_table(self, table: str, table_schema: dict) -> Dict[str, np.ndarray]:
+        rows = table_schema['rows']
+        return {
+            column: np.memmap(_column_file(self.path, table, column), dtype=dtype, mode='r', shape=(rows,))
+            if rows else np.zeros(0, dtype=dtype)
+            for column, dtype in table_schema['columns'].items()
+        }
+
+    def __len__(self) -> int:
+        """Number of logged events."""
+        return len(self.events['time'])
+
+    def car(self, car_id: int) -> Car:
+        """Rebuild the Car record of a logged call."""
+        ids = self.cars['car_id']
+        row = int(np.searchsorted(ids, car_id))
+        if row == len(ids) or ids[row] != car_id:
+            raise KeyError(f"Car {car_id} has no initiation in the log.")
+        return Car(
+            _id=car_id,
+            velocity=self.cars['velocity'].item(row),
+            call_duration=self.cars['call_duration'].item(row),
+            root_position=self.cars['root_position'].item(row),
+            root_station=self.cars['root_station'].item(row),
+            root_time=self.cars['root_time'].item(row)
+        )
+
+    def entries(self) -> Iterator[Tuple[float, EventType, EventResult, Car, int, int, int]]:
+        """Yield the events as the tuples of `Simulator.log`, one at a time."""
+        events = self.events
+        for i in range(len(self)):
+            yield (
+                events['time'].item(i),
+                EventType(events['event'].item(i)),
+                EVENT_RESULTS[events['result'].item(i)],
+                self.car(events['car_id'].item(i)),
+                events['blocked'].item(i),
+                events['dropped'].item(i),
+                events['completed'].item(i),
+            )
@@ -0,0 +1,376 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from analysis import blocked_dropped_rates, confidence_interval, MetricRecorder
+from generator import Generator, Seed, spawn_seeds
+from simulator import Simulator
+
+# Run length used in output_analysis.ipynb: 35,000 warm-up steps, 385,000 steps in total
+WARM_UP_STEPS = 35_000
+STEPS = 350_000
+
+# Files of an experiment directory written by run_experiment
+CONFIG_FILE = 'experiment.json'
+COUNTERS_FILE = 'counters.npy'  # (policies, replications, intervals, 3) cumulative counters
+DONE_FILE = 'done.npy'  # (policies, replications) flags of the finished replications
+COUNTER_COLUMNS = ('blocked', 'dropped', 'completed')
+
+
+def run_replication(seed: Seed, channel_reserved_for_handover=0, warm_up_steps: int = WARM_UP_STEPS,
+                    steps: int = STEPS, params_file: str = 'params.yaml', **generator_kwargs) -> Tuple[float, float]:
+    """Run one replication and return its steady-state (blocked, dropped) fractions."""
+    gen = Generator(params_file, seed=seed, **generator_kwargs)
+    return Simulator(gen, channel_reserved_for_handover).steady_state_rates(warm_up_steps, steps)
+
+
+def run_from_snapshot(snapshot: bytes, seed: Seed, steps: int) -> Tuple[float, float]:
+    """Restore a warmed-up simulator, reseed it and return the (blocked, dropped) fractions of `steps` more steps."""
+    sim = Simulator.restore(snapshot)
+    sim.gen.reseed(seed)
+    return sim.steady_state_rates(0, steps)
+
+
+def run_forked_replications(n: int, channel_reserved_for_handover=0, warm_up_steps: int = WARM_UP_STEPS,
+                            steps: int = STEPS, seed: Seed = 0, root_seed: Optional[int] = 0,
+                            processes: Optional[int] = None, params_file: str = 'params.yaml',
+                            **generator_kwargs) -> np.ndarray:
+    """
+    Warm up one simulator, then run `n` replications forked from its snapshot (see
+    Simulator.fork), so the warm-up is paid once instead of once per replication.
+
+    Args:
+        n: Number of replications
+        seed: Seed of the shared warm-up
+        root_seed: Root of the seeds the forks are reseeded with
+        processes: Size of the process pool. Defaults to the CPU count; 1 runs in this process
+        (other arguments as in run_replication)
+
+    Returns:
+        (n, 2) array of blocked and dropped fractions
+    """
+    sim = Simulator(Generator(params_file, seed=seed, **generator_kwargs), channel_reserved_for_handover)
+    sim.run(warm_up_steps)
+    snapshot = sim.snapshot()
+    seeds = spawn_seeds(root_seed, n)
+    if processes == 1:
+        return np.array([run_from_snapshot(snapshot, child, steps) for child in seeds])
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return np.array(list(pool.map(run_from_snapshot, [snapshot] * n, seeds, [steps] * n)))
+
+
+def run_checkpointed(make_simulator: Callable[[], Simulator], steps: int, path: str,
+                     checkpoint_every: int = 50_000) -> Simulator:
+    """
+    Run a simulator until it has processed `steps` events (`Simulator.steps`), saving
+    a checkpoint (`Simulator.save_checkpoint`) to `path` every `checkpoint_every` steps.
+    If `path` already holds a checkpoint (e.g. of a crashed run), the run resumes from
+    it instead of calling `make_simulator`.
+    """
+    sim = Simulator.load_checkpoint(path) if os.path.exists(path) else make_simulator()
+    while sim.steps < steps:
+        sim.run(min(checkpoint_every, steps - sim.steps))
+        sim.save_checkpoint(path)
+    return sim
+
+
+@dataclass
+class SequentialResult:
+    """Outcome of run_until_precision."""
+    blocked: Tuple[float, float]  # (mean, half_width)
+    dropped: Tuple[float, float]  # (mean, half_width)
+    observations: np.ndarray  # (replications, 2) blocked and dropped fraction per replication
+    converged: bool  # False if max_replications was reached first
+
+    @property
+    def replications(self) -> int:
+        return len(self.observations)
+
+
+def precision_reached(observations: np.ndarray, half_width: Optional[float] = None,
+                      relative_half_width: Optional[float] = None, confidence: float = 0.95) -> bool:
+    """
+    Check whether the CI of every column of `observations` is narrow enough.
+
+    Args:
+        observations: (n, k) array, one row per replication
+        half_width: Largest accepted absolute half-width
+        relative_half_width: Largest accepted half-width as a fraction of the mean
+        confidence: Confidence level of the intervals
+    """
+    for column in np.asarray(observations).T:
+        mean, delta = confidence_interval(column, confidence)
+        if half_width is not None and delta > half_width:
+            return False
+        if relative_half_width is not None and delta > relative_half_width * abs(mean):
+            return False
+    return True
+
+
+def run_until_precision(channel_reserved_for_handover=0, half_width: Optional[float] = None,
+                        relative_half_width: Optional[float] = None, confidence: float = 0.95,
+                        min_replications: int = 5, max_replications: int = 200, processes: Optional[int] = None,
+                        root_seed: Optional[int] = 0, warm_up_steps: int = WARM_UP_STEPS, steps: int = STEPS,
+                        params_file: str = 'params.yaml', **generator_kwargs) -> SequentialResult:
+    """
+    Launch replications until the t-based CIs of the blocked and dropped fractions reach
+    the requested half-width, replacing the pilot study + fixed-size second phase.
+
+    Replications run on a process pool, `processes` at a time, and the stopping rule is
+    checked whenever one finishes. Replication i always uses the i-th seed spawned from
+    `root_seed`, and the rule only looks at the replications 0..n-1 that have all
+    finished, so the result does not depend on scheduling (and long runs finishing late
+    cannot bias it).
+
+    Args:
+        channel_reserved_for_handover: Handover reservation policy
+        half_width: Target absolute half-width of both fractions
+        relative_half_width: Target half-width relative to the mean of both fractions
+        confidence: Confidence level of the intervals
+        min_replications: Replications run before the rule is first checked (at least 2)
+        max_replications: Give up (converged=False) after this many replications
+        processes: Size of the process pool. Defaults to the CPU count; 1 runs in this process
+        root_seed: Root of the per-replication seeds
+        warm_up_steps: Steps discarded at the start of every replication
+        steps: Steps observed after the warm-up
+        params_file: Path to the YAML file with distribution parameters
+        **generator_kwargs: Forwarded to Generator
+    """
+    if half_width is None and relative_half_width is None:
+        raise ValueError("Give a target half_width and/or relative_half_width.")
+    if not 2 <= min_replications <= max_replications:
+        raise ValueError("Need 2 <= min_replications <= max_replications.")
+
+    seeds = spawn_seeds(root_seed, max_replications)
+    run_kwargs = dict(channel_reserved_for_handover=channel_reserved_for_handover, warm_up_steps=warm_up_steps,
+                      steps=steps, params_file=params_file, **generator_kwargs)
+    results = {}
+    tested = 0  # Prefix lengths up to this one missed the target
+
+    def stopping_point() -> Optional[int]:
+        """Smallest number of leading replications that reaches the target, if any does yet."""
+        nonlocal tested
+        complete = 0
+        while complete in results:
+            complete += 1
+        for n in range(max(tested + 1, min_replications), complete + 1):
+            if precision_reached(np.array([results[i] for i in range(n)]), half_width, relative_half_width, confidence):
+                return n
+            tested = n
+        return None
+
+    if processes == 1:
+        for i, seed in enumerate(seeds):
+            results[i] = run_replication(seed, **run_kwargs)
+            if stopping_point():
+                break
+    else:
+        workers = processes or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {}
+            launched = 0
+            while True:
+                while launched < max_replications and len(pending) < workers:
+                    pending[pool.submit(run_replication, seeds[launched], **run_kwargs)] = launched
+                    launched += 1
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    results[pending.pop(future)] = future.result()
+                if stopping_point():
+                    # Replications already running are waited for, queued ones never start
+                    pool.shutdown(cancel_futures=True)
+                    break
+
+    n = stopping_point() or len(results)
+    observations = np.array([results[i] for i in range(n)])
+    return SequentialResult(
+        blocked=confidence_interval(observations[:, 0], confidence),
+        dropped=confidence_interval(observations[:, 1], confidence),
+        observations=observations,
+        converged=precision_reached(observations, half_width, relative_half_width, confidence),
+    )
+
+
+def run_counters(seed: Seed, channel_reserved_for_handover=0, interval_steps: int = 1000, intervals: int = 100,
+                 params_file: str = 'params.yaml', out: Optional[np.ndarray] = None, **generator_kwargs) -> np.ndarray:
+    """
+    Run one replication and record its cumulative (blocked, dropped, completed) counters
+    after every `interval_steps` steps.
+
+    Args:
+        out: (intervals, 3) array to write the counters into, e.g. a slice of a shared
+            results array. A new array is allocated if omitted
+        (other arguments as in run_replication)
+
+    Returns:
+        The (intervals, 3) counters
+    """
+    if out is None:
+        out = np.zeros((intervals, len(COUNTER_COLUMNS)), dtype=np.int64)
+    sim = Simulator(Generator(params_file, seed=seed, **generator_kwargs), channel_reserved_for_handover)
+    recorder = MetricRecorder(every_steps=interval_steps, capacity=intervals)
+    sim.run(interval_steps * intervals, recorder)
+    for column, metric in enumerate(COUNTER_COLUMNS):
+        out[:, column] = recorder[metric]
+    return out
+
+
+def _experiment_worker(path: str, policy: int, replication: int, seed: Seed, config: dict):
+    """Run one replication of the experiment at `path`, writing into its counters file."""
+    counters = np.load(os.path.join(path, COUNTERS_FILE), mmap_mode='r+')
+    run_counters(seed, config['channels_reserved'][policy], config['interval_steps'], config['intervals'],
+                 config['params_file'], out=counters[policy, replication], **config['generator_kwargs'])
+    counters.flush()
+    return policy, replication
+
+
+def run_experiment(path: str, channels_reserved: Sequence[int] = (0, 1), replications: int = 10,
+                   interval_steps: int = 1000, intervals: int = 100, root_seed: Optional[int] = 0,
+                   processes: Optional[int] = None, progress: bool = True, params_file: str = 'params.yaml',
+                   **generator_kwargs) -> np.ndarray:
+    """
+    Run `replications` replications of every handover reservation policy and record
+    their counters per interval, as the notebook's run_simulations + joblib cells did.
+
+    The results live in the experiment directory `path`: the counters in a .npy file
+    that the worker processes map and fill in place (so nothing is pickled back to the
+    parent), and the finished replications in a flag array that is updated as each one
+    completes. Calling run_experiment again on the same directory, with the same
+    arguments, only runs the replications that had not finished, e.g. after a crash or
+    an interrupt. Replication j of every policy uses the j-th seed spawned from
+    `root_seed`.
+
+    Args:
+        path: Experiment directory, created if needed
+        channels_reserved: Handover reservation policies to run
+        replications: Replications per policy
+        interval_steps: Steps between two recorded counters
+        intervals: Number of recorded counters per replication
+        root_seed: Root of the per-replication seeds
+        processes: Size of the process pool. Defaults to the CPU count; 1 runs in this process
+        progress: Print the number of finished replications to stderr
+        params_file: Path to the YAML file with distribution parameters
+        **generator_kwargs: Forwarded to Generator
+
+    Returns:
+        (policies, replications, intervals, 3) read-only map of the cumulative
+        (blocked, dropped, completed) counters
+    """
+    # Plain ints, so NumPy integers (e.g. from a notebook) serialize and compare equal
+    config = dict(channels_reserved=[int(c) for c in channels_reserved], replications=int(replications),
+                  interval_steps=int(interval_steps), intervals=int(intervals),
+                  root_seed=None if root_seed is None else int(root_seed),
+                  params_file=params_file, generator_kwargs=generator_kwargs)
+    config_path = os.path.join(path, CONFIG_FILE)
+    counters_path = os.path.join(path, COUNTERS_FILE)
+    done_path = os.path.join(path, DONE_FILE)
+    shape = (len(config['channels_reserved']), config['replications'])
+
+    if os.path.exists(config_path):
+        with open(config_path, 'r') as file:
+            if json.load(file) != config:
+                raise ValueError(f"{path} holds a different experiment, use a new directory.")
+        done = np.load(done_path, mmap_mode='r+')
+    else:
+        os.makedirs(path, exist_ok=True)
+        np.lib.format.open_memmap(counters_path, mode='w+', dtype=np.int64,
+                                  shape=shape + (config['intervals'], len(COUNTER_COLUMNS))).flush()
+        done = np.lib.format.open_memmap(done_path, mode='w+', dtype=bool, shape=shape)
+        done.flush()
+        # Written last, so a directory without it is never mistaken for a started experiment
+        with open(config_path, 'w') as file:
+            json.dump(config, file)
+
+    seeds = spawn_seeds(config['root_seed'], config['replications'])
+    todo = [(policy, replication) for policy, replication in np.ndindex(*shape) if not done[policy, replication]]
+    total, finished = done.size, int(done.sum())
+
+    def mark_done(policy: int, replication: int):
+        nonlocal finished
+        done[policy, replication] = True
+        done.flush()
+        finished += 1
+        if progress:
+            print(f"\r{finished}/{total} replications", end='', file=sys.stderr, flush=True)
+
+    if processes == 1:
+        for policy, replication in todo:
+            mark_done(*_experiment_worker(path, policy, replication, seeds[replication], config))
+    elif todo:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [pool.submit(_experiment_worker, path, policy, replication, seeds[replication], config)
+                       for policy, replication in todo]
+            for future in as_completed(futures):
+                mark_done(*future.result())
+    if progress:
+        print(file=sys.stderr)
+    return np.load(counters_path, mmap_mode='r')
+
+
+def interval_rates(counters: np.ndarray, warm_up_intervals: int = 0) -> np.ndarray:
+    """
+    Blocked and dropped fractions of the calls finished after the first
+    `warm_up_intervals` intervals, from cumulative counters as recorded by run_counters.
+
+    Args:
+        counters: (..., intervals, 3) cumulative counters
+        warm_up_intervals: Intervals discarded at the start
+
+    Returns:
+        (..., 2) blocked and dropped fractions
+    """
+    counters = np.asarray(counters)
+    if not 0 <= warm_up_intervals < counters.shape[-2]:
+        raise ValueError(f"warm_up_intervals must be in [0, {counters.shape[-2]}), got {warm_up_intervals}.")
+    end = counters[..., -1, :]
+    start = counters[..., warm_up_intervals - 1, :] if warm_up_intervals else np.zeros_like(end)
+    finished = end - start
+    return np.apply_along_axis(lambda row: blocked_dropped_rates(*row), -1, finished)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Run (or resume) a replication experiment and print the steady-state blocked and dropped "
+                    "fractions of every handover reservation policy.")
+    parser.add_argument('path', help='Experiment directory, resumed if it already holds this experiment')
+    parser.add_argument('--channels-reserved', type=int, nargs='+', default=[0, 1])
+    parser.add_argument('--replications', type=int, default=10)
+    parser.add_argument('--interval-steps', type=int, default=1000)
+    parser.add_argument('--intervals', type=int, default=100)
+    parser.add_argument('--warm-up-intervals', type=int, default=None,
+                        help='Intervals discarded when printing the summary. Defaults to the intervals '
+                             f'covering the first {WARM_UP_STEPS} steps')
+    parser.add_argument('--seed', type=int, default=0, help='Root of the per-replication seeds')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--params-file', default='params.yaml')
+    args = parser.parse_args(argv)
+    if args.interval_steps <= 0 or args.intervals <= 0:
+        parser.error("--interval-steps and --intervals must be positive")
+    if args.replications < 2:
+        parser.error("--replications must be at least 2 for a confidence interval")
+    if args.warm_up_intervals is None:
+        args.warm_up_intervals = -(-WARM_UP_STEPS // args.interval_steps)
+    if not 0 <= args.warm_up_intervals < args.intervals:
+        parser.error(f"--warm-up-intervals ({args.warm_up_intervals}) must be smaller than --intervals "
+                     f"({args.intervals}); lower it or record more intervals")
+
+    counters = run_experiment(args.path, args.channels_reserved, args.replications, args.interval_steps,
+                              args.intervals, args.seed, args.processes, params_file=args.params_file)
+    rates = interval_rates(counters, args.warm_up_intervals)
+    for policy, channels in enumerate(args.channels_reserved):
+        blocked, blocked_delta = confidence_interval(rates[policy, :, 0])
+        dropped, dropped_delta = confidence_interval(rates[policy, :, 1])
+        print(f"reserved={channels}: blocked {blocked:.5f} ± {blocked_delta:.5f}, "
+              f"dropped {dropped:.5f} ± {dropped_delta:.5f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,45 @@
 import numpy as np
 import yaml
-from typing import Dict, Any, Optional
+from scipy.special import ndtri
+from typing import Dict, Any, Optional, List, Union
+
+# Names of the sampled input variables, used as keys for the buffered mode and substreams.
+# The position in this tuple is the substream index, so only append to it.
+DISTRIBUTIONS = ('call_duration', 'inter_arrival_time', 'velocity', 'base_station', 'position', 'direction')
+
+# Counter-based / PCG bit generators usable for SeedSequence-seeded streams
+BIT_GENERATORS = {
+    'PCG64': np.random.PCG64,
+    'Philox': np.random.Philox,
+}
+
+Seed = Union[None, int, np.random.SeedSequence]
+
+# Sampling methods: NumPy's own samplers, or inverse transform from U / from 1 - U
+SAMPLING_METHODS = ('native', 'inversion', 'antithetic')
+
+# Uniforms are clipped to [U_MIN, 1 - U_MIN] so that neither U nor 1 - U hits 0 or 1
+U_MIN = 2.0 ** -53
+
+
+def spawn_seeds(root_seed: Optional[int], n: int) -> List[np.random.SeedSequence]:
+    """
+    Spawn `n` statistically independent child seed sequences from one root seed.
+
+    The children are cheap to pickle, so they can be handed to process pool workers
+    which then build their own `Generator(seed=child)`.
+    """
+    return np.random.SeedSequence(root_seed).spawn(n)
+
+
+def _substream_seed(root: np.random.SeedSequence, index: int) -> np.random.SeedSequence:
+    """
+    Derive the `index`-th child of `root` without mutating it.
+
+    Unlike `root.spawn()` this is a pure function, so generators built from the same
+    root always get the same substreams (which common random numbers rely on).
+    """
+    return np.random.SeedSequence(root.entropy, spawn_key=root.spawn_key + (index,), pool_size=root.pool_size)
 
 
 class Generator:
@@ -9,16 +48,54 @@ class Generator:
     using parameters from a YAML file.
     """
 
-    def __init__(self, params_file: str = 'params.yaml', seed: Optional[int] = None):
+    def __init__(self, params_file: str = 'params.yaml', seed: Seed = None,
+                 block_size: Optional[int] = None, bit_generator: str = 'PCG64',
+                 substreams: bool = False, sampling: str = 'native'):
         """
         Initialize the generator with parameters from a YAML file and optional seed.
         
         Args:
             params_file: Path to the YAML file containing distribution parameters
-            seed: Random seed for reproducibility
+            seed: Random seed for reproducibility. An int (or None) seeds the legacy
+                Mersenne Twister stream; a SeedSequence seeds `bit_generator` instead
+            block_size: If set, sample in buffered mode (see below) with blocks of this size
+            bit_generator: Name of the bit generator used for SeedSequence seeds, see BIT_GENERATORS
+            substreams: If True, every input variable draws from its own substream (see below)
+            sampling: One of SAMPLING_METHODS (see below)
+
+        Buffered mode:
+            Every distribution owns a buffer of `block_size` values. When a buffer runs
+            dry it is refilled with one vectorised call on its RandomState
+            (e.g. `rng.normal(mu, sigma, size=block_size)`), and values are then handed
+            out in order. Refills happen lazily, in the order the buffers run dry, so the
+            stream is reproducible for a given (seed, block_size) pair but differs from
+            the scalar stream produced when `block_size` is None.
+
+        Substreams:
+            By default one RandomState feeds all variables in interleaved order. With
+            `substreams=True` the seed is turned into a SeedSequence whose i-th child
+            (i = index in DISTRIBUTIONS) seeds a dedicated `bit_generator` stream for
+            that variable. The n-th velocity (or duration, station, ...) then depends
+            only on the seed and n, not on what else was sampled in between.
+
+        Sampling:
+            'native' uses NumPy's samplers. 'inversion' draws one uniform U per value and
+            returns F^-1(U); 'antithetic' returns F^-1(1 - U) instead. Two generators with
+            the same seed, one 'inversion' and one 'antithetic', therefore produce mirrored
+            (negatively correlated) streams, see `antithetic_pair`.
         """
+        if block_size is not None and block_size <= 0:
+            raise ValueError(f"block_size must be positive, got {block_size}.")
+        if sampling not in SAMPLING_METHODS:
+            raise ValueError(f"Unknown sampling method: {sampling}. Expected one of {SAMPLING_METHODS}.")
+
         self.params = self._load_params(params_file)
-        self.rng = np.random.RandomState(seed)
+        self.bit_generator = bit_generator
+        self.substreams = substreams
+        self.sampling = sampling
+        self._inversion = sampling != 'native'
+        self.block_size = block_size
+        self.reseed(seed)
 
         # Extract and store parameters for faster access
         self.call_duration_x0 = self.params['call_duration']['x0']
@@ -35,34 +112,219 @@ class Generator:
         self.position_min = self.params['position']['min']
         self.position_max = self.params['position']['max']
 
+    def reseed(self, seed: Seed):
+        """
+        Restart the random streams from `seed`, keeping every other setting.
+
+        Buffered values are discarded, so the new streams start exactly as those of a
+        generator constructed with this seed.
+        """
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else None
+        if self.seed_sequence is not None:
+            # RandomState accepts any bit generator, so the sampling API stays the same
+            self.rng = np.random.RandomState(BIT_GENERATORS[self.bit_generator](self.seed_sequence))
+        else:
+            self.rng = np.random.RandomState(seed)
+
+        if self.substreams:
+            root = self.seed_sequence if self.seed_sequence is not None else np.random.SeedSequence(seed)
+            self.rng = None
+            self.rngs = {
+                name: np.random.RandomState(BIT_GENERATORS[self.bit_generator](_substream_seed(root, i)))
+                for i, name in enumerate(DISTRIBUTIONS)
+            }
+        else:
+            self.rngs = {name: self.rng for name in DISTRIBUTIONS}
+        self._buffers: Dict[str, list] = {name: [] for name in DISTRIBUTIONS}
+        self._buffer_pos: Dict[str, int] = {name: 0 for name in DISTRIBUTIONS}
+
+    @classmethod
+    def spawn(cls, n: int, root_seed: Optional[int] = None, params_file: str = 'params.yaml',
+              **kwargs) -> List['Generator']:
+        """
+        Create `n` generators with statistically independent, non-overlapping streams.
+
+        Args:
+            n: Number of generators (e.g. replications) to create
+            root_seed: Single seed from which all child streams are spawned
+            params_file: Path to the YAML file containing distribution parameters
+            **kwargs: Forwarded to the constructor (block_size, bit_generator, substreams)
+        """
+        return [cls(params_file, seed=child, **kwargs) for child in spawn_seeds(root_seed, n)]
+
+    @classmethod
+    def common_random_numbers(cls, n: int, seed: Seed = None, params_file: str = 'params.yaml',
+                              **kwargs) -> List['Generator']:
+        """
+        Create `n` generators that produce the same car population.
+
+        Each generator uses per-variable substreams from the same seed, so simulators
+        with different configurations (e.g. channel_reserved_for_handover) driven by
+        them see identical arrivals, and the difference between their outputs has
+        a much smaller variance than with independent streams.
+
+        Args:
+            n: Number of configurations to compare
+            seed: Seed shared by all generators. None draws fresh entropy once
+            params_file: Path to the YAML file containing distribution parameters
+            **kwargs: Forwarded to the constructor (block_size, bit_generator)
+        """
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        return [cls(params_file, seed=seed, substreams=True, **kwargs) for _ in range(n)]
+
+    @classmethod
+    def antithetic_pair(cls, seed: Seed = None, params_file: str = 'params.yaml',
+                        **kwargs) -> List['Generator']:
+        """
+        Create two generators whose uniforms are mirrored (U and 1 - U).
+
+        Both use per-variable substreams from the same seed, so every input variable
+        stays paired value by value even though the two simulations diverge.
+
+        Args:
+            seed: Seed shared by both generators. None draws fresh entropy once
+            params_file: Path to the YAML file containing distribution parameters
+            **kwargs: Forwarded to the constructor (block_size, bit_generator)
+        """
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        return [cls(params_file, seed=seed, substreams=True, sampling=sampling, **kwargs)
+                for sampling in ('inversion', 'antithetic')]
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether the arrivals have run out; a Simulator stops generating calls once they have."""
+        return False
+
     def _load_params(self, params_file: str) -> Dict[str, Any]:
         """Load parameters from YAML file."""
         with open(params_file, 'r') as file:
             return yaml.safe_load(file)
 
+    def _draw(self, name: str, size: Optional[int] = None):
+        """Draw `size` values (a scalar if None) of the named distribution with a single vectorised call."""
+        if self._inversion:
+            u = np.clip(self.rngs[name].random_sample(size), U_MIN, 1.0 - U_MIN)
+            if self.sampling == 'antithetic':
+                u = 1.0 - u
+            values = self._inverse_cdf(name, u)
+            return values if size is not None else values.item()
+        if name == 'call_duration':
+            return self.call_duration_x0 + self.rngs['call_duration'].exponential(1.0 / self.call_duration_lambda, size)
+        if name == 'inter_arrival_time':
+            return self.rngs['inter_arrival_time'].exponential(1.0 / self.inter_arrival_time_lambda, size)
+        if name == 'velocity':
+            return self.rngs['velocity'].normal(self.velocity_mu, np.sqrt(self.velocity_variance), size)
+        if name == 'base_station':
+            return self.rngs['base_station'].randint(self.base_station_min, self.base_station_max + 1, size)
+        if name == 'position':
+            return self.rngs['position'].uniform(self.position_min, self.position_max, size)
+        if name == 'direction':
+            return self.rngs['direction'].choice([-1, 1], size)
+        raise ValueError(f"Unknown distribution: {name}")
+
+    def _inverse_cdf(self, name: str, u: np.ndarray) -> np.ndarray:
+        """Map uniforms in (0, 1) to the named distribution by inverse transform."""
+        if name == 'call_duration':
+            return self.call_duration_x0 - np.log1p(-u) / self.call_duration_lambda
+        if name == 'inter_arrival_time':
+            return -np.log1p(-u) / self.inter_arrival_time_lambda
+        if name == 'velocity':
+            return self.velocity_mu + np.sqrt(self.velocity_variance) * ndtri(u)
+        if name == 'base_station':
+            return self.base_station_min + np.floor(u * (self.base_station_max - self.base_station_min + 1)).astype(int)
+        if name == 'position':
+            return self.position_min + (self.position_max - self.position_min) * u
+        if name == 'direction':
+            return np.where(u < 0.5, -1, 1)
+        raise ValueError(f"Unknown distribution: {name}")
+
+    def _next_buffered(self, name: str):
+        """Hand out the next value of the named distribution, refilling its buffer if empty."""
+        buffer = self._buffers[name]
+        pos = self._buffer_pos[name]
+        if pos == len(buffer):
+            # tolist() turns the block into Python scalars, which are cheaper to hand out
+            buffer = self._buffers[name] = self._draw(name, self.block_size).tolist()
+            pos = 0
+        self._buffer_pos[name] = pos + 1
+        return buffer[pos]
+
+    def _take(self, name: str, n: int) -> np.ndarray:
+        """Hand out the next `n` values of the named distribution, as `n` single draws would."""
+        if not self.block_size:
+            return np.asarray(self._draw(name, n))
+        values = []
+        while len(values) < n:
+            buffer = self._buffers[name]
+            pos = self._buffer_pos[name]
+            if pos == len(buffer):
+                buffer = self._buffers[name] = self._draw(name, self.block_size).tolist()
+                pos = 0
+            end = min(len(buffer), pos + n - len(values))
+            values.extend(buffer[pos:end])
+            self._buffer_pos[name] = end
+        return np.array(values)
+
+    def generate_cars(self, n: int) -> Dict[str, np.ndarray]:
+        """
+        Draw the next `n` values of every input variable at once, keyed by DISTRIBUTIONS name.
+
+        Needs per-variable substreams: only then does this hand out the same values as
+        drawing the `n` cars one at a time, whatever the sampling and buffering settings.
+        """
+        if not self.substreams:
+            raise ValueError("generate_cars needs a generator with substreams=True.")
+        return {name: self._take(name, n) for name in DISTRIBUTIONS}
+
     def generate_call_duration(self) -> float:
         """Generate call duration based on shifted exponential distribution. (Seconds)"""
-        return self.call_duration_x0 + self.rng.exponential(1.0 / self.call_duration_lambda)
+        if self.block_size:
+            return self._next_buffered('call_duration')
+        if self._inversion:
+            return self._draw('call_duration')
+        return self.call_duration_x0 + self.rngs['call_duration'].exponential(1.0 / self.call_duration_lambda)
 
     def generate_inter_arrival_time(self) -> float:
         """Generate inter-arrival time based on exponential distribution. (Seconds)"""
-        return self.rng.exponential(1.0 / self.inter_arrival_time_lambda)
+        if self.block_size:
+            return self._next_buffered('inter_arrival_time')
+        if self._inversion:
+            return self._draw('inter_arrival_time')
+        return self.rngs['inter_arrival_time'].exponential(1.0 / self.inter_arrival_time_lambda)
 
     def generate_velocity(self) -> float:
         """Generate velocity based on normal distribution. (Km/h)"""
-        return self.rng.normal(self.velocity_mu, np.sqrt(self.velocity_variance))
+        if self.block_size:
+            return self._next_buffered('velocity')
+        if self._inversion:
+            return self._draw('velocity')
+        return self.rngs['velocity'].normal(self.velocity_mu, np.sqrt(self.velocity_variance))
 
     def generate_base_station(self) -> int:
         """Generate base station based on uniform discrete distribution."""
-        return self.rng.randint(self.base_station_min, self.base_station_max + 1)
+        if self.block_size:
+            return self._next_buffered('base_station')
+        if self._inversion:
+            return self._draw('base_station')
+        return self.rngs['base_station'].randint(self.base_station_min, self.base_station_max + 1)
     
     def generate_position(self) -> float:
         """Generate position based on uniform continuous distribution. (Km)"""
-        return self.rng.uniform(self.position_min, self.position_max)
+        if self.block_size:
+            return self._next_buffered('position')
+        if self._inversion:
+            return self._draw('position')
+        return self.rngs['position'].uniform(self.position_min, self.position_max)
 
     def generate_direction(self) -> int:
         """Generate direction as either -1 or 1."""
-        return self.rng.choice([-1, 1])
+        if self.block_size:
+            return self._next_buffered('direction')
+        if self._inversion:
+            return self._draw('direction')
+        return self.rngs['direction'].choice([-1, 1])
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,157 @@
+import json
+import time
+from typing import Optional
+
+from simulator import EventType
+
+# Simulator methods timed per event type
+HANDLERS = {
+    EventType.CALL_INITIATION: 'handle_call_initiation',
+    EventType.CALL_HANDOVER: 'handle_call_handover',
+    EventType.CALL_TERMINATION: 'handle_call_termination',
+}
+# Every method Instrumentation replaces on the simulator instance
+INSTRUMENTED_METHODS = ('step', '_gen_car') + tuple(HANDLERS.values())
+
+
+def check_invariants(sim):
+    """
+    Check the consistency of a simulator's state, raising AssertionError on a violation.
+
+    Every station holds between 0 and total_channels busy channels, the occupancy
+    statistics agree with the channel counts, and the event list is not behind the clock.
+    """
+    for station, busy in enumerate(sim.base_stations):
+        if not 0 <= busy <= sim.total_channels:
+            raise AssertionError(f"Base station {station} has {busy} busy channels, "
+                                 f"expected 0 to {sim.total_channels}.")
+    if sim.stats.levels != sim.base_stations:
+        raise AssertionError("Occupancy statistics disagree with the base station channels.")
+    if sim.event_list and sim.event_list.peek()[0] < sim.clock:
+        raise AssertionError(f"Next event at {sim.event_list.peek()[0]} is before the clock {sim.clock}.")
+
+
+class Instrumentation:
+    """
+    Switchable profiler and invariant checker for the event loop of one Simulator.
+
+    `attach` replaces `step`, the event handlers and `_gen_car` on that simulator
+    instance by timed wrappers and `detach` removes them again, so the Simulator class
+    itself has no instrumentation code and an uninstrumented run pays nothing. With
+    profile=False only the sampled invariant checks run.
+
+    Handler times include the `_gen_car` call of CALL_INITIATION (the next arrival);
+    `report` also gives the handler time without it.
+    """
+
+    def __init__(self, profile: bool = True, check_every: Optional[int] = None, size_every: int = 1000):
+        """
+        Args:
+            profile: Time the steps, the handlers of every event type and `_gen_car`
+            check_every: Run check_invariants after every `check_every` steps (1 checks
+                every step); None disables the checks
+            size_every: Record the event list size after every `size_every` profiled steps
+        """
+        if check_every is not None and check_every <= 0:
+            raise ValueError(f"check_every must be positive, got {check_every}.")
+        self.profile = profile
+        self.check_every = check_every
+        self.size_every = size_every
+        self.sim = None
+        self.steps = 0
+        self.step_time = 0.0
+        self.checks = 0
+        self.counts = {name: 0 for name in INSTRUMENTED_METHODS[1:]}
+        self.times = {name: 0.0 for name in INSTRUMENTED_METHODS[1:]}
+        self.event_list_size = []  # (step, clock, pending events)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.detach()
+
+    def attach(self, sim) -> 'Instrumentation':
+        """Start instrumenting `sim`."""
+        if self.sim is not None:
+            raise ValueError("Instrumentation is already attached to a simulator.")
+        if sim.instrumentation is not None:
+            raise ValueError("The simulator is already instrumented.")
+        self.sim = sim
+        sim.instrumentation = self
+        if self.profile:
+            for name in INSTRUMENTED_METHODS[1:]:
+                setattr(sim, name, self._timed(getattr(sim, name), name))
+        sim.step = self._instrumented_step(sim.step)
+        return self
+
+    def detach(self):
+        """Stop instrumenting; the collected numbers are kept."""
+        if self.sim is None:
+            return
+        for name in INSTRUMENTED_METHODS:
+            self.sim.__dict__.pop(name, None)
+        self.sim.instrumentation = None
+        self.sim = None
+
+    def _timed(self, method, name: str):
+        timer = time.perf_counter
+        counts, times = self.counts, self.times
+
+        def timed(*args):
+            start = timer()
+            result = method(*args)
+            times[name] += timer() - start
+            counts[name] += 1
+            return result
+        return timed
+
+    def _instrumented_step(self, step):
+        timer = time.perf_counter
+        sim = self.sim
+        profile, check_every, size_every = self.profile, self.check_every, self.size_every
+
+        def instrumented_step():
+            if profile:
+                start = timer()
+                step()
+                self.step_time += timer() - start
+            else:
+                step()
+            self.steps += 1
+            if profile and self.steps % size_every == 0:
+                self.event_list_size.append((self.steps, sim.clock, len(sim.event_list)))
+            if check_every is not None and self.steps % check_every == 0:
+                check_invariants(sim)
+                self.checks += 1
+        return instrumented_step
+
+    def report(self) -> dict:
+        """Collected numbers as a JSON-serializable dict."""
+        handler_time = sum(self.times[name] for name in HANDLERS.values())
+        return {
+            'steps': self.steps,
+            'step_time': self.step_time,
+            'events_per_second': self.steps / self.step_time if self.step_time else None,
+            'event_types': {
+                event_type.name: {
+                    'count': self.counts[name],
+                    'time': self.times[name],
+                    'mean_time': self.times[name] / self.counts[name] if self.counts[name] else None,
+                }
+                for event_type, name in HANDLERS.items()
+            },
+            'gen_car': {'count': self.counts['_gen_car'], 'time': self.times['_gen_car']},
+            'handler_time_without_gen_car': handler_time - self.times['_gen_car'],
+            # Popping events, logging and dispatch
+            'event_loop_time': self.step_time - handler_time,
+            'event_list_size': [
+                {'step': step, 'clock': clock, 'size': size} for step, clock, size in self.event_list_size
+            ],
+            'invariant_checks': self.checks,
+        }
+
+    def save_report(self, path: str):
+        """Write `report` to a JSON file."""
+        with open(path, 'w') as file:
+            json.dump(self.report(), file, indent=2)
@@ -0,0 +1,369 @@
+import heapq
+import multiprocessing
+from typing import List, Tuple
+
+import numpy as np
+
+from generator import Generator
+from simulator import EventType, TOTAL_CHANNELS, NUMBER_OF_BASE_STATIONS, CELL_DAIMETER, EPSILON
+
+# Segment-local event code: a car handed over from a neighbouring segment
+HANDOVER_IN = len(EventType)
+# Safety margin on the lookahead, so rounding in crossing times can never undercut it
+LOOKAHEAD_MARGIN = 1e-9
+# Arrival tuple: (car id, velocity, root time, absolute root position, direction, end time, root station)
+Arrival = Tuple[int, float, float, float, int, float, int]
+
+
+class Segment:
+    """
+    The base stations lo..hi-1 of a partitioned highway and the cars inside them.
+
+    Processes its own events window by window. A car about to cross into a neighbouring
+    segment is sent there as a message as soon as the crossing is scheduled; the
+    segment keeps a local handover event only to release its channel at that time.
+    """
+
+    def __init__(self, lo: int, hi: int, number_of_base_stations: int, channel_reserved_for_handover: int):
+        self.lo = lo
+        self.hi = hi
+        self.number_of_base_stations = number_of_base_stations
+        self.channel_reserved_for_handover = channel_reserved_for_handover
+        self.clock = 0.0
+        self.base_stations = [0] * (hi - lo)
+        self.blocked_calls = 0
+        self.dropped_calls = 0
+        self.completed_calls = 0
+        # Car id -> [velocity, root time, absolute root position, direction, end time, current station]
+        self.cars = {}
+        self._heap = []
+        self._seq = 0
+        self._outbox = ([], [])  # Messages for the left and the right neighbour
+
+    def state(self) -> Tuple[int, int, int, List[int]]:
+        return self.blocked_calls, self.dropped_calls, self.completed_calls, self.base_stations
+
+    def _push(self, time: float, event_code: int, car_id: int):
+        self._seq += 1
+        heapq.heappush(self._heap, (time, self._seq, event_code, car_id))
+
+    def _station_of(self, abs_position: float) -> int:
+        if abs_position >= self.number_of_base_stations * CELL_DAIMETER or abs_position < 0:
+            raise ValueError("Car is out of bounds.")
+        return int(abs_position // CELL_DAIMETER)
+
+    def _time_to_station_boundary(self, abs_position: float, velocity: float, direction: int) -> float:
+        # Same arithmetic as simulator.time_to_station_boundary, on a highway of any length
+        current_station = self._station_of(abs_position)
+        station_abs_end = current_station * CELL_DAIMETER + CELL_DAIMETER / 2 + direction * CELL_DAIMETER / 2
+        if abs(abs_position - station_abs_end) < EPSILON:
+            return CELL_DAIMETER / abs(velocity)
+        return (station_abs_end - abs_position) / velocity
+
+    def run_window(self, window_end: float, arrivals: List[Arrival], messages: list) -> Tuple[list, list]:
+        """
+        Add the window's arrivals and incoming cars, process every event before
+        `window_end` and return the cars handed to the (left, right) neighbours.
+        """
+        for car_id, velocity, root_time, abs_root_position, direction, end_time, root_station in arrivals:
+            self.cars[car_id] = [velocity, root_time, abs_root_position, direction, end_time, root_station]
+            self._push(root_time, EventType.CALL_INITIATION, car_id)
+        for time, car_id, car in messages:
+            assert time >= self.clock, f"Message time {time} is less than segment clock {self.clock}."
+            self.cars[car_id] = car
+            self._push(time, HANDOVER_IN, car_id)
+
+        heap = self._heap
+        while heap and heap[0][0] < window_end:
+            time, _, event_code, car_id = heapq.heappop(heap)
+            self.clock = time
+            if event_code == EventType.CALL_INITIATION:
+                self._handle_call_initiation(car_id)
+            elif event_code == EventType.CALL_HANDOVER:
+                self._handle_call_handover(car_id)
+            elif event_code == HANDOVER_IN:
+                self._handle_handover_in(car_id)
+            else:
+                self._handle_call_termination(car_id)
+        self.clock = max(self.clock, window_end)
+
+        outbox, self._outbox = self._outbox, ([], [])
+        return outbox
+
+    def _schedule_next(self, car_id: int):
+        """Schedule the next handover, or the termination, of a car that just got a channel."""
+        car = self.cars[car_id]
+        velocity, root_time, abs_root_position, direction, end_time, station = car
+        abs_position = abs_root_position + velocity * (self.clock - root_time)
+        time_of_next_station = self._time_to_station_boundary(abs_position, velocity, direction) + self.clock
+        if time_of_next_station > end_time:
+            self._push(end_time, EventType.CALL_TERMINATION, car_id)
+            return
+        self._push(time_of_next_station, EventType.CALL_HANDOVER, car_id)
+
+        next_station = station + direction
+        if 0 <= next_station < self.lo:
+            self._outbox[0].append((time_of_next_station, car_id, car[:5] + [next_station]))
+        elif self.hi <= next_station < self.number_of_base_stations:
+            self._outbox[1].append((time_of_next_station, car_id, car[:5] + [next_station]))
+
+    def _handle_call_initiation(self, car_id: int):
+        velocity, root_time, abs_root_position, _, _, root_station = self.cars[car_id]
+        station = self._station_of(abs_root_position + velocity * (self.clock - root_time))
+        if self.base_stations[station - self.lo] >= TOTAL_CHANNELS - self.channel_reserved_for_handover:
+            self.blocked_calls += 1
+            del self.cars[car_id]
+            return
+        self.base_stations[root_station - self.lo] += 1
+        self._schedule_next(car_id)
+
+    def _handle_call_handover(self, car_id: int):
+        car = self.cars[car_id]
+        station = car[5]
+        next_station = station + car[3]
+        self.base_stations[station - self.lo] -= 1
+
+        if not 0 <= next_station < self.number_of_base_stations:
+            self.completed_calls += 1
+        elif self.lo <= next_station < self.hi:
+            if self.base_stations[next_station - self.lo] < TOTAL_CHANNELS:
+                self.base_stations[next_station - self.lo] += 1
+                car[5] = next_station
+                self._schedule_next(car_id)
+                return
+            self.dropped_calls += 1
+        # Otherwise the neighbouring segment already holds the car
+        del self.cars[car_id]
+
+    def _handle_handover_in(self, car_id: int):
+        station = self.cars[car_id][5]
+        if self.base_stations[station - self.lo] < TOTAL_CHANNELS:
+            self.base_stations[station - self.lo] += 1
+            self._schedule_next(car_id)
+            return
+        self.dropped_calls += 1
+        del self.cars[car_id]
+
+    def _handle_call_termination(self, car_id: int):
+        self.base_stations[self.cars.pop(car_id)[5] - self.lo] -= 1
+        self.completed_calls += 1
+
+
+def _segment_worker(connection, *segment_args):
+    """Serve `Segment.run_window` and `Segment.state` requests over a pipe until told to stop."""
+    segment = Segment(*segment_args)
+    while True:
+        command, payload = connection.recv()
+        if command == 'window':
+            connection.send(segment.run_window(*payload))
+        elif command == 'state':
+            connection.send(segment.state())
+        else:
+            break
+
+
+class ParallelSimulator:
+    """
+    Conservative parallel simulation of one replication on a highway split into segments.
+
+    Each segment of consecutive base stations is simulated by its own worker process,
+    and cars crossing a segment boundary are handed over as messages. The workers
+    advance in lockstep time windows. A car that gets a channel by a handover needs
+    at least CELL_DAIMETER / max velocity to cross its new cell, so windows of that
+    length (the lookahead) cannot receive messages for their own time span. The one
+    exception, a new call starting close to a segment boundary, is known in advance
+    because arrivals do not depend on the network state: they are drawn up front by
+    the coordinator in the same order as Simulator draws them, and windows are cut
+    short at their earliest possible crossing.
+
+    Up to exact ties in event times, the counters and channel occupancy at any time
+    equal those of the serial Simulator run with the same generator.
+    """
+
+    def __init__(self, generator: Generator, segments: int = 2, channel_reserved_for_handover=0,
+                 number_of_base_stations: int = NUMBER_OF_BASE_STATIONS, processes: bool = True,
+                 chunk_size: int = 4096):
+        """
+        Args:
+            generator: Source of the random input variables. Its base station range must
+                fit the highway (e.g. a params file with base_station max = number_of_base_stations - 1)
+            segments: Number of segments (and worker processes)
+            channel_reserved_for_handover: Channels per station that new calls cannot use
+            number_of_base_stations: Length of the highway in cells
+            processes: If False, simulate the segments one after the other in this process
+            chunk_size: Number of arrivals drawn at a time
+        """
+        if not 1 <= segments <= number_of_base_stations:
+            raise ValueError(f"segments must be between 1 and {number_of_base_stations}.")
+        if generator.base_station_min < 0 or generator.base_station_max >= number_of_base_stations:
+            raise ValueError("The generator's base stations do not fit the highway.")
+
+        self.gen = generator
+        self.number_of_base_stations = number_of_base_stations
+        self.chunk_size = chunk_size
+        self.processes = processes
+        self.clock = 0.0
+        self.blocked_calls = 0
+        self.dropped_calls = 0
+        self.completed_calls = 0
+        self.base_stations = [0] * number_of_base_stations
+
+        # Segment s owns stations bounds[s]..bounds[s + 1] - 1
+        self.bounds = [round(s * number_of_base_stations / segments) for s in range(segments + 1)]
+        segment_args = [(self.bounds[s], self.bounds[s + 1], number_of_base_stations, channel_reserved_for_handover)
+                        for s in range(segments)]
+        if processes:
+            self._connections = []
+            self._workers = []
+            for args in segment_args:
+                parent, child = multiprocessing.Pipe()
+                worker = multiprocessing.Process(target=_segment_worker, args=(child, *args), daemon=True)
+                worker.start()
+                self._connections.append(parent)
+                self._workers.append(worker)
+        else:
+            self._segments = [Segment(*args) for args in segment_args]
+
+        # Drawn arrivals not yet handed to a segment, in arrival order
+        self._arrivals = {name: np.zeros(0, dtype=np.int64 if name in ('direction', 'root_station') else np.float64)
+                          for name in ('velocity', 'root_time', 'abs_root_position', 'direction', 'end_time', 'root_station')}
+        self._earliest_crossing = np.zeros(0)  # Suffix minimum of the arrivals' cross-segment crossing times
+        self._last_arrival = 0.0
+        self._next_id = 0
+        self._max_speed = 0.0
+        self._inboxes = [[] for _ in range(segments)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Stop the worker processes."""
+        if self.processes:
+            for connection in self._connections:
+                connection.send(('stop', None))
+            for worker in self._workers:
+                worker.join()
+            self._connections = []
+
+    @property
+    def lookahead(self) -> float:
+        """Shortest time any car drawn so far needs to cross a whole cell."""
+        return CELL_DAIMETER / self._max_speed * (1 - LOOKAHEAD_MARGIN)
+
+    def _draw_arrivals(self, n: int) -> dict:
+        """Draw the next n cars with the same draws and arithmetic as Simulator._gen_car."""
+        gen = self.gen
+        if gen.substreams:
+            cars = gen.generate_cars(n)
+            velocity = cars['velocity'] * cars['direction'] * 1000 / 3600  # Convert km/h to m/s
+            call_duration = cars['call_duration']
+            root_position = cars['position'] * 1000
+            root_station = cars['base_station'].astype(np.int64)
+            inter_arrival_time = cars['inter_arrival_time']
+        else:
+            draws = np.array([
+                (gen.generate_velocity() * gen.generate_direction() * 1000 / 3600, gen.generate_call_duration(),
+                 gen.generate_position() * 1000, gen.generate_base_station(), gen.generate_inter_arrival_time())
+                for _ in range(n)
+            ])
+            velocity, call_duration, root_position, root_station, inter_arrival_time = draws.T
+            root_station = root_station.astype(np.int64)
+
+        # Sequential sums, as the serial clock advances arrival by arrival
+        root_time = np.cumsum(np.concatenate([[self._last_arrival], inter_arrival_time]))[1:]
+        self._last_arrival = float(root_time[-1])
+        return {
+            'velocity': velocity,
+            'root_time': root_time,
+            'abs_root_position': root_station * CELL_DAIMETER + root_position,
+            'direction': np.sign(velocity).astype(np.int64),
+            'end_time': root_time + call_duration,
+            'root_station': root_station,
+        }
+
+    def _cross_segment_crossing(self, cars: dict) -> np.ndarray:
+        """Time at which each new call would first leave its segment, inf if it cannot before ending."""
+        station = cars['abs_root_position'] // CELL_DAIMETER
+        direction = cars['direction']
+        station_abs_end = station * CELL_DAIMETER + CELL_DAIMETER / 2 + direction * CELL_DAIMETER / 2
+        time_to_next = np.where(
+            np.abs(cars['abs_root_position'] - station_abs_end) < EPSILON,
+            CELL_DAIMETER / np.abs(cars['velocity']),
+            (station_abs_end - cars['abs_root_position']) / cars['velocity']
+        )
+        crossing = time_to_next + cars['root_time']
+        next_station = station + direction
+        internal = np.array(self.bounds[1:-1])
+        leaves_segment = (np.isin(next_station, internal) & (direction > 0)) | \
+                         (np.isin(station, internal) & (direction < 0))
+        return np.where(leaves_segment & (crossing <= cars['end_time']), crossing, np.inf)
+
+    def _ensure_arrivals(self, end_time: float):
+        """Draw arrivals until one starts at or after end_time."""
+        while self._last_arrival < end_time:
+            cars = self._draw_arrivals(self.chunk_size)
+            self._max_speed = max(self._max_speed, float(np.abs(cars['velocity']).max()))
+            crossing = self._cross_segment_crossing(cars)
+            for name, values in cars.items():
+                self._arrivals[name] = np.concatenate([self._arrivals[name], values])
+            self._earliest_crossing = np.minimum.accumulate(
+                np.concatenate([self._earliest_crossing, crossing])[::-1])[::-1]
+
+    def _take_arrivals(self, window_end: float) -> List[List[Arrival]]:
+        """Remove the arrivals before window_end and group them by segment."""
+        n = int(np.searchsorted(self._arrivals['root_time'], window_end, side='left'))
+        taken = {name: values[:n] for name, values in self._arrivals.items()}
+        self._arrivals = {name: values[n:] for name, values in self._arrivals.items()}
+        self._earliest_crossing = self._earliest_crossing[n:]
+
+        car_ids = np.arange(self._next_id, self._next_id + n)
+        self._next_id += n
+        owner = np.searchsorted(self.bounds[1:], taken['abs_root_position'] // CELL_DAIMETER, side='right')
+        records = list(zip(car_ids.tolist(), taken['velocity'].tolist(), taken['root_time'].tolist(),
+                           taken['abs_root_position'].tolist(), taken['direction'].tolist(),
+                           taken['end_time'].tolist(), taken['root_station'].tolist()))
+        grouped = [[] for _ in self._inboxes]
+        for segment, record in zip(owner.tolist(), records):
+            grouped[segment].append(record)
+        return grouped
+
+    def _run_window(self, window_end: float):
+        arrivals = self._take_arrivals(window_end)
+        inboxes, self._inboxes = self._inboxes, [[] for _ in self._inboxes]
+        if self.processes:
+            for connection, segment_arrivals, messages in zip(self._connections, arrivals, inboxes):
+                connection.send(('window', (window_end, segment_arrivals, messages)))
+            outboxes = [connection.recv() for connection in self._connections]
+        else:
+            outboxes = [segment.run_window(window_end, segment_arrivals, messages)
+                        for segment, segment_arrivals, messages in zip(self._segments, arrivals, inboxes)]
+        for s, (to_left, to_right) in enumerate(outboxes):
+            if to_left:
+                self._inboxes[s - 1].extend(to_left)
+            if to_right:
+                self._inboxes[s + 1].extend(to_right)
+
+    def run_until(self, end_time: float):
+        """Process every event before end_time and update the counters and occupancy."""
+        self._ensure_arrivals(end_time)
+        while self.clock < end_time:
+            window_end = min(self.clock + self.lookahead, end_time)
+            if len(self._earliest_crossing):
+                window_end = min(window_end, float(self._earliest_crossing[0]))
+            assert window_end > self.clock, "Window does not advance the clock."
+            self._run_window(window_end)
+            self.clock = window_end
+
+        if self.processes:
+            for connection in self._connections:
+                connection.send(('state', None))
+            states = [connection.recv() for connection in self._connections]
+        else:
+            states = [segment.state() for segment in self._segments]
+        self.blocked_calls = sum(state[0] for state in states)
+        self.dropped_calls = sum(state[1] for state in states)
+        self.completed_calls = sum(state[2] for state in states)
+        self.base_stations = [channels for state in states for channels in state[3]]
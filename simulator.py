@@ -1,7 +1,16 @@
-from generator import Generator
+import os
+import pickle
+from heapq import heappop, heappush
+
+from generator import Generator, Seed, spawn_seeds
+from analysis import (
+    blocked_dropped_rates, batch_means, BatchMeansResult, MetricRecorder, mser, mser_truncation, OccupancyStatistics
+)
 from dataclasses import dataclass
-import heapq
-from enum import Enum
+import numpy as np
+from typing import List, Optional, Tuple
+from event_list import EVENT_LISTS, HeapEventList
+from enum import Enum, IntEnum
 
 # Static Constants
 TOTAL_ROAD_LENGTH = 40 * 1000 # meters
@@ -14,11 +23,38 @@ EPSILON = 1e-6
 # This value is used to ensure that the car is not at the end of the cell when checking for handover
 
 
-@dataclass
+def station_of(abs_position: float, road_length: float = TOTAL_ROAD_LENGTH) -> int:
+    """Get the base station covering an absolute position on a road of `road_length` meters."""
+    # Handle edge case when car is exactly at the end of the road
+    if abs_position >= road_length:
+        raise ValueError("Car is out of bounds.")
+    if abs_position < 0:
+        raise ValueError("Car is out of bounds.")
+    return int((abs_position) // CELL_DAIMETER)
+
+
+def time_to_station_boundary(abs_position: float, velocity: float, direction: int,
+                             road_length: float = TOTAL_ROAD_LENGTH) -> float:
+    """Calculate the time for a car at `abs_position` to reach the end of its current station."""
+    current_station = station_of(abs_position, road_length)
+    station_abs_end = current_station * CELL_DAIMETER + CELL_DAIMETER / 2 + direction * CELL_DAIMETER / 2
+    if abs(abs_position - station_abs_end) < EPSILON:
+        return CELL_DAIMETER / abs(velocity)
+    return (station_abs_end - abs_position) / velocity
+
+
+def direction_of(velocity: float) -> int:
+    """Determine the direction of travel from a velocity."""
+    return int(velocity / abs(velocity)) if velocity != 0 else 0
+
+
 @dataclass(frozen=True)
 class Car:
     """
     Class representing a car in the simulation.
+
+    The simulator itself stores cars in a CarTable; Car is the record handed out
+    to callers (e.g. in the event log) and accepted by CarTable.insert.
     
     Attributes:
         _id: Unique identifier for the car.
@@ -40,7 +76,7 @@ class Car:
 
     def get_direction(self) -> int:
         """Determine the direction of the car based on its velocity."""
-        return int(self.velocity / abs(self.velocity)) if self.velocity != 0 else 0
+        return direction_of(self.velocity)
     
     def get_abs_position(self, current_time: float = None) -> float:
         """
@@ -53,13 +89,7 @@ class Car:
 
     def get_current_station(self, current_time: float) -> int:
         """Get the current station of the car based on its position."""
-        abs_position = self.get_abs_position(current_time)
-        # Handle edge case when car is exactly at the end of the road
-        if abs_position >= TOTAL_ROAD_LENGTH:
-            raise ValueError("Car is out of bounds.")
-        if abs_position < 0:
-            raise ValueError("Car is out of bounds.")
-        return int((abs_position) // CELL_DAIMETER)
+        return station_of(self.get_abs_position(current_time))
 
     def get_next_station(self, current_time: float) -> int:
         """Get the next station based on the car's direction."""
@@ -72,12 +102,7 @@ class Car:
     
     def get_time_to_next_station(self, current_time: float) -> float:
         """Calculate the time to reach the next station."""
-        abs_position = self.get_abs_position(current_time)
-        current_station = self.get_current_station(current_time)
-        station_abs_end = current_station * CELL_DAIMETER + CELL_DAIMETER / 2 + self.get_direction() * CELL_DAIMETER / 2
-        if abs(abs_position - station_abs_end) < EPSILON:
-            return CELL_DAIMETER / abs(self.velocity)
-        return (station_abs_end - abs_position) / self.velocity
+        return time_to_station_boundary(self.get_abs_position(current_time), self.velocity, self.get_direction())
 
     def get_end_time(self) -> float:
         """Get the end time of the call."""
@@ -90,10 +115,145 @@ class Car:
         is_in_bounds = 0 <= self.get_abs_position(current_time) < TOTAL_ROAD_LENGTH
         return is_active and is_in_bounds
 
-class EventType(Enum):
-    CALL_INITIATION = 'call_initiation'
-    CALL_TERMINATION = 'call_termination'
-    CALL_HANDOVER = 'call_handover'
+
+class CarTable:
+    """
+    Struct-of-arrays store for the cars of a simulation.
+
+    Every car occupies one slot (row) of preallocated NumPy columns and events refer
+    to cars by slot index. Slots are released when a call ends and reused by later
+    cars, so the table size follows the number of calls in progress rather than the
+    run length. Values that the event handlers need repeatedly (absolute start
+    position, direction, end time) are computed once on insertion.
+    """
+
+    def __init__(self, capacity: int = 256, number_of_base_stations: int = NUMBER_OF_BASE_STATIONS):
+        self.number_of_base_stations = number_of_base_stations
+        self.road_length = number_of_base_stations * CELL_DAIMETER  # meters
+        self.car_id = np.zeros(capacity, dtype=np.int64)
+        self.velocity = np.zeros(capacity)  # meters per second
+        self.call_duration = np.zeros(capacity)  # seconds
+        self.root_position = np.zeros(capacity)  # meters, within the root station
+        self.root_station = np.zeros(capacity, dtype=np.int64)
+        self.root_time = np.zeros(capacity)  # seconds
+        # Derived columns
+        self.abs_root_position = np.zeros(capacity)  # meters, from the start of the road
+        self.direction = np.zeros(capacity, dtype=np.int64)
+        self.end_time = np.zeros(capacity)  # seconds
+        # Itinerary engine: per slot ([crossing times], [cells]) and the index of the next crossing
+        self.itinerary: list = [None] * capacity
+        self.leg = [0] * capacity
+        # Free slots, popped from the end so the lowest indices are used first
+        self._free = list(range(capacity - 1, -1, -1))
+
+    def __len__(self) -> int:
+        """Number of slots in use."""
+        return len(self.car_id) - len(self._free)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.car_id)
+
+    def _grow(self):
+        """Double the capacity of every column."""
+        old_capacity = self.capacity
+        for name in ('car_id', 'velocity', 'call_duration', 'root_position', 'root_station',
+                     'root_time', 'abs_root_position', 'direction', 'end_time'):
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate([column, np.zeros_like(column)]))
+        self.itinerary.extend([None] * old_capacity)
+        self.leg.extend([0] * old_capacity)
+        self._free.extend(range(2 * old_capacity - 1, old_capacity - 1, -1))
+
+    def add(self, car_id: int, velocity: float, call_duration: float, root_position: float,
+            root_station: int, root_time: float) -> int:
+        """Store a car and return its slot index."""
+        if not self._free:
+            self._grow()
+        index = self._free.pop()
+        self.car_id[index] = car_id
+        self.velocity[index] = velocity
+        self.call_duration[index] = call_duration
+        self.root_position[index] = root_position
+        self.root_station[index] = root_station
+        self.root_time[index] = root_time
+        self.abs_root_position[index] = root_station * CELL_DAIMETER + root_position
+        self.direction[index] = direction_of(velocity)
+        self.end_time[index] = root_time + call_duration
+        return index
+
+    def insert(self, car: Car) -> int:
+        """Store a Car record and return its slot index."""
+        return self.add(car._id, car.velocity, car.call_duration, car.root_position, car.root_station, car.root_time)
+
+    def release(self, index: int):
+        """Free the slot of a car whose call has ended."""
+        self._free.append(index)
+
+    def get(self, index: int) -> Car:
+        """Build a Car record from the slot at `index`."""
+        return Car(
+            _id=self.car_id.item(index),
+            velocity=self.velocity.item(index),
+            call_duration=self.call_duration.item(index),
+            root_position=self.root_position.item(index),
+            root_station=self.root_station.item(index),
+            root_time=self.root_time.item(index)
+        )
+
+    def abs_position(self, index: int, current_time: float) -> float:
+        """Get the absolute position of a car on the road at `current_time`."""
+        return self.abs_root_position.item(index) + self.velocity.item(index) * (current_time - self.root_time.item(index))
+
+    def current_station(self, index: int, current_time: float) -> int:
+        """Get the station a car is in at `current_time`."""
+        return station_of(self.abs_position(index, current_time), self.road_length)
+
+    def time_to_next_station(self, index: int, current_time: float) -> float:
+        """Calculate the time for a car to reach its next station."""
+        return time_to_station_boundary(
+            self.abs_position(index, current_time), self.velocity.item(index), self.direction.item(index),
+            self.road_length
+        )
+
+    def plan_itinerary(self, index: int, current_time: float):
+        """
+        Compute every station boundary a car crosses before its call ends.
+
+        Stores (times, cells) for the slot, where times[k] is the k-th crossing and cells[k]
+        the station the car is in before it (cells[k + 1] is the one it enters). The list
+        stops at the first crossing that leaves the highway. Each crossing is computed from
+        the previous one exactly as the default engine does at a handover, so both engines
+        schedule bit-identical event times.
+        """
+        abs_root_position = self.abs_root_position.item(index)
+        velocity = self.velocity.item(index)
+        root_time = self.root_time.item(index)
+        direction = self.direction.item(index)
+        end_time = self.end_time.item(index)
+        station = station_of(abs_root_position + velocity * (current_time - root_time), self.road_length)
+
+        # Crossings up to and including the one that leaves the highway
+        max_crossings = self.number_of_base_stations - station if direction > 0 else station + 1
+        times = []
+        time = current_time
+        while len(times) < max_crossings:
+            # Same arithmetic as time_to_next_station(index, time) + time
+            abs_position = abs_root_position + velocity * (time - root_time)
+            time = time_to_station_boundary(abs_position, velocity, direction, self.road_length) + time
+            if time > end_time:
+                break
+            times.append(time)
+
+        self.itinerary[index] = (times, list(range(station, station + direction * (len(times) + 1), direction)))
+        self.leg[index] = 0
+
+
+class EventType(IntEnum):
+    # Integer codes, so event list entries hold plain numbers
+    CALL_INITIATION = 0
+    CALL_TERMINATION = 1
+    CALL_HANDOVER = 2
 
 class EventResult(Enum):
     INITIATION_SUCCESS = 'initiation_success'
@@ -108,11 +268,43 @@ class Simulator:
                  channel_reserved_for_handover=0,
                  _no_initial_event=False,
                  _no_new_initialisation=False,
-                 logging=False
+                 logging=False,
+                 itinerary=False,
+                 event_list='heap',
+                 log_sink=None,
+                 total_channels=TOTAL_CHANNELS,
+                 number_of_base_stations=NUMBER_OF_BASE_STATIONS
                  ):
+        """
+        Args:
+            generator: Source of the random input variables
+            channel_reserved_for_handover: Channels per station that new calls cannot use
+            logging: If True, keep every processed event in `self.log`. The list grows with
+                the run; prefer `log_sink` for long runs
+            itinerary: If True, plan each call's station boundary crossings when it starts
+                (CarTable.plan_itinerary), so handovers only look up the next crossing
+                instead of recomputing the car's position
+            event_list: Pending event set implementation, a key of EVENT_LISTS. 'calendar'
+                gives the same run as 'heap' but is slower in CPython at every size measured
+            log_sink: Object whose `record(sim, time, event_type, event_result, car)` is called
+                after every event, e.g. event_log.ColumnarLogSink
+            total_channels: Channels per base station
+            number_of_base_stations: Length of the highway in cells of CELL_DAIMETER meters.
+                The generator's base stations must fit (params base_station max below it)
+        """
+        if event_list not in EVENT_LISTS:
+            raise ValueError(f"Unknown event list '{event_list}', expected one of {tuple(EVENT_LISTS)}.")
         self.clock = 0 # Simulation clock in seconds
-        self.event_list: list[tuple[float, EventType, Car]] = []
-        self.base_stations = [0] * NUMBER_OF_BASE_STATIONS
+        self.steps = 0  # Events processed
+        self.event_list = EVENT_LISTS[event_list]()
+        # The heap of a HeapEventList, pushed and popped inline by add_event and step
+        self._heap = self.event_list.heap if isinstance(self.event_list, HeapEventList) else None
+        self.total_channels = total_channels
+        self.number_of_base_stations = number_of_base_stations
+        self.cars = CarTable(number_of_base_stations=number_of_base_stations)
+        self.base_stations = [0] * number_of_base_stations
+        # Time-weighted occupancy and per-station outcomes, updated on every channel change
+        self.stats = OccupancyStatistics(number_of_base_stations, total_channels)
         self.blocked_calls = 0
         self.dropped_calls = 0
         self.completed_calls = 0
@@ -122,26 +314,32 @@ class Simulator:
 
         self.logging = logging
         self.log:list[tuple[float, EventType, EventResult, Car]] = []
+        self.log_sink = log_sink
+        # Set by instrumentation.Instrumentation.attach; the invariant checks live there too
+        self.instrumentation = None
 
         self._no_new_initialisation = _no_new_initialisation
+        self.itinerary = itinerary
 
         # Add initial event to the event list
         new_car = self._gen_car()
         if not _no_initial_event:
             self.add_event(
-                new_car.root_time,
+                self.cars.root_time.item(new_car),
                 EventType.CALL_INITIATION,
                 new_car
             )
+        else:
+            self.cars.release(new_car)
 
     def _gen_car_id(self):
         self._id_counter += 1
         return self._id_counter - 1
     
-    def _gen_car(self):
-        """Generate a new car object with random attributes."""
-        return Car(
-            _id=self._gen_car_id(),  # Generate unique car ID
+    def _gen_car(self) -> int:
+        """Generate a new car with random attributes and return its index in the car table."""
+        return self.cars.add(
+            car_id=self._gen_car_id(),  # Generate unique car ID
             velocity=self.gen.generate_velocity()*self.gen.generate_direction() * 1000 / 3600,  # Convert km/h to m/s
             call_duration=self.gen.generate_call_duration(),  # Generate random call duration
             root_position=self.gen.generate_position()*1000,  # Generate random position
@@ -151,108 +349,427 @@ class Simulator:
     
     def _base_station_have_free_channel_for_initialisation(self, station):
         """Check if the base station has a free channel."""
-        return self.base_stations[station] < TOTAL_CHANNELS - self.channel_reserved_for_handover
+        return self.base_stations[station] < self.total_channels - self.channel_reserved_for_handover
 
     def _base_station_have_free_channel_for_handover(self, station):
         """Check if the base station has a free channel for handover."""
-        return self.base_stations[station] < TOTAL_CHANNELS
+        return self.base_stations[station] < self.total_channels
+
+    def _take_channel(self, station):
+        """Occupy a channel of the base station."""
+        self.stats.change(station, 1, self.clock)
+        self.base_stations[station] += 1
+
+    def _free_channel(self, station):
+        """Release a channel of the base station."""
+        self.stats.change(station, -1, self.clock)
+        self.base_stations[station] -= 1
+
+    def add_event(self, time, event_type, car):
+        """Add an event for the car at index `car` to the event list, maintaining the order of events."""
+        heap = self._heap
+        if heap is None:
+            self.event_list.push(time, event_type, car)
+        else:
+            # HeapEventList.push without the method call
+            event_list = self.event_list
+            event_list.seq += 1
+            heappush(heap, (time, event_list.seq, event_type, car))
+
+    def run(self, max_steps=1000, recorder: Optional[MetricRecorder] = None):
+        """
+        Run the simulation for a specified number of steps.
+
+        Args:
+            max_steps: Number of events to process
+            recorder: MetricRecorder sampling the counters during the run
+        """
+        if recorder is None:
+            for _ in range(max_steps):
+                self.step()
+        else:
+            self._run_recorded(recorder, max_steps=max_steps)
+
+    def run_until(self, end_time: float, recorder: Optional[MetricRecorder] = None):
+        """
+        Process every event up to simulated time `end_time` and advance the clock to it.
+
+        Args:
+            end_time: Time horizon in seconds
+            recorder: MetricRecorder sampling the counters during the run; time samples
+                are taken up to and including `end_time`
+        """
+        if end_time < self.clock:
+            raise ValueError(f"end_time {end_time} is before the current clock {self.clock}.")
+        if recorder is None:
+            event_list = self.event_list
+            while event_list and event_list.peek()[0] <= end_time:
+                self.step()
+        else:
+            self._run_recorded(recorder, end_time=end_time)
+        self.clock = end_time
+
+    def _run_recorded(self, recorder: MetricRecorder, max_steps: Optional[int] = None, end_time: float = np.inf):
+        """Event loop of run/run_until with a recorder: stops after `max_steps` events or past `end_time`."""
+        event_list = self.event_list
+        steps = 0
+        if recorder.every_time is not None:
+            recorder.start(self.clock)
+            due = recorder.next_time
+            while steps != max_steps and event_list and event_list.peek()[0] <= end_time:
+                if event_list.peek()[0] > due:
+                    # The state is constant until the next event, so samples before it see the current one
+                    due = recorder.sample_until(self, event_list.peek()[0])
+                self.step()
+                recorder.steps += 1
+                steps += 1
+            if end_time != np.inf:
+                recorder.sample_until(self, end_time, inclusive=True)
+        else:
+            every = recorder.every_steps
+            while steps != max_steps and event_list and event_list.peek()[0] <= end_time:
+                self.step()
+                recorder.steps += 1
+                steps += 1
+                if recorder.steps == recorder.next_step:
+                    recorder.sample(self, self.clock)
+                    recorder.next_step += every
+
+    def detect_warm_up(self, batch_steps: int = 1000, min_batches: int = 50, max_steps: int = 1_000_000) -> int:
+        """
+        Run until MSER-5 finds where the warm-up ends and return that point, in steps.
 
-    def add_event(self, time, event_type, car_data):
-        """Add an event to the event list, maintaining the order of events."""
-        heapq.heappush(self.event_list, (time, event_type, car_data))
+        The blocked and dropped fractions of every `batch_steps` steps are the observed
+        series (as in output_analysis.ipynb); after `min_batches` batches the joint MSER-5
+        truncation point is recomputed after every batch until it falls in the first half
+        of the data. The simulator is left where detection stopped, past the truncation
+        point. Sets `warm_up_steps`, and `warm_up_converged` to False if `max_steps`
+        was reached first (the last truncation point is then used).
 
-    def run(self, max_steps=1000):
-        """Run the simulation for a specified number of steps."""
-        for _ in range(max_steps):
-            self.step()
+        The counters of the batches past the truncation point are kept, so
+        steady_state_rates and batch_means count them as steady-state steps. The
+        occupancy statistics (`stats`) cannot be rewound to the truncation point and
+        restart where detection stopped instead.
+        """
+        counters = [(self.blocked_calls, self.dropped_calls, self.completed_calls)]
+        rates = []
+        truncation = None
+        while truncation is None and len(rates) * batch_steps < max_steps:
+            self.run(batch_steps)
+            counters.append((self.blocked_calls, self.dropped_calls, self.completed_calls))
+            rates.append(blocked_dropped_rates(*np.subtract(counters[-1], counters[-2])))
+            if len(rates) >= min_batches:
+                truncation = mser_truncation(rates)
+
+        self.warm_up_converged = truncation is not None
+        if truncation is None:
+            truncation = min(max(mser(column) for column in np.transpose(rates)), len(rates) // 2)
+        self.warm_up_steps = truncation * batch_steps
+        self._steps_since_warm_up = (len(rates) - truncation) * batch_steps
+        # Counters at the truncation point and at every batch boundary after it
+        self._warm_up_counters = counters[truncation:]
+        self._warm_up_batch_steps = batch_steps
+        self.stats.reset(self.clock)
+        return self.warm_up_steps
+
+    def steady_state_rates(self, warm_up_steps: Optional[int], steps: int) -> Tuple[float, float]:
+        """
+        Run a warm-up period, then `steps` more steps, and return the blocked and
+        dropped fractions of the calls that finished after the warm-up.
+
+        With warm_up_steps=None the warm-up is detected with `detect_warm_up`, and the
+        steps it ran past the truncation point count towards `steps`.
+        """
+        if warm_up_steps is None:
+            self.detect_warm_up()
+            blocked, dropped, completed = self._warm_up_counters[0]
+            self.run(max(0, steps - self._steps_since_warm_up))
+        else:
+            self.run(warm_up_steps)
+            blocked, dropped, completed = self.blocked_calls, self.dropped_calls, self.completed_calls
+            self.run(steps)
+        return blocked_dropped_rates(
+            self.blocked_calls - blocked,
+            self.dropped_calls - dropped,
+            self.completed_calls - completed
+        )
+
+    def batch_means(self, warm_up_steps: Optional[int], steps: int, micro_batches: int = 256, min_batches: int = 10,
+                    max_autocorrelation: float = 0.1, confidence: float = 0.95) -> BatchMeansResult:
+        """
+        Estimate the steady-state blocked and dropped fractions from one long run.
+
+        After a single warm-up (detected with `detect_warm_up` if warm_up_steps is None),
+        `steps` more steps are run in `micro_batches` equal chunks whose counters are
+        merged into batches by analysis.batch_means, which picks the batch size
+        automatically. The result's batch_size is in micro-batches of
+        steps // micro_batches steps.
+
+        With warm_up_steps=None, as in steady_state_rates, the steps `detect_warm_up` ran
+        past the truncation point count towards `steps` and fill the first micro-batches.
+        The micro-batch length is then rounded down to a multiple of the detection batch
+        length (at least one batch), and there are steps // that length micro-batches.
+        """
+        if warm_up_steps is None:
+            self.detect_warm_up()
+            batch_steps = self._warm_up_batch_steps
+            micro_batch_steps = max(1, steps // micro_batches // batch_steps) * batch_steps
+            micro_batches = steps // micro_batch_steps
+            # Counters at the micro-batch boundaries detection already ran through
+            recorded = self._warm_up_counters[::micro_batch_steps // batch_steps]
+            done = self._steps_since_warm_up
+        else:
+            self.run(warm_up_steps)
+            micro_batch_steps = steps // micro_batches
+            recorded = [(self.blocked_calls, self.dropped_calls, self.completed_calls)]
+            done = 0
+        counts = np.zeros((micro_batches, 3), dtype=np.int64)
+        previous = recorded[0]
+        for i in range(micro_batches):
+            if i + 1 < len(recorded):
+                current = recorded[i + 1]
+            else:
+                self.run((i + 1) * micro_batch_steps - done)
+                done = (i + 1) * micro_batch_steps
+                current = (self.blocked_calls, self.dropped_calls, self.completed_calls)
+            counts[i] = np.subtract(current, previous)
+            previous = current
+        return batch_means(counts, min_batches, max_autocorrelation, confidence)
+
+    @classmethod
+    def antithetic_replication(cls, seed: Seed, warm_up_steps: int, steps: int,
+                               channel_reserved_for_handover=0, params_file: str = 'params.yaml',
+                               **generator_kwargs) -> Tuple[float, float]:
+        """
+        Run one antithetic pair of replications and return the paired estimator,
+        i.e. the average of the two runs' (blocked, dropped) fractions.
+
+        The pair counts as one independent observation when building confidence intervals.
+        """
+        pair_rates = [
+            cls(gen, channel_reserved_for_handover).steady_state_rates(warm_up_steps, steps)
+            for gen in Generator.antithetic_pair(seed, params_file, **generator_kwargs)
+        ]
+        return (
+            (pair_rates[0][0] + pair_rates[1][0]) / 2,
+            (pair_rates[0][1] + pair_rates[1][1]) / 2
+        )
             
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # A log sink holds open files; attach a new one after restoring
+        state['log_sink'] = None
+        # Instrumented methods are closures on this instance, a restored simulator runs without them
+        state['instrumentation'] = None
+        for name in ('step', '_gen_car', 'handle_call_initiation', 'handle_call_handover', 'handle_call_termination'):
+            state.pop(name, None)
+        return state
+
+    def snapshot(self) -> bytes:
+        """
+        Serialize the full simulator state: clock, channels, pending events, cars,
+        counters, statistics, id counter and the generator with its RNG state.
+
+        `restore` continues bit for bit where this simulator is now. The log sink is
+        not part of the snapshot.
+        """
+        return pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def restore(snapshot: bytes) -> 'Simulator':
+        """Rebuild a simulator from `snapshot`."""
+        return pickle.loads(snapshot)
+
+    def save_checkpoint(self, path: str):
+        """Write a snapshot to `path`, replacing the previous checkpoint only once complete."""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(self.snapshot())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load_checkpoint(path: str) -> 'Simulator':
+        """Restore the simulator saved by `save_checkpoint`."""
+        with open(path, 'rb') as file:
+            return Simulator.restore(file.read())
+
+    def fork(self, n: int, root_seed: Optional[int] = None) -> List['Simulator']:
+        """
+        Copy this (typically warmed-up) simulator `n` times, reseeding every copy with
+        its own stream spawned from `root_seed`.
+
+        The copies share the current state, including the already scheduled next
+        arrival, and diverge from the first new draw on. Replications forked from one
+        warm-up share its end state, so they are only independent given that state.
+        """
+        snapshot = self.snapshot()
+        forks = []
+        for seed in spawn_seeds(root_seed, n):
+            sim = Simulator.restore(snapshot)
+            sim.gen.reseed(seed)
+            forks.append(sim)
+        return forks
+
     def step(self):
         """Run one step of the simulation."""
-        if not self.event_list:
-            raise ValueError("No events in the event list.")
-        
-        time, event_type, car_data = heapq.heappop(self.event_list)
+        heap = self._heap
+        if heap is None:
+            if not self.event_list:
+                raise ValueError("No events in the event list.")
+            time, _, event_type, car = self.event_list.pop()
+        else:
+            # HeapEventList.pop without the method call
+            if not heap:
+                raise ValueError("No events in the event list.")
+            time, _, event_type, car = heappop(heap)
 
         assert time >= self.clock, f"Event time {time} is less than current clock {self.clock}."
 
+        if self.logging:
+            # Take the record before the handler, which may release the car's slot
+            car_data = self.cars.get(car)
+
         self.clock = time
+        self.steps += 1
         if event_type == EventType.CALL_INITIATION:
-            event_result = self.handle_call_initiation(car_data)
+            event_result = self.handle_call_initiation(car)
         elif event_type == EventType.CALL_TERMINATION:
-            event_result = self.handle_call_termination(car_data)
+            event_result = self.handle_call_termination(car)
         elif event_type == EventType.CALL_HANDOVER:
-            event_result = self.handle_call_handover(car_data)
+            event_result = self.handle_call_handover(car)
         else:
             raise ValueError(f"Unknown event type: {event_type}")
         
-        for i in self.base_stations:
-            assert i <= TOTAL_CHANNELS, f"Base station channels exceeded: {i} > {TOTAL_CHANNELS}"
-            assert i >= 0, f"Base station channels negative: {i} < 0"
-        
         if self.logging:
             self.log.append((time, event_type, event_result, car_data, self.blocked_calls, self.dropped_calls, self.completed_calls))
+        if self.log_sink is not None:
+            self.log_sink.record(self, time, event_type, event_result, car)
         
-    def handle_call_initiation(self, car: Car) -> EventResult:
+    def handle_call_initiation(self, car: int) -> EventResult:
+        cars = self.cars
         # Initialise next call
-        if not self._no_new_initialisation:
+        if not self._no_new_initialisation and not self.gen.exhausted:
             new_car = self._gen_car()
             self.add_event(
-                new_car.root_time,
+                cars.root_time.item(new_car),
                 EventType.CALL_INITIATION,
                 new_car
             )
 
         # Check if the call can be initiated
-        if not self._base_station_have_free_channel_for_initialisation(car.get_current_station(self.clock)):
+        station = cars.current_station(car, self.clock)
+        self.stats.initiations[station] += 1
+        if not self._base_station_have_free_channel_for_initialisation(station):
             self.blocked_calls += 1
+            self.stats.blocked[station] += 1
+            cars.release(car)
             return EventResult.INITIATION_BLOCKED
 
         # Add car to the base station
-        self.base_stations[car.root_station] += 1
+        self._take_channel(cars.root_station.item(car))
+
+        if self.itinerary:
+            cars.plan_itinerary(car, self.clock)
+            self._schedule_next_leg(car)
+            return EventResult.INITIATION_SUCCESS
 
         # Schedule the next handover event
-        time_of_next_station = car.get_time_to_next_station(self.clock) + self.clock
-        if time_of_next_station > car.get_end_time():
-            self.add_event(car.get_end_time(), EventType.CALL_TERMINATION, car)
+        time_of_next_station = cars.time_to_next_station(car, self.clock) + self.clock
+        end_time = cars.end_time.item(car)
+        if time_of_next_station > end_time:
+            self.add_event(end_time, EventType.CALL_TERMINATION, car)
         else:
             # Schedule handover event
             handover_time = time_of_next_station
             self.add_event(handover_time, EventType.CALL_HANDOVER, car)
         return EventResult.INITIATION_SUCCESS
 
-    def handle_call_handover(self, car: Car) -> EventResult:
+    def _schedule_next_leg(self, car: int):
+        """Schedule the next planned crossing of a car, or the end of its call."""
+        cars = self.cars
+        times = cars.itinerary[car][0]
+        leg = cars.leg[car]
+        if leg < len(times):
+            self.add_event(times[leg], EventType.CALL_HANDOVER, car)
+        else:
+            self.add_event(cars.end_time.item(car), EventType.CALL_TERMINATION, car)
+
+    def _handle_call_handover_itinerary(self, car: int) -> EventResult:
+        cars = self.cars
+        cells = cars.itinerary[car][1]
+        leg = cars.leg[car]
+        current_station = cells[leg]
+        next_station = cells[leg + 1]
+        cars.leg[car] = leg + 1
+
+        # Release the channel from the current station
+        self._free_channel(current_station)
+
+        # Check if the car leave the highway
+        if not 0 <= next_station < self.number_of_base_stations:
+            self.completed_calls += 1
+            cars.release(car)
+            return EventResult.TERMINATION
+
+        self.stats.handovers[next_station] += 1
+        if not self._base_station_have_free_channel_for_handover(next_station):
+            # No free channel in the next station
+            self.dropped_calls += 1
+            self.stats.dropped[next_station] += 1
+            cars.release(car)
+            return EventResult.HANDOVER_DROPPED
+
+        self._take_channel(next_station)
+        self._schedule_next_leg(car)
+        return EventResult.HANDOVER_SUCCESS
+
+    def handle_call_handover(self, car: int) -> EventResult:
+        if self.itinerary:
+            return self._handle_call_handover_itinerary(car)
+
+        cars = self.cars
         # NOTE: As all handover events are at boundary conditions, we need to subtract EPSILON from the clock to get the correct station
-        
+        current_station = cars.current_station(car, self.clock - EPSILON)
+        next_station = current_station + cars.direction.item(car)
+
         # Check if the car leave the highway
-        if not car.next_station_is_valid(self.clock - EPSILON):
-            self.base_stations[car.get_current_station(self.clock-EPSILON)] -= 1
+        if not 0 <= next_station < self.number_of_base_stations:
+            self._free_channel(current_station)
             self.completed_calls += 1
+            cars.release(car)
             return EventResult.TERMINATION
 
-        # Store the current station for potential restoration
-        current_station = car.get_current_station(self.clock-EPSILON)
         # Release the channel from the current station
-        self.base_stations[current_station] -= 1
+        self._free_channel(current_station)
 
-        if not self._base_station_have_free_channel_for_handover(car.get_next_station(self.clock - EPSILON)):
+        self.stats.handovers[next_station] += 1
+        if not self._base_station_have_free_channel_for_handover(next_station):
             # No free channel in the next station
             self.dropped_calls += 1
+            self.stats.dropped[next_station] += 1
+            cars.release(car)
             return EventResult.HANDOVER_DROPPED
             
-        self.base_stations[car.get_next_station(self.clock - EPSILON)] += 1
-        time_of_next_station = car.get_time_to_next_station(self.clock) + self.clock
-        if time_of_next_station > car.get_end_time():
-            self.add_event(car.get_end_time(), EventType.CALL_TERMINATION, car)
+        self._take_channel(next_station)
+        time_of_next_station = cars.time_to_next_station(car, self.clock) + self.clock
+        end_time = cars.end_time.item(car)
+        if time_of_next_station > end_time:
+            self.add_event(end_time, EventType.CALL_TERMINATION, car)
         else:
             # Schedule another handover event
             handover_time = time_of_next_station
             self.add_event(handover_time, EventType.CALL_HANDOVER, car)
         return EventResult.HANDOVER_SUCCESS
 
-    def handle_call_termination(self, car: Car) -> EventResult:
+    def handle_call_termination(self, car: int) -> EventResult:
         # Release the channel for the base station
 
         # NOTE: As some termination events are at boundary conditions, we need to subtract EPSILON from the clock to get the correct station
-        self.base_stations[car.get_current_station(self.clock)] -= 1
+        if self.itinerary:
+            cars = self.cars
+            self._free_channel(cars.itinerary[car][1][cars.leg[car]])
+        else:
+            self._free_channel(self.cars.current_station(car, self.clock))
         self.completed_calls += 1
+        self.cars.release(car)
         return EventResult.TERMINATION
@@ -0,0 +1,203 @@
+import copy
+import hashlib
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import yaml
+
+from analysis import confidence_interval
+from experiment import STEPS, WARM_UP_STEPS
+from generator import Generator, spawn_seeds
+from simulator import Simulator
+
+# Sweep axes passed to the Simulator; any other axis is a 'distribution.parameter' path
+# into params.yaml, e.g. 'inter_arrival_time.lambda' for the arrival rate
+SIMULATOR_AXES = ('channel_reserved_for_handover', 'total_channels', 'number_of_base_stations')
+# Modules whose source is hashed into the cache key, so editing the model invalidates it
+MODEL_MODULES = ('simulator', 'generator', 'event_list', 'analysis')
+
+
+@lru_cache(maxsize=None)
+def model_version() -> str:
+    """Hash of the source of the modules that determine a replication's result."""
+    digest = hashlib.sha256()
+    for name in MODEL_MODULES:
+        with open(sys.modules[name].__file__, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def expand_grid(grid: Dict[str, Sequence]) -> List[dict]:
+    """Expand {axis: values} into the list of all configurations, last axis varying fastest."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def split_config(config: dict, base_params: dict) -> Tuple[dict, dict]:
+    """
+    Split a configuration into Simulator keyword arguments and the full distribution
+    parameters it implies.
+
+    A number_of_base_stations axis also moves the base_station range to the new
+    highway, unless the configuration sets 'base_station.max' itself.
+
+    Returns:
+        (simulator_kwargs, params)
+    """
+    simulator_kwargs = {name: value for name, value in config.items() if name in SIMULATOR_AXES}
+    params = copy.deepcopy(base_params)
+    if 'number_of_base_stations' in config:
+        params['base_station']['max'] = config['number_of_base_stations'] - 1
+    for name, value in config.items():
+        if name in SIMULATOR_AXES:
+            continue
+        distribution, _, parameter = name.partition('.')
+        if distribution not in params or parameter not in params[distribution]:
+            raise ValueError(f"Unknown sweep axis '{name}', expected one of {SIMULATOR_AXES} "
+                             f"or a 'distribution.parameter' of the params file.")
+        params[distribution][parameter] = value
+    return simulator_kwargs, params
+
+
+class ResultCache:
+    """
+    Content-addressed store of replication results.
+
+    A result is filed under the SHA-256 of everything it depends on: the distribution
+    parameters, the Simulator arguments, the model version, the seed and the step counts.
+    Every entry is one small JSON file (holding its key material too, for inspection),
+    written atomically, so an interrupted sweep never leaves a corrupt entry behind.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @staticmethod
+    def key(material: dict) -> str:
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], key + '.json')
+
+    def params_file(self, params: dict) -> str:
+        """Write `params` to a YAML file named by its hash, for Generator, and return its path."""
+        file_path = os.path.join(self.path, 'params', self.key(params) + '.yaml')
+        if not os.path.exists(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            tmp_path = file_path + '.tmp'
+            with open(tmp_path, 'w') as file:
+                yaml.safe_dump(params, file)
+            os.replace(tmp_path, file_path)
+        return file_path
+
+    def get(self, key: str) -> Optional[Tuple[float, float]]:
+        """Return the cached (blocked, dropped) fractions, or None."""
+        try:
+            with open(self._file(key), 'r') as file:
+                return tuple(json.load(file)['result'])
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, material: dict, result: Tuple[float, float]):
+        file_path = self._file(key)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_path = file_path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump({'key': material, 'result': list(result)}, file)
+        os.replace(tmp_path, file_path)
+
+
+@dataclass
+class SweepPoint:
+    """Replications of one configuration of a sweep."""
+    config: dict
+    observations: np.ndarray  # (replications, 2) blocked and dropped fraction per replication
+
+    @property
+    def blocked(self) -> Tuple[float, float]:
+        """(mean, half_width) of the blocked fraction."""
+        return confidence_interval(self.observations[:, 0])
+
+    @property
+    def dropped(self) -> Tuple[float, float]:
+        """(mean, half_width) of the dropped fraction."""
+        return confidence_interval(self.observations[:, 1])
+
+
+def _run_point(params_file: str, simulator_kwargs: dict, seed: np.random.SeedSequence, warm_up_steps: int,
+               steps: int) -> Tuple[float, float]:
+    """Run one replication of a configuration."""
+    gen = Generator(params_file, seed=seed)
+    return Simulator(gen, **simulator_kwargs).steady_state_rates(warm_up_steps, steps)
+
+
+def run_sweep(grid: Dict[str, Sequence], replications: int = 10, root_seed: Optional[int] = 0,
+              warm_up_steps: int = WARM_UP_STEPS, steps: int = STEPS, cache_dir: str = 'sweep_cache',
+              processes: Optional[int] = None, params_file: str = 'params.yaml') -> List[SweepPoint]:
+    """
+    Run `replications` replications of every configuration of `grid`, reusing cached results.
+
+    Only the (configuration, replication) pairs missing from the cache are run, on a
+    process pool, and their results are cached as they finish. Adding a grid point to a
+    sweep that already ran therefore only runs the new point. Replication j of every
+    configuration uses the j-th seed spawned from `root_seed` (common random numbers
+    across the grid).
+
+    Args:
+        grid: {axis: values}, axes being SIMULATOR_AXES or 'distribution.parameter' paths
+            into the params file, e.g. {'channel_reserved_for_handover': [0, 1, 2],
+            'inter_arrival_time.lambda': [0.6, 0.73]}
+        replications: Replications per configuration
+        root_seed: Root of the per-replication seeds
+        warm_up_steps: Steps discarded at the start of every replication
+        steps: Steps observed after the warm-up
+        cache_dir: Directory of the ResultCache
+        processes: Size of the process pool. Defaults to the CPU count; 1 runs in this process
+        params_file: Path to the YAML file with the base distribution parameters
+
+    Returns:
+        One SweepPoint per configuration, in expand_grid order
+    """
+    with open(params_file, 'r') as file:
+        base_params = yaml.safe_load(file)
+    cache = ResultCache(cache_dir)
+    configs = expand_grid(grid)
+    seeds = spawn_seeds(root_seed, replications)
+    observations = np.zeros((len(configs), replications, 2))
+
+    todo = {}
+    for i, config in enumerate(configs):
+        simulator_kwargs, params = split_config(config, base_params)
+        for j, seed in enumerate(seeds):
+            material = dict(params=params, simulator=simulator_kwargs, version=model_version(),
+                            seed=[seed.entropy, list(seed.spawn_key)], warm_up_steps=warm_up_steps, steps=steps)
+            key = cache.key(material)
+            result = cache.get(key)
+            if result is None:
+                todo[i, j] = (key, material,
+                              (cache.params_file(params), simulator_kwargs, seed, warm_up_steps, steps))
+            else:
+                observations[i, j] = result
+
+    def store(index, result):
+        key, material, _ = todo[index]
+        cache.put(key, material, result)
+        observations[index] = result
+
+    if processes == 1:
+        for index, (_, _, args) in todo.items():
+            store(index, _run_point(*args))
+    elif todo:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {pool.submit(_run_point, *args): index for index, (_, _, args) in todo.items()}
+            for future in as_completed(futures):
+                store(futures[future], future.result())
+
+    return [SweepPoint(config, observations[i]) for i, config in enumerate(configs)]
@@ -0,0 +1,164 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path to import analysis helpers
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from analysis import (
+    blocked_dropped_rates, confidence_interval, replications_needed, lag1_autocorrelation, batch_means,
+    mser, mser_truncation, OccupancyStatistics, MetricRecorder
+)
+
+
+class TestAnalysis(unittest.TestCase):
+    def test_blocked_dropped_rates(self):
+        """Test conversion of counters into fractions"""
+        self.assertEqual(blocked_dropped_rates(1, 3, 6), (0.1, 0.3))
+        self.assertEqual(blocked_dropped_rates(0, 0, 0), (0.0, 0.0))
+
+    def test_confidence_interval(self):
+        """Test the t-based half-width against a hand computed value"""
+        mean, half_width = confidence_interval([1.0, 2.0, 3.0], confidence=0.95)
+        self.assertAlmostEqual(mean, 2.0)
+        # t(0.975, 2) = 4.302653, std = 1, n = 3
+        self.assertAlmostEqual(half_width, 4.302653 / np.sqrt(3), places=5)
+
+        with self.assertRaises(ValueError):
+            confidence_interval([1.0])
+
+    def test_replications_needed(self):
+        """Test the pilot-study sample size formula"""
+        data = [1.0, 2.0, 3.0]
+        _, delta = confidence_interval(data)
+        self.assertEqual(replications_needed(data, delta), 3)
+        self.assertEqual(replications_needed(data, delta / 2), 12)
+
+
+
+class TestBatchMeans(unittest.TestCase):
+    def correlated_counts(self, n: int, phi: float) -> np.ndarray:
+        """Micro-batch counters whose blocked fraction follows an AR(1) process."""
+        rng = np.random.default_rng(0)
+        level = np.zeros(n)
+        for i in range(1, n):
+            level[i] = phi * level[i - 1] + rng.normal()
+        blocked = np.round(100 + 20 * level).clip(0)
+        return np.column_stack([blocked, np.full(n, 10), np.full(n, 1000)])
+
+    def test_lag1_autocorrelation(self):
+        """Test the lag-1 autocorrelation of alternating and constant series"""
+        self.assertLess(lag1_autocorrelation([1, -1, 1, -1, 1, -1]), -0.5)
+        self.assertEqual(lag1_autocorrelation([2, 2, 2]), 0.0)
+
+    def test_independent_batches_keep_size(self):
+        """Test that uncorrelated micro-batches are used as they are"""
+        result = batch_means(self.correlated_counts(256, 0.0))
+        self.assertEqual(result.batch_size, 1)
+        self.assertEqual(result.batches, 256)
+        self.assertTrue(result.converged)
+
+    def test_correlated_batches_grow(self):
+        """Test that batches grow until the autocorrelation is negligible"""
+        counts = self.correlated_counts(1024, 0.7)
+        result = batch_means(counts)
+        self.assertGreater(result.batch_size, 1)
+        self.assertTrue(result.converged)
+        self.assertLessEqual(max(result.autocorrelation), 0.1)
+        self.assertEqual(result.batches, 1024 // result.batch_size)
+
+    def test_gives_up_at_min_batches(self):
+        """Test that the batch size never leaves fewer than min_batches batches"""
+        result = batch_means(self.correlated_counts(64, 0.99), min_batches=16)
+        self.assertGreaterEqual(result.batches, 16)
+        self.assertFalse(result.converged)
+        with self.assertRaises(ValueError):
+            batch_means(self.correlated_counts(5, 0.0))
+
+
+class TestMSER(unittest.TestCase):
+    def series(self, transient: int, n: int) -> np.ndarray:
+        """Noise around 0 after a decaying initial transient of `transient` observations."""
+        rng = np.random.default_rng(1)
+        data = rng.normal(0, 1, n)
+        data[:transient] += np.linspace(20, 5, transient)
+        return data
+
+    def test_mser_finds_transient(self):
+        """Test that MSER-5 truncates right after the initial transient"""
+        truncation = mser(self.series(100, 1000))
+        self.assertEqual(truncation % 5, 0)
+        self.assertTrue(95 <= truncation <= 110)
+
+    def test_stationary_series(self):
+        """Test that a stationary series is barely truncated"""
+        self.assertLess(mser(self.series(0, 1000)), 100)
+
+    def test_truncation_must_be_in_first_half(self):
+        """Test that a truncation point in the second half is not accepted"""
+        self.assertIsNone(mser_truncation(np.column_stack([self.series(300, 400), self.series(0, 400)])))
+        truncation = mser_truncation(np.column_stack([self.series(100, 1000), self.series(0, 1000)]))
+        self.assertTrue(95 <= truncation <= 110)
+        with self.assertRaises(ValueError):
+            mser([1.0] * 9)
+
+
+class TestOccupancyStatistics(unittest.TestCase):
+    def setUp(self):
+        self.stats = OccupancyStatistics(number_of_base_stations=2, total_channels=3)
+        self.stats.change(0, 1, 1.0)
+        self.stats.change(0, 1, 3.0)
+        self.stats.change(0, -1, 4.0)
+
+    def test_occupancy_time(self):
+        """Test the time spent at each level, including the interval still open"""
+        np.testing.assert_allclose(self.stats.occupancy_time(10.0), [[1.0, 8.0, 1.0, 0.0], [10.0, 0.0, 0.0, 0.0]])
+
+    def test_mean_occupancy_and_utilization(self):
+        """Test the time-averaged busy channels against a hand computed value"""
+        np.testing.assert_allclose(self.stats.mean_occupancy(10.0), [1.0, 0.0])
+        np.testing.assert_allclose(self.stats.utilization(10.0), [1 / 3, 0.0])
+
+    def test_reset(self):
+        """Test that a reset discards the past but keeps the current levels"""
+        self.stats.blocked[1] += 1
+        self.stats.reset(5.0)
+        np.testing.assert_allclose(self.stats.occupancy_distribution(7.0)[0], [0.0, 1.0, 0.0, 0.0])
+        self.assertEqual(self.stats.blocked, [0, 0])
+        with self.assertRaises(ValueError):
+            self.stats.occupancy_distribution(5.0)
+
+    def test_probabilities(self):
+        """Test per-station blocking and dropping fractions"""
+        self.stats.initiations[:] = [4, 0]
+        self.stats.blocked[:] = [1, 0]
+        self.stats.handovers[:] = [2, 5]
+        self.stats.dropped[:] = [0, 1]
+        np.testing.assert_allclose(self.stats.blocking_probability(), [0.25, np.nan])
+        np.testing.assert_allclose(self.stats.dropping_probability(), [0.0, 0.2])
+
+
+class TestMetricRecorder(unittest.TestCase):
+    class FakeSimulator:
+        blocked_calls, dropped_calls, completed_calls = 1, 2, 3
+        base_stations = [2, 0, 1]
+
+    def test_sample_until(self):
+        """Test that time samples sit on the grid and stop before (or at) the given time"""
+        recorder = MetricRecorder(every_time=2.0, capacity=1)
+        recorder.start(3.0)
+        self.assertEqual(recorder.sample_until(self.FakeSimulator(), 8.0), 8.0)
+        np.testing.assert_array_equal(recorder['time'], [4.0, 6.0])
+        recorder.sample_until(self.FakeSimulator(), 8.0, inclusive=True)
+        np.testing.assert_array_equal(recorder['time'], [4.0, 6.0, 8.0])
+        self.assertEqual(recorder.as_dict()['busy_channels'].tolist(), [3, 3, 3])
+
+    def test_invalid_interval(self):
+        """Test that exactly one positive interval is required"""
+        for kwargs in ({}, {'every_time': 1.0, 'every_steps': 10}, {'every_steps': 0}):
+            with self.assertRaises(ValueError):
+                MetricRecorder(**kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path to import the frame builder
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from animation_frames import FrameBuilder, build_frames, sample_frames
+from simulator import Simulator, EventResult, TOTAL_CHANNELS
+from generator import Generator
+
+
+class TestBuildFrames(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        sim = Simulator(Generator(seed=2), channel_reserved_for_handover=1, logging=True)
+        sim.run(1000)
+        cls.sim = sim
+        cls.frames = build_frames(sim.log)
+
+    def visible(self, frame):
+        """(car label, x, y, color) of the markers that are drawn."""
+        return [(text, x, y, color) for text, x, y, color in zip(frame.texts, frame.x, frame.y, frame.colors)
+                if color != "rgba(0,0,0,0)"]
+
+    def test_one_frame_per_event(self):
+        """Test that every logged event gets a frame of the event's time"""
+        self.assertEqual(len(self.frames), len(self.sim.log))
+        for frame, entry in zip(self.frames, self.sim.log):
+            self.assertEqual((frame.time, frame.event_result, frame.car_id), (entry[0], entry[2], entry[3]._id))
+
+    def test_markers(self):
+        """Test that the drawn markers are the calls in progress, stacked per station"""
+        active = set()
+        outcomes = {
+            EventResult.INITIATION_BLOCKED: ("Blocked", "red"),
+            EventResult.HANDOVER_DROPPED: ("Dropped", "purple"),
+        }
+        for frame in self.frames:
+            markers = self.visible(frame)
+            if frame.event_result in outcomes:
+                label, color = outcomes[frame.event_result]
+                self.assertIn((f"Car {frame.car_id}<br>{label}", TOTAL_CHANNELS, color),
+                              [(m[0], m[2], m[3]) for m in markers])
+
+            if frame.event_result == EventResult.INITIATION_SUCCESS:
+                active.add(frame.car_id)
+            elif frame.event_result in (EventResult.HANDOVER_DROPPED, EventResult.TERMINATION):
+                active.discard(frame.car_id)
+            # Calls in progress, plus the call that just ended, which is drawn one last time
+            on_road = [m for m in markers if m[3] not in ("red", "purple")]
+            ending = frame.event_result == EventResult.TERMINATION
+            self.assertEqual(len(on_road), len(active) + ending)
+            self.assertTrue(all(0 <= m[2] < TOTAL_CHANNELS for m in on_road))
+        self.assertGreater(self.sim.blocked_calls, 0)
+        self.assertGreater(self.sim.dropped_calls, 0)
+
+    def test_highlighted_car(self):
+        """Test that the car of a successful initiation is highlighted in blue"""
+        for frame in self.frames:
+            if frame.event_result == EventResult.INITIATION_SUCCESS:
+                colors = [color for text, color in zip(frame.texts, frame.colors)
+                          if text.startswith(f"Car {frame.car_id}<br>")]
+                self.assertEqual(colors, ["blue"])
+
+
+class TestFrameBuilder(unittest.TestCase):
+    def test_active_set(self):
+        """Test that the active set and the frames only hold the calls in progress"""
+        sim = Simulator(Generator(seed=2), channel_reserved_for_handover=1, logging=True)
+        sim.run(1000)
+        builder = FrameBuilder(capacity=1)
+        active = set()
+        for entry in sim.log:
+            frame = builder.update(entry)
+            shown = {int(text.split("<br>")[0][4:]) for text in frame.texts}
+            if entry[2] == EventResult.INITIATION_SUCCESS:
+                active.add(entry[3]._id)
+            elif entry[2] == EventResult.HANDOVER_DROPPED:
+                active.discard(entry[3]._id)
+            if entry[2] == EventResult.TERMINATION:
+                self.assertEqual(shown, active)
+                active.discard(entry[3]._id)
+            elif entry[2] not in (EventResult.INITIATION_BLOCKED, EventResult.HANDOVER_DROPPED):
+                self.assertEqual(shown, active)
+            self.assertEqual(len(builder), len(active))
+            self.assertEqual(sorted(builder.car_id[:len(builder)].tolist()), sorted(active))
+
+    def test_remove_moves_last_row(self):
+        """Test that removing a call keeps the rows dense and the row index consistent"""
+        sim = Simulator(Generator(seed=0), logging=True)
+        sim.run(200)
+        cars = [entry[3] for entry in sim.log if entry[2] == EventResult.INITIATION_SUCCESS][:3]
+        builder = FrameBuilder(capacity=2)
+        for car in cars:
+            builder.add(car)
+        builder.remove(cars[0]._id)
+        self.assertEqual(len(builder), 2)
+        self.assertEqual(builder.car_id[:2].tolist(), [cars[2]._id, cars[1]._id])
+        self.assertEqual(builder._rows, {cars[2]._id: 0, cars[1]._id: 1})
+        self.assertEqual(builder._texts[0], f"Car {cars[2]._id}<br>ET:{cars[2].get_end_time():.1f}")
+
+
+class TestSampleFrames(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        sim = Simulator(Generator(seed=2), channel_reserved_for_handover=1, logging=True)
+        sim.run(1000)
+        cls.sim = sim
+        cls.frames = build_frames(sim.log)
+
+    def test_time_grid(self):
+        """Test that grid frames hold the calls in progress at the grid times"""
+        interval = self.sim.clock / 50
+        frames = list(sample_frames(self.sim.log, interval))
+        self.assertEqual(len(frames), sum(1 for k in range(52) if k * interval < self.sim.clock))
+        entries = iter(self.sim.log)
+        active = set()
+        entry = next(entries)
+        for k, frame in enumerate(frames):
+            self.assertAlmostEqual(frame.time, k * interval)
+            self.assertIsNone(frame.event_result)
+            while entry is not None and entry[0] <= frame.time:
+                if entry[2] == EventResult.INITIATION_SUCCESS:
+                    active.add(entry[3]._id)
+                elif entry[2] in (EventResult.HANDOVER_DROPPED, EventResult.TERMINATION):
+                    active.discard(entry[3]._id)
+                entry = next(entries, None)
+            self.assertEqual({int(text.split("<br>")[0][4:]) for text in frame.texts}, active)
+            self.assertEqual(set(frame.colors) - {"grey"}, set())
+
+    def test_highlighted_events(self):
+        """Test that highlighted events get the same frame as in build_frames, up to the limit"""
+        highlight = (EventResult.INITIATION_BLOCKED, EventResult.HANDOVER_DROPPED)
+        expected = [frame for frame in self.frames if frame.event_result in highlight]
+        frames = [frame for frame in sample_frames(self.sim.log, self.sim.clock / 10, highlight)
+                  if frame.event_result is not None]
+        self.assertEqual(frames, expected)
+
+        frames = [frame for frame in sample_frames(self.sim.log, self.sim.clock / 10, highlight, max_highlights=2)
+                  if frame.event_result is not None]
+        self.assertEqual(frames, expected[:2])
+
+    def test_invalid_interval(self):
+        """Test that a non-positive interval is rejected"""
+        with self.assertRaises(ValueError):
+            next(sample_frames(self.sim.log, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
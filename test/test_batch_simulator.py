@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path to import BatchSimulator class
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from batch_simulator import BatchSimulator
+from generator import Generator
+from simulator import Simulator, TOTAL_CHANNELS
+
+
+class TestBatchSimulator(unittest.TestCase):
+    """Test cases for the BatchSimulator class"""
+
+    def run_both(self, replications, steps, reserved=0, **generator_kwargs):
+        batch = BatchSimulator(Generator.spawn(replications, root_seed=5, substreams=True, **generator_kwargs),
+                               reserved, block_size=64)
+        batch.run(steps)
+        sims = []
+        for gen in Generator.spawn(replications, root_seed=5, substreams=True, **generator_kwargs):
+            sim = Simulator(gen, reserved)
+            sim.run(steps)
+            sims.append(sim)
+        return batch, sims
+
+    def test_matches_independent_simulators(self):
+        """Test that every replication ends where an independent Simulator run ends"""
+        for reserved in (0, 1):
+            batch, sims = self.run_both(6, 3000, reserved)
+            expected = [(sim.blocked_calls, sim.dropped_calls, sim.completed_calls) for sim in sims]
+            np.testing.assert_array_equal(batch.counters(), expected)
+            np.testing.assert_array_equal(batch.clock, [sim.clock for sim in sims])
+            np.testing.assert_array_equal(batch.base_stations, [sim.base_stations for sim in sims])
+
+    def test_matches_with_buffered_generators(self):
+        """Test that the generator block size does not change the results"""
+        batch, sims = self.run_both(3, 2000, block_size=16)
+        np.testing.assert_array_equal(batch.counters()[:, 2], [sim.completed_calls for sim in sims])
+
+    def test_car_table_grows(self):
+        """Test that the car table grows when a replication runs out of slots"""
+        batch = BatchSimulator(Generator.spawn(2, root_seed=1, substreams=True), capacity=2)
+        batch.run(2000)
+        self.assertGreater(batch.capacity, 2)
+        self.assertTrue(np.all(batch.base_stations <= TOTAL_CHANNELS))
+
+    def test_requires_substreams(self):
+        """Test that generators sharing one stream are rejected"""
+        with self.assertRaises(ValueError):
+            BatchSimulator(Generator.spawn(2, root_seed=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
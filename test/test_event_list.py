@@ -0,0 +1,107 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path to import the event lists
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import random
+
+from event_list import HeapEventList, CalendarEventList
+from simulator import EventType
+
+
+class TestHeapEventList(unittest.TestCase):
+    def setUp(self):
+        self.event_list = HeapEventList()
+
+    def test_pop_in_time_order(self):
+        """Test that events pop in time order"""
+        for time, car in [(3.0, 0), (1.0, 1), (2.0, 2)]:
+            self.event_list.push(time, EventType.CALL_HANDOVER, car)
+
+        self.assertEqual(len(self.event_list), 3)
+        self.assertEqual(self.event_list.peek()[0], 1.0)
+        self.assertEqual([self.event_list.pop()[3] for _ in range(3)], [1, 2, 0])
+        self.assertEqual(len(self.event_list), 0)
+
+    def test_ties_pop_in_insertion_order(self):
+        """Test that events at the same time pop first in, first out, whatever their type"""
+        self.event_list.push(5.0, EventType.CALL_TERMINATION, 7)
+        self.event_list.push(5.0, EventType.CALL_HANDOVER, 3)
+        self.event_list.push(5.0, EventType.CALL_INITIATION, 9)
+        self.event_list.push(4.0, EventType.CALL_TERMINATION, 1)
+
+        popped = [self.event_list.pop() for _ in range(4)]
+        self.assertEqual([(event[2], event[3]) for event in popped], [
+            (EventType.CALL_TERMINATION, 1),
+            (EventType.CALL_TERMINATION, 7),
+            (EventType.CALL_HANDOVER, 3),
+            (EventType.CALL_INITIATION, 9),
+        ])
+
+    def test_clear(self):
+        """Test that clear removes every event"""
+        self.event_list.push(1.0, EventType.CALL_INITIATION, 0)
+        self.event_list.clear()
+        self.assertEqual(len(self.event_list), 0)
+
+
+class TestCalendarEventList(TestHeapEventList):
+    def setUp(self):
+        self.event_list = CalendarEventList()
+
+    def test_matches_heap(self):
+        """Test that the calendar queue pops the same entries as the heap through resizes"""
+        rng = random.Random(0)
+        heap = HeapEventList()
+        clock = 0.0
+        for car in range(20000):
+            if rng.random() < 0.55 or not heap:
+                # Mix of simultaneous, near and far future events
+                time = clock + rng.choice([0.0, rng.expovariate(1.0), rng.expovariate(0.001)])
+                heap.push(time, EventType.CALL_HANDOVER, car)
+                self.event_list.push(time, EventType.CALL_HANDOVER, car)
+            else:
+                event = heap.pop()
+                self.assertEqual(self.event_list.pop(), event)
+                clock = event[0]
+            self.assertEqual(len(self.event_list), len(heap))
+        while heap:
+            self.assertEqual(self.event_list.pop(), heap.pop())
+
+    def test_push_before_last_pop(self):
+        """Test that an event earlier than the last popped one is still popped first"""
+        for time in (10.0, 20.0, 30.0):
+            self.event_list.push(time, EventType.CALL_HANDOVER, 0)
+        self.event_list.pop()
+        self.event_list.push(1.0, EventType.CALL_TERMINATION, 1)
+        self.assertEqual(self.event_list.pop()[0], 1.0)
+
+    def test_recalibrates_when_spacing_drifts(self):
+        """Test that the bucket width follows the event spacing at a steady size"""
+        rng = random.Random(0)
+        heap = HeapEventList()
+        for car in range(1000):
+            time = rng.expovariate(1.0)
+            heap.push(time, EventType.CALL_HANDOVER, car)
+            self.event_list.push(time, EventType.CALL_HANDOVER, car)
+        initial_width = self.event_list._width
+        # Hold model: the size stays at 1000 while the spacing grows about 1000 times
+        for _ in range(20000):
+            event = heap.pop()
+            self.assertEqual(self.event_list.pop(), event)
+            time = event[0] + rng.expovariate(0.001)
+            heap.push(time, EventType.CALL_HANDOVER, event[3])
+            self.event_list.push(time, EventType.CALL_HANDOVER, event[3])
+        self.assertEqual(len(self.event_list._buckets), 512)
+        self.assertGreater(self.event_list._width, 100 * initial_width)
+        self.assertLessEqual(self.event_list._scanned, self.event_list.MAX_SCAN * max(self.event_list._pops, 1))
+
+    def test_pop_empty(self):
+        """Test that popping an empty list raises IndexError like heapq"""
+        with self.assertRaises(IndexError):
+            self.event_list.pop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+# Add parent directory to path to import the event log
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from event_log import ColumnarLogSink, EventLog
+from generator import Generator
+from simulator import Simulator
+
+
+class TestColumnarEventLog(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'log')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_entries_match_in_memory_log(self):
+        """Test that the columnar log holds the same events as Simulator.log"""
+        with ColumnarLogSink(self.path, chunk_size=128) as sink:
+            sim = Simulator(Generator(seed=3), channel_reserved_for_handover=1, logging=True, log_sink=sink)
+            sim.run(2000)
+
+        log = EventLog(self.path)
+        self.assertEqual(len(log), 2000)
+        self.assertEqual(list(log.entries()), sim.log)
+
+    def test_columns_are_memory_mapped(self):
+        """Test that readers get zero-copy views over the column files"""
+        with ColumnarLogSink(self.path, chunk_size=100) as sink:
+            sim = Simulator(Generator(seed=1), log_sink=sink)
+            sim.run(1000)
+
+        log = EventLog(self.path)
+        self.assertIsInstance(log.events['time'], np.memmap)
+        self.assertTrue(np.all(np.diff(log.events['time']) >= 0))
+        self.assertEqual(log.events['completed'][-1], sim.completed_calls)
+        self.assertEqual(os.path.getsize(os.path.join(self.path, 'events.time.bin')), 1000 * 8)
+
+    def test_flush_exposes_partial_log(self):
+        """Test that a flushed log can be read while the simulation goes on"""
+        sink = ColumnarLogSink(self.path, chunk_size=64)
+        sim = Simulator(Generator(seed=2), log_sink=sink)
+        sim.run(500)
+        sink.flush()
+        self.assertEqual(len(EventLog(self.path)), 500)
+        sim.run(500)
+        sink.close()
+        self.assertEqual(len(EventLog(self.path)), 1000)
+
+    def test_unknown_car(self):
+        """Test that a car without an initiation in the log is reported"""
+        with ColumnarLogSink(self.path):
+            pass
+        with self.assertRaises(KeyError):
+            EventLog(self.path).car(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+
+# Add parent directory to path to import the experiment runners
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from analysis import confidence_interval
+from experiment import (
+    DONE_FILE, WARM_UP_STEPS, interval_rates, main, precision_reached, run_checkpointed, run_counters, run_experiment,
+    run_forked_replications, run_replication, run_until_precision
+)
+from generator import Generator, spawn_seeds
+from simulator import Simulator
+
+SHORT_RUN = dict(warm_up_steps=500, steps=3000)
+
+
+class TestSequentialStopping(unittest.TestCase):
+    def test_precision_reached(self):
+        """Test the absolute and relative stopping rules"""
+        observations = np.array([[0.10, 0.01], [0.12, 0.02], [0.11, 0.03]])
+        _, delta_blocked = confidence_interval(observations[:, 0])
+        _, delta_dropped = confidence_interval(observations[:, 1])
+        self.assertTrue(precision_reached(observations, half_width=max(delta_blocked, delta_dropped)))
+        self.assertFalse(precision_reached(observations, half_width=delta_blocked))
+        self.assertFalse(precision_reached(observations, relative_half_width=0.5))
+        self.assertTrue(precision_reached(observations, relative_half_width=2.0))
+
+    def test_stops_at_first_precise_prefix(self):
+        """Test that the runner stops at the first replication count meeting the target"""
+        result = run_until_precision(1, relative_half_width=0.5, max_replications=30, processes=1, **SHORT_RUN)
+        self.assertTrue(result.converged)
+        self.assertGreaterEqual(result.replications, 5)
+        if result.replications > 5:
+            self.assertFalse(precision_reached(result.observations[:-1], relative_half_width=0.5))
+        self.assertEqual(result.blocked, confidence_interval(result.observations[:, 0]))
+
+        # Replication i uses the i-th spawned seed
+        seeds = spawn_seeds(0, 30)
+        np.testing.assert_array_equal(result.observations[1], run_replication(seeds[1], 1, **SHORT_RUN))
+
+    def test_process_pool_matches_serial(self):
+        """Test that the pool stops at the same replication with the same estimates"""
+        serial = run_until_precision(1, relative_half_width=0.5, max_replications=30, processes=1, **SHORT_RUN)
+        pooled = run_until_precision(1, relative_half_width=0.5, max_replications=30, processes=2, **SHORT_RUN)
+        np.testing.assert_array_equal(serial.observations, pooled.observations)
+
+    def test_gives_up_at_max_replications(self):
+        """Test that an unreachable target stops at max_replications"""
+        result = run_until_precision(half_width=1e-9, min_replications=3, max_replications=3, processes=1, **SHORT_RUN)
+        self.assertFalse(result.converged)
+        self.assertEqual(result.replications, 3)
+
+    def test_invalid_arguments(self):
+        """Test that a missing target or impossible bounds are rejected"""
+        with self.assertRaises(ValueError):
+            run_until_precision(processes=1)
+        with self.assertRaises(ValueError):
+            run_until_precision(half_width=0.01, min_replications=1, processes=1)
+
+
+class TestWarmStart(unittest.TestCase):
+    def test_forked_replications(self):
+        """Test that forked replications match forks of the same warm-up"""
+        observations = run_forked_replications(3, 1, processes=1, seed=5, root_seed=2, **SHORT_RUN)
+        self.assertEqual(observations.shape, (3, 2))
+
+        sim = Simulator(Generator(seed=5), 1)
+        sim.run(SHORT_RUN['warm_up_steps'])
+        fork = sim.fork(3, root_seed=2)[2]
+        np.testing.assert_array_equal(observations[2], fork.steady_state_rates(0, SHORT_RUN['steps']))
+
+    def test_checkpointed_run_resumes(self):
+        """Test that an interrupted checkpointed run resumes where it stopped"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'run.ckpt')
+            run_checkpointed(lambda: Simulator(Generator(seed=6)), 2000, path, checkpoint_every=1000)
+            # The checkpoint is a plain Simulator checkpoint that knows how far the run got
+            self.assertEqual(Simulator.load_checkpoint(path).steps, 2000)
+            # Pretend the run died here and is restarted with a longer target
+            resumed = run_checkpointed(lambda: self.fail("Should resume"), 4000, path, checkpoint_every=1000)
+        uninterrupted = Simulator(Generator(seed=6))
+        uninterrupted.run(4000)
+        self.assertEqual(resumed.clock, uninterrupted.clock)
+        self.assertEqual(resumed.blocked_calls, uninterrupted.blocked_calls)
+
+
+class TestExperimentEngine(unittest.TestCase):
+    SMALL = dict(channels_reserved=(0, 1), replications=3, interval_steps=500, intervals=6, progress=False)
+
+    def test_run_counters(self):
+        """Test that the recorded counters are the simulator's cumulative counters"""
+        counters = run_counters(4, 1, interval_steps=500, intervals=6)
+        self.assertEqual(counters.shape, (6, 3))
+        self.assertTrue(np.all(np.diff(counters, axis=0) >= 0))
+        sim = Simulator(Generator(seed=4), 1)
+        sim.run(3000)
+        np.testing.assert_array_equal(counters[-1], (sim.blocked_calls, sim.dropped_calls, sim.completed_calls))
+
+    def test_run_experiment(self):
+        """Test the results array and its agreement with single replications"""
+        with tempfile.TemporaryDirectory() as directory:
+            counters = run_experiment(directory, processes=1, **self.SMALL)
+            self.assertEqual(counters.shape, (2, 3, 6, 3))
+            seeds = spawn_seeds(0, 3)
+            np.testing.assert_array_equal(counters[1, 2], run_counters(seeds[2], 1, 500, 6))
+
+            with tempfile.TemporaryDirectory() as pooled:
+                np.testing.assert_array_equal(run_experiment(pooled, processes=2, **self.SMALL), counters)
+
+    def test_resume(self):
+        """Test that resuming only runs the replications that had not finished"""
+        with tempfile.TemporaryDirectory() as directory:
+            expected = np.array(run_experiment(directory, processes=1, **self.SMALL))
+
+            # Pretend replication 1 of policy 0 was interrupted
+            done = np.load(os.path.join(directory, DONE_FILE), mmap_mode='r+')
+            done[0, 1] = False
+            done.flush()
+            del done
+            with patch('experiment.run_counters', wraps=run_counters) as runner:
+                resumed = run_experiment(directory, processes=1, **self.SMALL)
+            self.assertEqual(runner.call_count, 1)
+            np.testing.assert_array_equal(resumed, expected)
+
+            with self.assertRaises(ValueError):
+                run_experiment(directory, processes=1, **dict(self.SMALL, replications=4))
+
+    def test_interval_rates(self):
+        """Test the steady-state fractions computed from cumulative counters"""
+        counters = np.array([[1, 0, 9], [3, 1, 16], [4, 1, 25]])
+        np.testing.assert_allclose(interval_rates(counters), (4 / 30, 1 / 30))
+        np.testing.assert_allclose(interval_rates(counters, 1), (3 / 20, 1 / 20))
+        with self.assertRaises(ValueError):
+            interval_rates(counters, 3)
+
+    def test_cli_warm_up(self):
+        """Test that the CLI warm-up follows the interval length and must leave intervals to observe"""
+        counters = np.cumsum(np.ones((2, 3, 40, 3), dtype=np.int64), axis=2)
+        with patch('experiment.run_experiment', return_value=counters) as runner, \
+                patch('experiment.interval_rates', wraps=interval_rates) as rates, patch('sys.stdout'):
+            main(['experiment_dir', '--interval-steps', '5000', '--intervals', '40'])
+            self.assertEqual(rates.call_args[0][1], -(-WARM_UP_STEPS // 5000))
+
+            with patch('sys.stderr'), self.assertRaises(SystemExit):
+                main(['experiment_dir', '--intervals', '20'])
+            self.assertEqual(runner.call_count, 1)
+
+    def test_cli_single_replication(self):
+        """Test that the CLI refuses a single replication, which gives no confidence interval"""
+        with patch('experiment.run_experiment') as runner, patch('sys.stderr'), self.assertRaises(SystemExit):
+            main(['experiment_dir', '--replications', '1'])
+        runner.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,7 +6,7 @@ from collections import Counter
 
 # Add parent directory to path to import Generator class
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from generator import Generator
+from generator import Generator, spawn_seeds
 
 
 class TestGenerator(unittest.TestCase):
@@ -118,6 +118,166 @@ class TestGenerator(unittest.TestCase):
             self.assertEqual(gen1.generate_base_station(), gen2.generate_base_station())
             self.assertEqual(gen1.generate_position(), gen2.generate_position())
 
+    def test_buffered_reproducibility(self):
+        """Test that buffered mode is reproducible for the same seed and block size"""
+        gen1 = Generator(seed=123, block_size=7)
+        gen2 = Generator(seed=123, block_size=7)
+
+        # Draw across several refills to cover the buffer boundaries
+        for _ in range(20):
+            self.assertEqual(gen1.generate_call_duration(), gen2.generate_call_duration())
+            self.assertEqual(gen1.generate_velocity(), gen2.generate_velocity())
+            self.assertEqual(gen1.generate_direction(), gen2.generate_direction())
+
+    def test_buffered_stream_layout(self):
+        """Test that buffered values are handed out block by block in refill order"""
+        gen = Generator(seed=5, block_size=4)
+        velocities = [gen.generate_velocity() for _ in range(3)]
+        positions = [gen.generate_position() for _ in range(2)]
+        velocities += [gen.generate_velocity() for _ in range(3)]
+
+        # The documented stream: velocity block, position block, then the next velocity block
+        rng = np.random.RandomState(5)
+        sigma = np.sqrt(gen.velocity_variance)
+        expected_velocities = rng.normal(gen.velocity_mu, sigma, 4).tolist()
+        expected_positions = rng.uniform(gen.position_min, gen.position_max, 4).tolist()
+        expected_velocities += rng.normal(gen.velocity_mu, sigma, 4).tolist()
+
+        self.assertEqual(velocities, expected_velocities[:6])
+        self.assertEqual(positions, expected_positions[:2])
+
+    def test_buffered_distributions(self):
+        """Test that buffered mode samples from the same distributions"""
+        gen = Generator(seed=42, block_size=256)
+        stations = [gen.generate_base_station() for _ in range(1000)]
+        directions = [gen.generate_direction() for _ in range(1000)]
+        durations = [gen.generate_call_duration() for _ in range(1000)]
+
+        self.assertTrue(all(gen.base_station_min <= s <= gen.base_station_max for s in stations))
+        self.assertTrue(all(isinstance(s, int) for s in stations))
+        self.assertTrue(all(d in [-1, 1] for d in directions))
+        self.assertTrue(all(d >= gen.call_duration_x0 for d in durations))
+
+    def test_spawn_reproducible(self):
+        """Test that spawned streams are reproducible from the root seed"""
+        gens1 = Generator.spawn(3, root_seed=2024)
+        gens2 = Generator.spawn(3, root_seed=2024)
+
+        for gen1, gen2 in zip(gens1, gens2):
+            for _ in range(10):
+                self.assertEqual(gen1.generate_velocity(), gen2.generate_velocity())
+                self.assertEqual(gen1.generate_base_station(), gen2.generate_base_station())
+
+    def test_spawn_independent(self):
+        """Test that spawned streams differ from each other"""
+        gens = Generator.spawn(4, root_seed=7, bit_generator='Philox')
+        first_draws = [tuple(gen.generate_position() for _ in range(5)) for gen in gens]
+        self.assertEqual(len(set(first_draws)), len(gens))
+
+    def test_spawn_seeds_match_spawn(self):
+        """Test that workers building generators from spawn_seeds see the same streams"""
+        children = spawn_seeds(11, 2)
+        gens = Generator.spawn(2, root_seed=11)
+        for child, gen in zip(children, gens):
+            self.assertEqual(Generator(seed=child).generate_call_duration(), gen.generate_call_duration())
+
+    def test_substreams_independent_of_call_order(self):
+        """Test that with substreams each variable's values do not depend on other draws"""
+        gen1 = Generator(seed=3, substreams=True)
+        gen2 = Generator(seed=3, substreams=True)
+
+        velocities1 = [gen1.generate_velocity() for _ in range(10)]
+        velocities2 = []
+        for _ in range(10):
+            gen2.generate_position()
+            gen2.generate_direction()
+            velocities2.append(gen2.generate_velocity())
+
+        self.assertEqual(velocities1, velocities2)
+
+    def test_substreams_with_seed_sequence(self):
+        """Test that building substreams does not consume the caller's seed sequence"""
+        seed = np.random.SeedSequence(99)
+        gen1 = Generator(seed=seed, substreams=True)
+        gen2 = Generator(seed=seed, substreams=True)
+        self.assertEqual(seed.n_children_spawned, 0)
+        self.assertEqual(gen1.generate_call_duration(), gen2.generate_call_duration())
+
+    def test_common_random_numbers(self):
+        """Test that common random numbers generators produce identical streams"""
+        gens = Generator.common_random_numbers(3, seed=17, block_size=16)
+        for _ in range(40):
+            values = [(g.generate_inter_arrival_time(), g.generate_base_station()) for g in gens]
+            self.assertEqual(values[0], values[1])
+            self.assertEqual(values[0], values[2])
+
+    def test_antithetic_pair_mirrors_uniforms(self):
+        """Test that an antithetic pair produces mirrored values"""
+        gen, mirror = Generator.antithetic_pair(seed=21)
+        for _ in range(100):
+            self.assertAlmostEqual(gen.generate_position() + mirror.generate_position(),
+                                   gen.position_min + gen.position_max)
+            self.assertAlmostEqual(gen.generate_velocity() + mirror.generate_velocity(),
+                                   2 * gen.velocity_mu)
+            self.assertEqual(gen.generate_direction(), -mirror.generate_direction())
+            self.assertEqual(gen.generate_base_station() + mirror.generate_base_station(),
+                             gen.base_station_min + gen.base_station_max)
+
+    def test_inversion_sampling_matches_buffered(self):
+        """Test that inversion sampling gives the same values with and without buffering"""
+        gen = Generator(seed=4, substreams=True, sampling='antithetic')
+        buffered = Generator(seed=4, substreams=True, sampling='antithetic', block_size=8)
+        for _ in range(20):
+            self.assertAlmostEqual(gen.generate_call_duration(), buffered.generate_call_duration())
+            self.assertEqual(gen.generate_base_station(), buffered.generate_base_station())
+
+    def test_inversion_sampling_distribution(self):
+        """Test that inversion sampling follows the fitted distributions"""
+        gen = Generator(seed=42, sampling='inversion', block_size=1024)
+        times = [gen.generate_inter_arrival_time() for _ in range(10000)]
+        durations = [gen.generate_call_duration() for _ in range(10000)]
+        expected_mean = 1.0 / gen.inter_arrival_time_lambda
+        self.assertAlmostEqual(np.mean(times), expected_mean, delta=expected_mean * 0.05)
+        self.assertTrue(all(d >= gen.call_duration_x0 for d in durations))
+
+    def test_generate_cars_matches_single_draws(self):
+        """Test that drawing a block of cars gives the same values as drawing them one by one"""
+        for kwargs in ({}, {'block_size': 5}, {'sampling': 'inversion'}):
+            gen = Generator(seed=8, substreams=True, **kwargs)
+            single = Generator(seed=8, substreams=True, **kwargs)
+            cars = gen.generate_cars(12)
+            for i in range(12):
+                self.assertEqual(cars['velocity'][i], single.generate_velocity())
+                self.assertEqual(cars['base_station'][i], single.generate_base_station())
+                self.assertEqual(cars['call_duration'][i], single.generate_call_duration())
+            # Variables that were not drawn singly are unaffected by the block draw
+            self.assertEqual(gen.generate_position(), Generator(seed=8, substreams=True, **kwargs).generate_cars(13)['position'][12])
+
+    def test_generate_cars_needs_substreams(self):
+        """Test that block draws are rejected on a shared stream"""
+        with self.assertRaises(ValueError):
+            Generator(seed=1).generate_cars(4)
+
+    def test_reseed(self):
+        """Test that reseeding restarts the streams like a new generator"""
+        for kwargs in ({}, {'block_size': 16}, {'substreams': True}):
+            gen = Generator(seed=1, **kwargs)
+            [gen.generate_velocity() for _ in range(5)]
+            gen.reseed(2)
+            fresh = Generator(seed=2, **kwargs)
+            self.assertEqual([gen.generate_velocity() for _ in range(20)],
+                             [fresh.generate_velocity() for _ in range(20)])
+
+    def test_invalid_sampling(self):
+        """Test that an unknown sampling method is rejected"""
+        with self.assertRaises(ValueError):
+            Generator(seed=1, sampling='stratified')
+
+    def test_invalid_block_size(self):
+        """Test that a non-positive block size is rejected"""
+        with self.assertRaises(ValueError):
+            Generator(seed=1, block_size=0)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
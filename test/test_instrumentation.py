@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Add parent directory to path to import the instrumentation
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from instrumentation import Instrumentation, check_invariants, INSTRUMENTED_METHODS
+from simulator import Simulator
+from generator import Generator
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_report(self):
+        """Test that the profile counts every event and leaves the run unchanged"""
+        sim = Simulator(Generator(seed=5))
+        with Instrumentation(size_every=500).attach(sim) as instrumentation:
+            sim.run(3000)
+        report = instrumentation.report()
+        self.assertEqual(report['steps'], 3000)
+        self.assertEqual(sum(event['count'] for event in report['event_types'].values()), 3000)
+        # Every initiation draws the next arrival
+        self.assertEqual(report['gen_car']['count'], report['event_types']['CALL_INITIATION']['count'])
+        self.assertGreater(report['events_per_second'], 0)
+        self.assertEqual([sample['step'] for sample in report['event_list_size']], list(range(500, 3001, 500)))
+
+        plain = Simulator(Generator(seed=5))
+        plain.run(3000)
+        self.assertEqual((sim.clock, sim.blocked_calls, sim.dropped_calls),
+                         (plain.clock, plain.blocked_calls, plain.dropped_calls))
+
+    def test_detach(self):
+        """Test that detaching restores the plain methods"""
+        sim = Simulator(Generator(seed=5))
+        instrumentation = Instrumentation(check_every=1).attach(sim)
+        with self.assertRaises(ValueError):
+            Instrumentation().attach(sim)
+        instrumentation.detach()
+        self.assertIsNone(sim.instrumentation)
+        self.assertFalse(any(name in sim.__dict__ for name in INSTRUMENTED_METHODS))
+        sim.run(100)
+        self.assertEqual(instrumentation.steps, 0)
+
+    def test_sampled_invariant_checks(self):
+        """Test that the checker runs every check_every steps and catches a corrupted state"""
+        sim = Simulator(Generator(seed=5))
+        with Instrumentation(profile=False, check_every=10).attach(sim) as instrumentation:
+            sim.run(1000)
+            self.assertEqual(instrumentation.checks, 100)
+            self.assertEqual(instrumentation.report()['event_list_size'], [])
+
+            sim.base_stations[3] = sim.total_channels + 1
+            with self.assertRaises(AssertionError):
+                sim.run(10)
+
+    def test_check_invariants(self):
+        """Test that the checker accepts a consistent state and rejects a corrupted one"""
+        sim = Simulator(Generator(seed=5))
+        sim.run(500)
+        check_invariants(sim)
+        sim.stats.levels[0] += 1
+        with self.assertRaises(AssertionError):
+            check_invariants(sim)
+
+    def test_snapshot_of_instrumented_simulator(self):
+        """Test that an instrumented simulator can be snapshotted and restores uninstrumented"""
+        sim = Simulator(Generator(seed=5))
+        with Instrumentation().attach(sim):
+            sim.run(500)
+            restored = Simulator.restore(sim.snapshot())
+        self.assertIsNone(restored.instrumentation)
+        self.assertFalse(any(name in restored.__dict__ for name in INSTRUMENTED_METHODS))
+        restored.run(500)
+
+    def test_save_report(self):
+        """Test that the report is written as JSON"""
+        sim = Simulator(Generator(seed=5))
+        with Instrumentation().attach(sim) as instrumentation:
+            sim.run(200)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'report.json')
+            instrumentation.save_report(path)
+            with open(path) as file:
+                self.assertEqual(json.load(file)['steps'], 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+import tempfile
+
+import yaml
+
+# Add parent directory to path to import ParallelSimulator class
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generator import Generator
+from parallel_simulator import ParallelSimulator
+from simulator import Simulator
+
+
+def run_serial(generator, end_time, reserved=0):
+    """Process every event of a serial Simulator before end_time."""
+    sim = Simulator(generator, reserved)
+    while sim.event_list.peek()[0] < end_time:
+        sim.step()
+    return sim.blocked_calls, sim.dropped_calls, sim.completed_calls, sim.base_stations
+
+
+class TestParallelSimulator(unittest.TestCase):
+    """Test cases for the ParallelSimulator class"""
+
+    def state(self, sim):
+        return sim.blocked_calls, sim.dropped_calls, sim.completed_calls, sim.base_stations
+
+    def test_matches_serial_simulator(self):
+        """Test that any partition of the highway reproduces the serial run"""
+        for seed, reserved in [(0, 0), (1, 1)]:
+            expected = run_serial(Generator(seed=seed), 10000.0, reserved)
+            for segments in (1, 3, 20):
+                sim = ParallelSimulator(Generator(seed=seed), segments, reserved, processes=False)
+                sim.run_until(10000.0)
+                self.assertEqual(self.state(sim), expected)
+
+    def test_matches_serial_simulator_with_processes(self):
+        """Test that worker processes give the same result, also across run_until calls"""
+        expected = run_serial(Generator(seed=4, substreams=True), 6000.0, 1)
+        with ParallelSimulator(Generator(seed=4, substreams=True), 2, 1) as sim:
+            sim.run_until(2500.0)
+            sim.run_until(6000.0)
+            self.assertEqual(self.state(sim), expected)
+
+    def test_long_highway(self):
+        """Test that a long highway gives the same result for any number of segments"""
+        with open('params.yaml', 'r') as file:
+            params = yaml.safe_load(file)
+        params['base_station']['max'] = 199
+        params['inter_arrival_time']['lambda'] *= 10
+        with tempfile.TemporaryDirectory() as directory:
+            params_file = os.path.join(directory, 'params.yaml')
+            with open(params_file, 'w') as file:
+                yaml.safe_dump(params, file)
+
+            results = []
+            for segments in (1, 7):
+                sim = ParallelSimulator(Generator(params_file, seed=2, substreams=True), segments,
+                                        number_of_base_stations=200, processes=False)
+                sim.run_until(2000.0)
+                results.append(self.state(sim))
+        self.assertEqual(results[0], results[1])
+        self.assertGreater(results[0][2], 0)
+        self.assertEqual(len(results[0][3]), 200)
+
+    def test_invalid_arguments(self):
+        """Test that impossible partitions and highways are rejected"""
+        with self.assertRaises(ValueError):
+            ParallelSimulator(Generator(seed=1), segments=21, processes=False)
+        with self.assertRaises(ValueError):
+            ParallelSimulator(Generator(seed=1), number_of_base_stations=10, processes=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
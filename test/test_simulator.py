@@ -1,4 +1,5 @@
 import unittest
+import tempfile
 from unittest.mock import MagicMock, patch
 import sys
 import os
@@ -8,7 +9,8 @@ import numpy as np
 # Add parent directory to path to import simulator and generator
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from simulator import Simulator, Car, EventType, TOTAL_CHANNELS, NUMBER_OF_BASE_STATIONS, CELL_DAIMETER
+from analysis import MetricRecorder
+from simulator import Simulator, Car, CarTable, EventType, TOTAL_CHANNELS, NUMBER_OF_BASE_STATIONS, CELL_DAIMETER
 from generator import Generator
 
 class TestCar(unittest.TestCase):
@@ -95,6 +97,70 @@ class TestCar(unittest.TestCase):
         self.assertFalse(car.is_still_active(150.0))
     
 
+class TestCarTable(unittest.TestCase):
+    def test_insert_and_get(self):
+        """Test that a car stored in the table is returned unchanged"""
+        table = CarTable()
+        car = Car(_id=7, velocity=-30.5, root_position=123.0, root_station=4, call_duration=99.0, root_time=12.5)
+        index = table.insert(car)
+        self.assertEqual(table.get(index), car)
+        self.assertEqual(table.direction[index], -1)
+        self.assertEqual(table.end_time[index], car.get_end_time())
+
+    def test_matches_car_methods(self):
+        """Test that the table computes the same kinematics as Car"""
+        table = CarTable()
+        car = Car(_id=1, velocity=33.3, root_position=1500.0, root_station=5, call_duration=500.0, root_time=3.0)
+        index = table.insert(car)
+        for current_time in (3.0, 10.0, 18.01, 100.0):
+            self.assertEqual(table.abs_position(index, current_time), car.get_abs_position(current_time))
+            self.assertEqual(table.current_station(index, current_time), car.get_current_station(current_time))
+            self.assertEqual(table.time_to_next_station(index, current_time), car.get_time_to_next_station(current_time))
+
+    def test_slot_reuse_and_growth(self):
+        """Test that released slots are reused and the table grows when full"""
+        table = CarTable(capacity=2)
+        car = Car(_id=0, velocity=10, root_position=0.0, root_station=0, call_duration=1.0, root_time=0.0)
+        first = table.insert(car)
+        second = table.insert(car)
+        table.release(first)
+        self.assertEqual(table.insert(car), first)
+
+        third = table.insert(car)
+        self.assertEqual(table.capacity, 4)
+        self.assertEqual(len(table), 3)
+        self.assertNotIn(third, (first, second))
+        self.assertEqual(table.get(second), car)
+
+    def test_plan_itinerary(self):
+        """Test that the itinerary lists every crossing before the call ends"""
+        table = CarTable()
+        car = table.insert(Car(_id=1, velocity=10, root_position=500, root_station=5, call_duration=500.0, root_time=0.0))
+        table.plan_itinerary(car, 0.0)
+        times, cells = table.itinerary[car]
+        self.assertEqual(times, [150.0, 350.0])
+        self.assertEqual(cells, [5, 6, 7])
+
+        backward = table.insert(Car(_id=2, velocity=-10, root_position=500, root_station=1, call_duration=3600.0, root_time=0.0))
+        table.plan_itinerary(backward, 0.0)
+        times, cells = table.itinerary[backward]
+        # The second crossing leaves the highway
+        self.assertEqual(times, [50.0, 250.0])
+        self.assertEqual(cells, [1, 0, -1])
+
+        # A crossing exactly at the end of the call is a handover, as in the default engine
+        boundary = table.insert(Car(_id=3, velocity=10, root_position=500, root_station=5, call_duration=350.0, root_time=0.0))
+        table.plan_itinerary(boundary, 0.0)
+        self.assertEqual(table.itinerary[boundary], ([150.0, 350.0], [5, 6, 7]))
+
+    def test_simulator_table_stays_small(self):
+        """Test that the car table follows the calls in progress, not the run length"""
+        sim = Simulator(Generator(seed=3))
+        sim.run(20000)
+        self.assertEqual(len(sim.cars), len(sim.event_list))
+        self.assertLessEqual(sim.cars.capacity, 256)
+
+
 class TestSimulator(unittest.TestCase):
     def setUp(self):
         # Create a mock generator to have deterministic behavior
@@ -113,10 +179,10 @@ class TestSimulator(unittest.TestCase):
         sim = Simulator(self.mock_generator, _no_initial_event=True, _no_new_initialisation=True)
         
         # Clear event list for testing
-        sim.event_list = []
+        sim.event_list.clear()
         
         # Create a car for the event
-        car = Car(_id=1, velocity=60, root_position=1.0, root_station=5, call_duration=2.0, root_time=0.0)
+        car = sim.cars.insert(Car(_id=1, velocity=60, root_position=1.0, root_station=5, call_duration=2.0, root_time=0.0))
         
         # Add events with different timestamps to test ordering
         sim.add_event(3.0, EventType.CALL_INITIATION, car)
@@ -125,14 +191,31 @@ class TestSimulator(unittest.TestCase):
         
         # Check if events are ordered by time
         self.assertEqual(len(sim.event_list), 3)
-        first_event = sim.event_list[0]
+        first_event = sim.event_list.peek()
         self.assertEqual(first_event[0], 1.0)  # Time
-        self.assertEqual(first_event[1], EventType.CALL_TERMINATION)  # Type
+        self.assertEqual(first_event[2], EventType.CALL_TERMINATION)  # Type
+
+    def test_simultaneous_events(self):
+        """Test that events of different types at the same time do not break the event list"""
+        sim = Simulator(self.mock_generator, _no_initial_event=True, _no_new_initialisation=True)
+        car1 = sim.cars.insert(Car(_id=1, velocity=2/3.6, root_position=1000, root_station=5, call_duration=10.0, root_time=0.0))
+        car2 = sim.cars.insert(Car(_id=2, velocity=2/3.6, root_position=1000, root_station=5, call_duration=3600, root_time=10.0))
+        sim.add_event(0.0, EventType.CALL_INITIATION, car1)
+        sim.step()
+
+        # The termination of car 1 and the initiation of car 2 share the same timestamp
+        sim.add_event(10.0, EventType.CALL_INITIATION, car2)
+        sim.step()
+        sim.step()
+
+        self.assertEqual(sim.clock, 10.0)
+        self.assertEqual(sim.completed_calls, 1)
+        self.assertEqual(sim.base_stations[5], 1)
 
     def test_handle_call_initiation_success(self):
         """Test successful call initiation"""
         sim = Simulator(self.mock_generator, _no_initial_event=True, _no_new_initialisation=True)
-        sim.event_list = []  # Clear event list
+        sim.event_list.clear()  # Clear event list
         
         car = Car(_id=1, velocity=2/3.6, root_position=1000, root_station=5, call_duration=1800, root_time=2)
         
@@ -140,22 +223,22 @@ class TestSimulator(unittest.TestCase):
         self.assertEqual(sim.base_stations[5], 0)
         
         # Handle call initiation
-        sim.handle_call_initiation(car)
+        sim.handle_call_initiation(sim.cars.insert(car))
         
         # Check if base station channel is allocated
         self.assertEqual(sim.base_stations[5], 1)
         
         # Check if termination event is scheduled
         self.assertEqual(len(sim.event_list), 1)
-        event = sim.event_list[0]
+        event = sim.event_list.peek()
         expected_time = (2000-1000) / (2/3.6) + 2
         self.assertEqual(event[0], expected_time)  # Time = current time + call duration
-        self.assertEqual(event[1], EventType.CALL_TERMINATION)
+        self.assertEqual(event[2], EventType.CALL_TERMINATION)
 
     def test_handle_call_initiation_blocked(self):
         """Test call initiation when all channels are occupied"""
         sim = Simulator(self.mock_generator, _no_initial_event=True, _no_new_initialisation=True)
-        sim.event_list = []  # Clear event list
+        sim.event_list.clear()  # Clear event list
         
         car = Car(_id=1, velocity=20/3.6, root_position=0.0, root_station=5, call_duration=3600, root_time=0.0)
         
@@ -166,7 +249,7 @@ class TestSimulator(unittest.TestCase):
         initial_blocked = sim.blocked_calls
         
         # Handle call initiation
-        sim.handle_call_initiation(car)
+        sim.handle_call_initiation(sim.cars.insert(car))
         
         # Check if call was blocked
         self.assertEqual(sim.blocked_calls, initial_blocked + 1)
@@ -177,7 +260,7 @@ class TestSimulator(unittest.TestCase):
     def test_handle_call_termination(self):
         """Test call termination"""
         sim = Simulator(self.mock_generator, _no_initial_event=True, _no_new_initialisation=True)
-        sim.event_list = []  # Clear event list
+        sim.event_list.clear()  # Clear event list
         
         car = Car(_id=1, velocity=20/3.6, root_position=0.0, root_station=5, call_duration=3600, root_time=2.0)
         
@@ -185,7 +268,7 @@ class TestSimulator(unittest.TestCase):
         sim.base_stations[car.get_current_station(sim.clock)] = 1
         
         # Handle call termination
-        sim.handle_call_termination(car)
+        sim.handle_call_termination(sim.cars.insert(car))
         
         # Check if channel was released
         self.assertEqual(sim.base_stations[car.get_current_station(sim.clock)], 0)
@@ -196,7 +279,7 @@ class TestSimulator(unittest.TestCase):
     def test_handle_call_handover_success(self):
         """Test successful call handover"""
         sim = Simulator(self.mock_generator, _no_initial_event=True, _no_new_initialisation=True)
-        sim.event_list = []  # Clear event list
+        sim.event_list.clear()  # Clear event list
         
         # Create car at station 5 moving to station 6
         car = Car(_id=1, velocity=2/3.6, root_position=0.0, root_station=5, call_duration=3600, root_time=0.0)
@@ -206,7 +289,7 @@ class TestSimulator(unittest.TestCase):
         
         # Handle handover
         sim.clock = 5.0
-        sim.handle_call_handover(car)
+        sim.handle_call_handover(sim.cars.insert(car))
         
         # Check if channel was released from old station
         self.assertEqual(sim.base_stations[5], 0)
@@ -220,7 +303,7 @@ class TestSimulator(unittest.TestCase):
     def test_handle_call_handover_dropped(self):
         """Test call handover when destination has no available channels"""
         sim = Simulator(self.mock_generator, _no_initial_event=True, _no_new_initialisation=True)
-        sim.event_list = []  # Clear event list
+        sim.event_list.clear()  # Clear event list
         
         # Create car at station 5 moving to station 6
         car = Car(_id=1, velocity=2/3.6, root_position=0.0, root_station=5, call_duration=3600, root_time=0.0)
@@ -234,7 +317,7 @@ class TestSimulator(unittest.TestCase):
         
         # Handle handover
         sim.clock = 5.0
-        sim.handle_call_handover(car)
+        sim.handle_call_handover(sim.cars.insert(car))
         
         # Check if call was dropped
         self.assertEqual(sim.dropped_calls, initial_dropped + 1)
@@ -252,12 +335,12 @@ class TestSimulator(unittest.TestCase):
         
         # This call should be accepted
         car1 = Car(_id=1, velocity=2/3.6, root_position=0.0, root_station=5, call_duration=3600, root_time=0.0)
-        sim.handle_call_initiation(car1)
+        sim.handle_call_initiation(sim.cars.insert(car1))
         self.assertEqual(sim.base_stations[5], TOTAL_CHANNELS - 1)
         
         # This call should be blocked (only reserved channels left)
         car2 = Car(_id=2, velocity=2/3.6, root_position=0.0, root_station=5, call_duration=3600, root_time=0.0)
-        sim.handle_call_initiation(car2)
+        sim.handle_call_initiation(sim.cars.insert(car2))
         self.assertEqual(sim.blocked_calls, 1)
 
     def test_car_id_generation(self):
@@ -287,7 +370,7 @@ class TestSimulator(unittest.TestCase):
             sim.add_event(
                 i,
                 EventType.CALL_INITIATION,
-                Car(_id=i, velocity=2/3.6, root_position=50, root_station=5, call_duration=7200, root_time=i)
+                sim.cars.insert(Car(_id=i, velocity=2/3.6, root_position=50, root_station=5, call_duration=7200, root_time=i))
             )
             sim.step()
 
@@ -299,7 +382,7 @@ class TestSimulator(unittest.TestCase):
         sim.add_event(
             20,
             EventType.CALL_INITIATION,
-            Car(_id=11, velocity=2/3.6, root_position=20, root_station=6, call_duration=7200, root_time=20)
+            sim.cars.insert(Car(_id=11, velocity=2/3.6, root_position=20, root_station=6, call_duration=7200, root_time=20))
         )
         sim.step()
 
@@ -349,7 +432,7 @@ class TestSimulator(unittest.TestCase):
             sim.add_event(
                 i,
                 EventType.CALL_INITIATION,
-                Car(_id=i, velocity=2/3.6, root_position=50, root_station=5, call_duration=7200, root_time=i)
+                sim.cars.insert(Car(_id=i, velocity=2/3.6, root_position=50, root_station=5, call_duration=7200, root_time=i))
             )
             sim.step()
 
@@ -361,7 +444,7 @@ class TestSimulator(unittest.TestCase):
         sim.add_event(
             11,
             EventType.CALL_INITIATION,
-            Car(_id=11, velocity=2/3.6, root_position=20, root_station=6, call_duration=7200, root_time=11)
+            sim.cars.insert(Car(_id=11, velocity=2/3.6, root_position=20, root_station=6, call_duration=7200, root_time=11))
         )
         sim.step()
 
@@ -402,5 +485,232 @@ class TestSimulator(unittest.TestCase):
         self.assertEqual(len(sim.event_list), 0)
         self.assertEqual(sim.clock, 7211)
 
+    def test_common_random_numbers_same_car_population(self):
+        """Test that CRN generators give every policy the same arriving cars"""
+        sims = [
+            Simulator(gen, channel_reserved_for_handover=reserved, logging=True)
+            for gen, reserved in zip(Generator.common_random_numbers(2, seed=8), (0, 1))
+        ]
+        arrivals = []
+        for sim in sims:
+            sim.run(3000)
+            arrivals.append([
+                (car.root_time, car.velocity, car.call_duration, car.root_position, car.root_station)
+                for _, event_type, _, car, *_ in sim.log if event_type == EventType.CALL_INITIATION
+            ])
+
+        n = min(len(a) for a in arrivals)
+        self.assertGreater(n, 100)
+        self.assertEqual(arrivals[0][:n], arrivals[1][:n])
+
+    def test_itinerary_engine_matches_default(self):
+        """Test that the itinerary engine reproduces the default engine, event time for event time"""
+        for seed, reserved in [(0, 0), (1, 1)]:
+            results = []
+            for itinerary in (False, True):
+                sim = Simulator(Generator(seed=seed), channel_reserved_for_handover=reserved, itinerary=itinerary)
+                times = []
+                for _ in range(20000):
+                    sim.step()
+                    times.append(sim.clock)
+                results.append((times, sim.blocked_calls, sim.dropped_calls, sim.completed_calls, sim.base_stations))
+            self.assertEqual(results[0], results[1])
+
+    def test_calendar_event_list_matches_heap(self):
+        """Test that the calendar queue event list reproduces the heap event list"""
+        results = []
+        for event_list in ('heap', 'calendar'):
+            sim = Simulator(Generator(seed=2), channel_reserved_for_handover=1, event_list=event_list)
+            sim.run(20000)
+            results.append((sim.clock, sim.blocked_calls, sim.dropped_calls, sim.completed_calls, sim.base_stations))
+        self.assertEqual(results[0], results[1])
+
+    def test_occupancy_statistics(self):
+        """Test that the online statistics agree with the counters and the channel state"""
+        for itinerary in (False, True):
+            sim = Simulator(Generator(seed=6), channel_reserved_for_handover=1, itinerary=itinerary)
+            sim.run(20000)
+            stats = sim.stats
+            self.assertEqual(stats.levels, sim.base_stations)
+            self.assertEqual(sum(stats.blocked), sim.blocked_calls)
+            self.assertEqual(sum(stats.dropped), sim.dropped_calls)
+            np.testing.assert_allclose(stats.occupancy_distribution(sim.clock).sum(axis=1), 1.0)
+            self.assertTrue(np.all(stats.mean_occupancy(sim.clock) > 0))
+            self.assertTrue(np.all(stats.utilization(sim.clock) <= 1))
+
+    def test_batch_means(self):
+        """Test the single long run batch means estimator"""
+        sim = Simulator(Generator(seed=3), channel_reserved_for_handover=1)
+        result = sim.batch_means(warm_up_steps=2000, steps=64000, micro_batches=64)
+        self.assertTrue(0 < result.blocked[0] < 1 and 0 <= result.dropped[0] < 1)
+        self.assertGreater(result.blocked[1], 0)
+        self.assertEqual(result.batches, 64 // result.batch_size)
+        self.assertGreaterEqual(result.batches, 10)
+
+    def test_detect_warm_up(self):
+        """Test that the detected warm-up starts the steady-state collection"""
+        sim = Simulator(Generator(seed=2), channel_reserved_for_handover=1)
+        warm_up_steps = sim.detect_warm_up(batch_steps=500, min_batches=20)
+        self.assertTrue(sim.warm_up_converged)
+        self.assertEqual(warm_up_steps, sim.warm_up_steps)
+        self.assertEqual(warm_up_steps % 500, 0)
+
+        # The automatic warm-up gives the same rates as passing the detected point
+        auto = Simulator(Generator(seed=2), channel_reserved_for_handover=1)
+        auto.detect_warm_up = lambda: Simulator.detect_warm_up(auto, batch_steps=500, min_batches=20)
+        rates = auto.steady_state_rates(None, 30000)
+        manual = Simulator(Generator(seed=2), channel_reserved_for_handover=1).steady_state_rates(warm_up_steps, 30000)
+        self.assertEqual(rates, manual)
+
+        # The occupancy statistics restart where detection stopped
+        self.assertEqual(sim.stats.start_time, sim.clock)
+        self.assertEqual(sum(sim.stats.initiations), 0)
+
+    def test_batch_means_detected_warm_up(self):
+        """Test that batch means reuse the steps detection ran past the truncation point"""
+        warm_up_steps = Simulator(Generator(seed=2), channel_reserved_for_handover=1).detect_warm_up(
+            batch_steps=500, min_batches=20)
+        auto = Simulator(Generator(seed=2), channel_reserved_for_handover=1)
+        auto.detect_warm_up = lambda: Simulator.detect_warm_up(auto, batch_steps=500, min_batches=20)
+        result = auto.batch_means(None, 32000, micro_batches=32)
+        self.assertGreater(auto._steps_since_warm_up, 0)
+        self.assertEqual(auto.steps, warm_up_steps + 32000)
+
+        manual = Simulator(Generator(seed=2), channel_reserved_for_handover=1)
+        self.assertEqual(result, manual.batch_means(warm_up_steps, 32000, micro_batches=32))
+
+        # Micro-batches shorter than a detection batch are rounded up to one: 64 of 500 steps
+        short = Simulator(Generator(seed=2), channel_reserved_for_handover=1)
+        short.detect_warm_up = lambda: Simulator.detect_warm_up(short, batch_steps=500, min_batches=20)
+        result = short.batch_means(None, 32000, micro_batches=256)
+        self.assertEqual(short.steps, warm_up_steps + 32000)
+        self.assertEqual(result.batches * result.batch_size, 64)
+
+    def test_invalid_event_list(self):
+        """Test that an unknown event list is rejected"""
+        with self.assertRaises(ValueError):
+            Simulator(Generator(seed=1), event_list='splay')
+
+    def test_antithetic_replication(self):
+        """Test that an antithetic pair returns the average of its two runs"""
+        blocked, dropped = Simulator.antithetic_replication(5, warm_up_steps=500, steps=3000)
+
+        runs = [Simulator(gen).steady_state_rates(500, 3000) for gen in Generator.antithetic_pair(5)]
+        self.assertAlmostEqual(blocked, (runs[0][0] + runs[1][0]) / 2)
+        self.assertAlmostEqual(dropped, (runs[0][1] + runs[1][1]) / 2)
+        self.assertTrue(0 <= blocked <= 1 and 0 <= dropped <= 1)
+
+    def test_snapshot_restore_continues_identically(self):
+        """Test that a restored simulator continues exactly like the original"""
+        sim = Simulator(Generator(seed=4), channel_reserved_for_handover=1)
+        sim.run(3000)
+        restored = Simulator.restore(sim.snapshot())
+        # The inline heap of the restored simulator is its own event list's heap
+        self.assertIs(restored._heap, restored.event_list.heap)
+        sim.run(3000)
+        restored.run(3000)
+        self.assertEqual(restored.clock, sim.clock)
+        self.assertEqual((restored.blocked_calls, restored.dropped_calls, restored.completed_calls),
+                         (sim.blocked_calls, sim.dropped_calls, sim.completed_calls))
+        self.assertEqual(restored.base_stations, sim.base_stations)
+
+    def test_checkpoint_round_trip(self):
+        """Test that a checkpoint file restores the simulator and drops the log sink"""
+        sim = Simulator(Generator(seed=4, block_size=64), log_sink=MagicMock())
+        sim.run(2000)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sim.ckpt')
+            sim.save_checkpoint(path)
+            self.assertEqual(os.listdir(directory), ['sim.ckpt'])
+            restored = Simulator.load_checkpoint(path)
+        self.assertIsNone(restored.log_sink)
+        sim.log_sink = None
+        sim.run(2000)
+        restored.run(2000)
+        self.assertEqual((restored.clock, restored.blocked_calls), (sim.clock, sim.blocked_calls))
+
+    def test_fork(self):
+        """Test that forks share the warm-up state but draw from their own streams"""
+        sim = Simulator(Generator(seed=4))
+        sim.run(2000)
+        forks = sim.fork(3, root_seed=9)
+        self.assertTrue(all(fork.clock == sim.clock for fork in forks))
+        for fork in forks:
+            fork.run(2000)
+        self.assertEqual(len({fork.clock for fork in forks}), 3)
+
+        # The same root seed gives the same forks
+        again = sim.fork(3, root_seed=9)
+        again[1].run(2000)
+        self.assertEqual(again[1].clock, forks[1].clock)
+
+    def test_channels_and_stations(self):
+        """Test a highway with more cells and channels than the defaults"""
+        gen = Generator(seed=3)
+        gen.base_station_max = 29
+        sim = Simulator(gen, total_channels=12, number_of_base_stations=30, itinerary=True)
+        sim.run(5000)
+        self.assertEqual(len(sim.base_stations), 30)
+        self.assertLessEqual(max(sim.base_stations), 12)
+        self.assertGreater(sum(sim.stats.initiations[20:]), 0)
+
+        # Fewer channels block more calls
+        few = Simulator(Generator(seed=3), total_channels=4)
+        many = Simulator(Generator(seed=3), total_channels=10)
+        few.run(5000)
+        many.run(5000)
+        self.assertGreater(few.blocked_calls, many.blocked_calls)
+
+    def test_run_until(self):
+        """Test that run_until processes exactly the events up to the horizon"""
+        sim = Simulator(Generator(seed=7))
+        sim.run_until(5000.0)
+        self.assertEqual(sim.clock, 5000.0)
+        self.assertGreater(sim.event_list.peek()[0], 5000.0)
+
+        stepped = Simulator(Generator(seed=7))
+        while stepped.event_list.peek()[0] <= 5000.0:
+            stepped.step()
+        self.assertEqual((sim.blocked_calls, sim.completed_calls), (stepped.blocked_calls, stepped.completed_calls))
+
+        with self.assertRaises(ValueError):
+            sim.run_until(100.0)
+
+    def test_time_recorder(self):
+        """Test that time samples hold the counters at the sample times"""
+        recorder = MetricRecorder(every_time=500.0, capacity=4)
+        sim = Simulator(Generator(seed=7))
+        sim.run_until(3000.0, recorder)
+        np.testing.assert_array_equal(recorder['time'], np.arange(1, 7) * 500.0)
+
+        # The same run without a recorder, stopped at every sample time
+        plain = Simulator(Generator(seed=7))
+        for k, time in enumerate(recorder['time']):
+            plain.run_until(time)
+            self.assertEqual(recorder['blocked'][k], plain.blocked_calls)
+            self.assertEqual(recorder['completed'][k], plain.completed_calls)
+            self.assertEqual(recorder['busy_channels'][k], sum(plain.base_stations))
+
+        # A recorder can follow several runs
+        steps = recorder.steps
+        sim.run(2000, recorder)
+        self.assertEqual(recorder.steps, steps + 2000)
+        self.assertTrue(np.all(np.diff(recorder['time']) == 500.0))
+        self.assertLess(recorder['time'][-1], sim.clock)
+
+    def test_step_recorder(self):
+        """Test that step samples match the notebook's run(1000) loop"""
+        recorder = MetricRecorder(every_steps=1000)
+        sim = Simulator(Generator(seed=8))
+        sim.run(5500, recorder)
+        self.assertEqual(len(recorder), 5)
+
+        looped = Simulator(Generator(seed=8))
+        for k in range(5):
+            looped.run(1000)
+            self.assertEqual(recorder['steps'][k], 1000 * (k + 1))
+            self.assertEqual(recorder['time'][k], looped.clock)
+            self.assertEqual(recorder['dropped'][k], looped.dropped_calls)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
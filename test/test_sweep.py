@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+
+# Add parent directory to path to import the sweep engine
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import sweep
+from sweep import ResultCache, expand_grid, run_sweep, split_config
+from generator import Generator, spawn_seeds
+from simulator import Simulator
+
+PARAMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'params.yaml')
+SHORT_RUN = dict(warm_up_steps=300, steps=2000, params_file=PARAMS_FILE, processes=1)
+BASE_PARAMS = Generator(PARAMS_FILE).params
+
+
+class TestSweep(unittest.TestCase):
+    def test_expand_grid(self):
+        """Test that the grid expands to every combination, last axis fastest"""
+        configs = expand_grid({'channel_reserved_for_handover': [0, 1], 'total_channels': [10, 12, 14]})
+        self.assertEqual(len(configs), 6)
+        self.assertEqual(configs[1], {'channel_reserved_for_handover': 0, 'total_channels': 12})
+
+    def test_split_config(self):
+        """Test that sweep axes are routed to the Simulator or the distribution parameters"""
+        simulator_kwargs, params = split_config(
+            {'channel_reserved_for_handover': 1, 'number_of_base_stations': 30, 'inter_arrival_time.lambda': 0.9},
+            BASE_PARAMS
+        )
+        self.assertEqual(simulator_kwargs, {'channel_reserved_for_handover': 1, 'number_of_base_stations': 30})
+        self.assertEqual(params['inter_arrival_time']['lambda'], 0.9)
+        self.assertEqual(params['base_station']['max'], 29)
+        self.assertEqual(BASE_PARAMS['base_station']['max'], 19)
+
+        with self.assertRaises(ValueError):
+            split_config({'arrival_rate': 0.9}, BASE_PARAMS)
+
+    def test_matches_direct_run(self):
+        """Test that a sweep point holds the replications a plain Simulator gives"""
+        with tempfile.TemporaryDirectory() as directory:
+            point, = run_sweep({'channel_reserved_for_handover': [1]}, 2, cache_dir=directory, **SHORT_RUN)
+        seed = spawn_seeds(0, 2)[1]
+        expected = Simulator(Generator(PARAMS_FILE, seed=seed), 1).steady_state_rates(300, 2000)
+        np.testing.assert_array_equal(point.observations[1], expected)
+        self.assertEqual(point.config, {'channel_reserved_for_handover': 1})
+
+    def test_only_new_points_run(self):
+        """Test that cached replications are loaded instead of run again"""
+        with tempfile.TemporaryDirectory() as directory:
+            first = run_sweep({'total_channels': [10, 12]}, 2, cache_dir=directory, **SHORT_RUN)
+            with patch('sweep._run_point', wraps=sweep._run_point) as runner:
+                second = run_sweep({'total_channels': [10, 12, 14]}, 2, cache_dir=directory, **SHORT_RUN)
+            self.assertEqual(runner.call_count, 2)
+            for a, b in zip(first, second):
+                np.testing.assert_array_equal(a.observations, b.observations)
+
+            # A different model version misses the cache
+            with patch('sweep.model_version', return_value='edited'), \
+                    patch('sweep._run_point', wraps=sweep._run_point) as runner:
+                run_sweep({'total_channels': [10]}, 2, cache_dir=directory, **SHORT_RUN)
+            self.assertEqual(runner.call_count, 2)
+
+    def test_cache_round_trip(self):
+        """Test that the cache returns what was stored under a key"""
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(directory)
+            material = {'seed': [1, [0]], 'steps': 10}
+            key = cache.key(material)
+            self.assertIsNone(cache.get(key))
+            cache.put(key, material, (0.1, 0.2))
+            self.assertEqual(cache.get(key), (0.1, 0.2))
+            self.assertEqual(key, ResultCache.key({'steps': 10, 'seed': [1, [0]]}))
+
+
+if __name__ == '__main__':
+    unittest.main()
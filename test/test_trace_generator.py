@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+
+# Add parent directory to path to import the trace generator
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from trace_generator import TraceGenerator, load_trace, TRACE_COLUMNS
+from simulator import Simulator, EventType
+
+PARAMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'params.yaml')
+
+TRACE_CSV = """Arrival no,Arrival time (sec),Base station ,Call duration (sec),velocity (km/h)
+1,0.000,18,76.134,125.934
+2,0.068,7,159.056,95.511
+3,0.559,6,179.465,127.757
+4,0.625,14,163.108,134.311
+5,2.500,1,20.000,110.000
+"""
+
+
+class TestTraceGenerator(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.trace_file = os.path.join(self.tmp_dir, 'trace.csv')
+        with open(self.trace_file, 'w') as file:
+            file.write(TRACE_CSV)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_cache_layout(self):
+        """Test that the CSV is converted into a columnar memory-mapped cache"""
+        trace = load_trace(self.trace_file)
+        self.assertIsInstance(trace, np.memmap)
+        self.assertEqual(trace.shape, (len(TRACE_COLUMNS), 5))
+        np.testing.assert_allclose(trace[0], [0.0, 0.068, 0.559, 0.625, 2.5])
+        np.testing.assert_allclose(trace[1], [18, 7, 6, 14, 1])
+        self.assertTrue(os.path.exists(self.trace_file + '.npy'))
+
+    def test_cache_skips_blank_lines(self):
+        """Test that blank rows and a trailing blank line are not counted as calls"""
+        with open(self.trace_file, 'w') as file:
+            file.write(TRACE_CSV.replace("\n3,", "\n\n3,") + "\n\n")
+        trace = load_trace(self.trace_file)
+        self.assertEqual(trace.shape, (len(TRACE_COLUMNS), 5))
+        np.testing.assert_allclose(trace[0], [0.0, 0.068, 0.559, 0.625, 2.5])
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ['trace.csv', 'trace.csv.npy'])
+
+    def test_cache_rebuilt_when_stale(self):
+        """Test that an outdated cache is rebuilt from the CSV"""
+        load_trace(self.trace_file)
+        time.sleep(0.01)
+        with open(self.trace_file, 'a') as file:
+            file.write("6,3.000,2,30.000,100.000\n")
+        self.assertEqual(load_trace(self.trace_file).shape[1], 6)
+
+    def test_replay_values(self):
+        """Test that the replayed values follow the trace across block refills"""
+        gen = TraceGenerator(self.trace_file, PARAMS_FILE, seed=1, block_size=2)
+        self.assertEqual(len(gen), 5)
+
+        inter_arrival_times = [gen.generate_inter_arrival_time() for _ in range(5)]
+        np.testing.assert_allclose(np.cumsum(inter_arrival_times), [0.0, 0.068, 0.559, 0.625, 2.5])
+        self.assertEqual([gen.generate_base_station() for _ in range(5)], [17, 6, 5, 13, 0])
+        np.testing.assert_allclose([gen.generate_velocity() for _ in range(5)],
+                                   [125.934, 95.511, 127.757, 134.311, 110.0])
+
+        # Variables missing from the trace are still sampled
+        self.assertIn(gen.generate_direction(), [-1, 1])
+
+        with self.assertRaises(ValueError):
+            gen.generate_velocity()
+
+    def test_drives_simulator(self):
+        """Test that a simulator driven by the trace initiates calls at the recorded times"""
+        gen = TraceGenerator(self.trace_file, PARAMS_FILE, seed=1)
+        sim = Simulator(gen, logging=True)
+        for _ in range(4):
+            sim.step()
+
+        initiations = [(time, car) for time, event_type, _, car, *_ in sim.log if event_type == EventType.CALL_INITIATION]
+        np.testing.assert_allclose([time for time, _ in initiations], [0.0, 0.068, 0.559, 0.625])
+        self.assertEqual([car.root_station for _, car in initiations], [17, 6, 5, 13])
+
+    def test_replays_whole_trace(self):
+        """Test that every recorded call is processed and no call is generated after the last one"""
+        for block_size in (2, 4096):
+            gen = TraceGenerator(self.trace_file, PARAMS_FILE, seed=1, block_size=block_size)
+            sim = Simulator(gen, logging=True)
+            sim.run_until(1e6)
+
+            initiations = [time for time, event_type, *_ in sim.log if event_type == EventType.CALL_INITIATION]
+            np.testing.assert_allclose(initiations, [0.0, 0.068, 0.559, 0.625, 2.5])
+            self.assertTrue(gen.exhausted)
+            self.assertEqual(sim.blocked_calls + sim.dropped_calls + sim.completed_calls, 5)
+            self.assertEqual(len(sim.event_list), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
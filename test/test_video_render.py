@@ -0,0 +1,107 @@
+import unittest
+import sys
+import os
+import importlib.util
+import multiprocessing
+import subprocess
+import tempfile
+from unittest.mock import patch
+
+# Add parent directory to path to import the video renderer
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from video_render import VideoWriter, ffmpeg_executable, map_ordered, render_plotly_video, render_video, repeat_runs
+
+
+def has_ffmpeg():
+    try:
+        ffmpeg_executable()
+    except ValueError:
+        return False
+    return True
+
+
+HAS_PLOTLY_RENDERER = all(importlib.util.find_spec(name) is not None for name in ('plotly', 'kaleido'))
+
+
+def encode(frame):
+    return f"<{frame}>".encode()
+
+
+def process_id(_):
+    return os.getpid()
+
+
+class TestMapOrdered(unittest.TestCase):
+    def test_order(self):
+        """Test that results come back in item order, in-process and on a pool"""
+        for processes in (1, 2):
+            self.assertEqual(list(map_ordered(encode, range(20), processes=processes, queue_size=3)),
+                             [encode(i) for i in range(20)])
+
+    def test_bounded_queue(self):
+        """Test that at most queue_size items are consumed ahead of the results"""
+        consumed = []
+
+        def items():
+            for i in range(30):
+                consumed.append(i)
+                yield i
+
+        for yielded, _ in enumerate(map_ordered(encode, items(), processes=2, queue_size=4), start=1):
+            self.assertLessEqual(len(consumed) - yielded, 4)
+        self.assertEqual(len(consumed), 30)
+
+    def test_pool_processes(self):
+        """Test that the items run in pool workers, with the default or a spawn context"""
+        for mp_context in (None, multiprocessing.get_context('spawn')):
+            self.assertNotIn(os.getpid(), set(map_ordered(process_id, range(4), processes=2, mp_context=mp_context)))
+
+    def test_invalid_queue_size(self):
+        """Test that a negative queue size is rejected"""
+        with self.assertRaises(ValueError):
+            list(map_ordered(encode, range(3), processes=2, queue_size=-1))
+
+
+class TestRenderVideo(unittest.TestCase):
+    def test_repeat_runs(self):
+        """Test that consecutive equal frames are grouped"""
+        self.assertEqual(list(repeat_runs([1, 1, 2, 1, 3, 3, 3])), [(1, 2), (2, 1), (1, 1), (3, 3)])
+        self.assertEqual(list(repeat_runs([])), [])
+
+    def test_streams_images_in_order(self):
+        """Test that the images are piped to ffmpeg in order, repeated frames included"""
+        with patch('video_render.subprocess.Popen') as popen:
+            popen.return_value.wait.return_value = 0
+            written = render_video([0, 1, 1, 1, 2], encode, 'out.mp4', processes=2, queue_size=2, ffmpeg='ffmpeg')
+        self.assertEqual(written, 5)
+        command = popen.call_args[0][0]
+        self.assertEqual((command[0], command[-1]), ('ffmpeg', 'out.mp4'))
+        images = [call[0][0] for call in popen.return_value.stdin.write.call_args_list]
+        self.assertEqual(images, [b'<0>', b'<1>', b'<1>', b'<1>', b'<2>'])
+        popen.return_value.stdin.close.assert_called_once()
+
+    def test_encoder_failure(self):
+        """Test that a failing ffmpeg raises CalledProcessError"""
+        with patch('video_render.subprocess.Popen') as popen:
+            popen.return_value.wait.return_value = 1
+            with self.assertRaises(subprocess.CalledProcessError):
+                with VideoWriter('out.mp4', ffmpeg='ffmpeg') as writer:
+                    writer.write(b'')
+
+    @unittest.skipUnless(HAS_PLOTLY_RENDERER and has_ffmpeg(), "needs plotly, kaleido and ffmpeg")
+    def test_render_plotly_video(self):
+        """Test that a plotly animation is rendered end to end to a video file"""
+        import plotly.graph_objects as go
+        fig = go.Figure(
+            data=[go.Scatter(x=[0], y=[0])],
+            frames=[go.Frame(data=[go.Scatter(x=[i], y=[i])]) for i in range(3)] * 2
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, 'animation.mp4')
+            written = render_plotly_video(fig, output_path, width=320, height=240, processes=2)
+            self.assertEqual(written, 6)
+            self.assertGreater(os.path.getsize(output_path), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
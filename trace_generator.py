@@ -0,0 +1,127 @@
+import os
+from itertools import islice
+from typing import Optional
+
+import numpy as np
+
+from generator import Generator, Seed
+
+# Columns of the recorded trace, in the order they are stored in the binary cache
+TRACE_COLUMNS = ('arrival_time', 'base_station', 'call_duration', 'velocity')
+# Variables replayed from the trace; position and direction are not recorded and are sampled
+TRACE_DISTRIBUTIONS = ('inter_arrival_time', 'base_station', 'call_duration', 'velocity')
+
+CSV_CHUNK_ROWS = 100_000
+
+
+def build_trace_cache(csv_file: str, cache_file: str, chunk_rows: int = CSV_CHUNK_ROWS) -> None:
+    """
+    Convert a call log CSV into a columnar `.npy` cache of shape (len(TRACE_COLUMNS), n).
+
+    The CSV is expected to look like PCS_TEST_DETERMINSTIC.csv: a header row, then
+    (arrival no, arrival time, base station, call duration, velocity) per call.
+    It is parsed in chunks of `chunk_rows`, so memory use does not grow with the trace.
+    Blank lines are skipped.
+    """
+    with open(csv_file, 'r') as file:
+        n = sum(1 for line in file if line.strip()) - 1  # minus the header row
+
+    tmp_file = cache_file + '.tmp.npy'
+    cache = np.lib.format.open_memmap(tmp_file, mode='w+', dtype=np.float64, shape=(len(TRACE_COLUMNS), n))
+    with open(csv_file, 'r') as file:
+        next(file)
+        rows = (line for line in file if line.strip())
+        row = 0
+        while row < n:
+            chunk = np.loadtxt(islice(rows, chunk_rows), delimiter=',', usecols=(1, 2, 3, 4), ndmin=2)
+            cache[:, row:row + len(chunk)] = chunk.T
+            row += len(chunk)
+    cache.flush()
+    del cache
+    # Only publish a complete cache, so an interrupted conversion is redone next time
+    os.replace(tmp_file, cache_file)
+
+
+def load_trace(csv_file: str, cache_file: Optional[str] = None) -> np.ndarray:
+    """
+    Memory-map the columnar cache of a call log CSV, building it first if it is
+    missing or older than the CSV.
+
+    Args:
+        csv_file: Path to the recorded trace
+        cache_file: Path of the binary cache. Defaults to `<csv_file>.npy`
+
+    Returns:
+        Read-only memmap of shape (len(TRACE_COLUMNS), number of calls)
+    """
+    cache_file = cache_file or csv_file + '.npy'
+    if not os.path.exists(cache_file) or os.path.getmtime(cache_file) < os.path.getmtime(csv_file):
+        build_trace_cache(csv_file, cache_file)
+    return np.load(cache_file, mmap_mode='r')
+
+
+class TraceGenerator(Generator):
+    """
+    Generator that replays arrivals from a recorded call log instead of the fitted
+    distributions.
+
+    Arrival time, base station, call duration and velocity come from the trace; position
+    and direction are not recorded and are sampled from `params_file` as usual. Records
+    are streamed from a memory-mapped cache in blocks of `block_size`, so start-up time
+    and memory use do not depend on the trace size.
+    """
+
+    def __init__(self, trace_file: str, params_file: str = 'params.yaml', seed: Seed = None,
+                 block_size: int = 4096, cache_file: Optional[str] = None,
+                 base_station_offset: int = 1, **kwargs):
+        """
+        Args:
+            trace_file: Path to the call log CSV
+            params_file: Path to the YAML file with the position and direction parameters
+            seed: Random seed for the sampled variables
+            block_size: Number of records (and samples) handed out per refill
+            cache_file: Path of the binary cache, see `load_trace`
+            base_station_offset: Number of the first base station in the trace (1 in the assignment data)
+            **kwargs: Forwarded to Generator (bit_generator, substreams, sampling)
+        """
+        if block_size is None:
+            raise ValueError("TraceGenerator always runs in buffered mode, block_size cannot be None.")
+        super().__init__(params_file, seed=seed, block_size=block_size, **kwargs)
+        self.trace = load_trace(trace_file, cache_file)
+        self.base_station_offset = base_station_offset
+        self._trace_pos = {name: 0 for name in TRACE_DISTRIBUTIONS}
+
+    def __len__(self) -> int:
+        """Number of calls in the trace."""
+        return self.trace.shape[1]
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether every recorded arrival has been handed out."""
+        name = 'inter_arrival_time'
+        # Records read into the buffer but not handed out yet are still to come
+        unread = len(self._buffers[name]) - self._buffer_pos[name]
+        return self._trace_pos[name] - unread >= len(self)
+
+    def _draw(self, name: str, size: Optional[int] = None):
+        """Read the next `size` records of a replayed variable, or sample the others."""
+        if name not in TRACE_DISTRIBUTIONS:
+            return super()._draw(name, size)
+
+        pos = self._trace_pos[name]
+        if pos >= len(self):
+            raise ValueError(f"Trace exhausted after {len(self)} calls.")
+        end = min(pos + (size or 1), len(self))
+        self._trace_pos[name] = end
+
+        if name == 'inter_arrival_time':
+            arrivals = self.trace[0, max(pos - 1, 0):end]
+            # The first call arrives relative to the simulation start at time 0
+            values = np.diff(arrivals, prepend=0.0) if pos == 0 else np.diff(arrivals)
+        elif name == 'base_station':
+            values = self.trace[1, pos:end].astype(int) - self.base_station_offset
+        elif name == 'call_duration':
+            values = np.array(self.trace[2, pos:end])
+        else:
+            values = np.array(self.trace[3, pos:end])
+        return values if size is not None else values.item()
@@ -0,0 +1,204 @@
+import multiprocessing
+import os
+import shutil
+import subprocess
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple
+
+# Layout every plotly worker process draws its frames on, set by init_plotly_worker
+_plotly_layout = None
+
+
+def ffmpeg_executable() -> str:
+    """The ffmpeg binary of imageio-ffmpeg (installed with moviepy), else the one on the PATH."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except ImportError:
+        path = shutil.which('ffmpeg')
+        if path is None:
+            raise ValueError("ffmpeg not found: install imageio-ffmpeg or put ffmpeg on the PATH.")
+        return path
+
+
+class VideoWriter:
+    """
+    Video encoder fed through a pipe: encoded images (PNG by default) written to it are
+    streamed to the stdin of an ffmpeg process, so no frame ever touches the disk.
+    """
+
+    def __init__(self, output_path: str, fps: float = 10, codec: str = 'libx264', input_codec: str = 'png',
+                 ffmpeg: Optional[str] = None):
+        """
+        Args:
+            output_path: Path of the video file
+            fps: Frames per second of the video
+            codec: ffmpeg codec of the video
+            input_codec: ffmpeg codec of the images passed to `write`
+            ffmpeg: Path to the ffmpeg binary. Defaults to ffmpeg_executable()
+        """
+        self.command = [
+            ffmpeg or ffmpeg_executable(), '-y', '-loglevel', 'error',
+            '-f', 'image2pipe', '-framerate', str(fps), '-c:v', input_codec, '-i', '-',
+            '-c:v', codec, '-pix_fmt', 'yuv420p', output_path,
+        ]
+        self.process = None
+        self.frames = 0
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE)
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.process.kill()
+            self.process.wait()
+
+    def write(self, image: bytes):
+        """Append one encoded image to the video."""
+        self.process.stdin.write(image)
+        self.frames += 1
+
+    def close(self):
+        """Finish the video, raising CalledProcessError if ffmpeg failed."""
+        self.process.stdin.close()
+        returncode = self.process.wait()
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, self.command)
+
+
+def map_ordered(func: Callable, items: Iterable, processes: Optional[int] = None, queue_size: Optional[int] = None,
+                initializer: Optional[Callable] = None, initargs: Sequence = (),
+                mp_context: Optional[multiprocessing.context.BaseContext] = None) -> Iterator:
+    """
+    Yield func(item) for every item, in order, computed on a process pool.
+
+    Items are submitted as the results are consumed, with at most `queue_size` in flight,
+    so only that many results are ever held however long `items` is. With the spawn start
+    method (the default on Windows and macOS) the workers re-import the caller's main
+    module, so scripts must guard their entry point with `if __name__ == '__main__':`.
+
+    Args:
+        func: Picklable function of one item
+        items: Picklable items, consumed lazily
+        processes: Size of the process pool. Defaults to the CPU count; 1 runs in this process
+        queue_size: Maximum number of items submitted ahead of the consumer. Defaults to
+            twice the pool size
+        initializer: Called with `initargs` once in every worker (or here, without a pool)
+        mp_context: Multiprocessing context of the pool. Defaults to the platform's default
+    """
+    if processes == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for item in items:
+            yield func(item)
+        return
+
+    processes = processes or os.cpu_count()
+    queue_size = queue_size or 2 * processes
+    if queue_size <= 0:
+        raise ValueError(f"queue_size must be positive, got {queue_size}.")
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=processes, mp_context=mp_context,
+                             initializer=initializer, initargs=tuple(initargs)) as pool:
+        for item in items:
+            if len(pending) == queue_size:
+                yield pending.popleft().result()
+            pending.append(pool.submit(func, item))
+        while pending:
+            yield pending.popleft().result()
+
+
+def repeat_runs(frames: Iterable) -> Iterator[Tuple[Any, int]]:
+    """Group consecutive equal frames into (frame, count) runs."""
+    run, count = None, 0
+    for frame in frames:
+        if count and frame == run:
+            count += 1
+            continue
+        if count:
+            yield run, count
+        run, count = frame, 1
+    if count:
+        yield run, count
+
+
+def _rasterize_run(rasterize: Callable[[Any], bytes], run: Tuple[Any, int]) -> Tuple[bytes, int]:
+    frame, count = run
+    return rasterize(frame), count
+
+
+def render_video(frames: Iterable, rasterize: Callable[[Any], bytes], output_path: str, fps: float = 10,
+                 processes: Optional[int] = None, queue_size: Optional[int] = None,
+                 initializer: Optional[Callable] = None, initargs: Sequence = (), ffmpeg: Optional[str] = None,
+                 mp_context: Optional[multiprocessing.context.BaseContext] = None) -> int:
+    """
+    Rasterize frames on a process pool and stream the images to a video, in order.
+
+    The rasterized images go straight from the workers to the ffmpeg pipe through a
+    bounded queue (see map_ordered), so memory and disk usage stay flat however many
+    frames there are. A run of consecutive equal frames (e.g. a paused event) is
+    rasterized once and written repeatedly.
+
+    Args:
+        frames: Picklable frame data, consumed lazily
+        rasterize: Picklable function of one frame returning the encoded image (PNG)
+        output_path: Path of the video file
+        fps: Frames per second of the video
+        processes: Size of the process pool. Defaults to the CPU count; 1 runs in this process
+        queue_size: Maximum number of frames rasterized ahead of the encoder
+        initializer: Called with `initargs` once in every worker, e.g. init_plotly_worker
+        ffmpeg: Path to the ffmpeg binary
+        mp_context: Multiprocessing context of the pool. Defaults to the platform's default
+
+    Returns:
+        Number of frames written
+    """
+    with VideoWriter(output_path, fps, ffmpeg=ffmpeg) as writer:
+        for image, count in map_ordered(partial(_rasterize_run, rasterize), repeat_runs(frames), processes,
+                                        queue_size, initializer, initargs, mp_context):
+            for _ in range(count):
+                writer.write(image)
+    return writer.frames
+
+
+def init_plotly_worker(layout: dict):
+    """Set the figure layout (a plotly JSON dict) that rasterize_plotly_frame draws on."""
+    global _plotly_layout
+    _plotly_layout = layout
+
+
+def rasterize_plotly_frame(traces: Sequence[dict]) -> bytes:
+    """Draw the traces (plotly JSON dicts) of one frame on the worker's layout as a PNG."""
+    import plotly.graph_objects as go
+    import plotly.io as pio
+    return pio.to_image(go.Figure(data=list(traces), layout=_plotly_layout), format='png')
+
+
+def render_plotly_video(fig, output_path: str, fps: float = 10, width: int = 1280, height: int = 720,
+                        processes: Optional[int] = None, queue_size: Optional[int] = None,
+                        mp_context: Optional[multiprocessing.context.BaseContext] = None) -> int:
+    """
+    Render the frames of a plotly animation to a video file (see render_video).
+
+    Args:
+        fig: Plotly figure with frames
+        output_path: Path of the video file
+        fps: Frames per second of the video
+        width, height: Dimensions of the video
+        processes: Number of rasterizing processes. Defaults to the CPU count
+        queue_size: Maximum number of frames rasterized ahead of the encoder
+        mp_context: Multiprocessing context of the pool. Defaults to the platform's default
+
+    Returns:
+        Number of frames written
+    """
+    layout = fig.layout.to_plotly_json()
+    layout.update(width=width, height=height)
+    frames = (tuple(trace.to_plotly_json() for trace in frame.data) for frame in fig.frames)
+    return render_video(frames, rasterize_plotly_frame, output_path, fps, processes, queue_size,
+                        initializer=init_plotly_worker, initargs=(layout,), mp_context=mp_context)